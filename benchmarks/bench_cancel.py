@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк отмены потокового ответа по Ctrl+C.
+
+Во время потока процесс посылает себе SIGINT (как Ctrl+C в терминале) и
+замеряет, сколько проходит от сигнала до:
+  - возврата из ask_stream (RequestCancelled);
+  - исчезновения соединения из пула httpx (сокет закрыт клиентом);
+  - обнаружения обрыва mock-сервером (ближайшая запись в закрытый сокет,
+    поэтому сюда входит до двух интервалов между токенами).
+
+С --no-close синхронный клиент не закрывает поток (как до появления
+отмены): соединение остается занятым, пока сервер не допишет ответ.
+Асинхронный клиент закрывает поток при отмене задачи в любом случае.
+
+Запуск:
+    python benchmarks/bench_cancel.py [--runs 10] [--tps 100] [--after 0.3] [--async] [--no-close]
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import os
+import signal
+import statistics
+import sys
+import threading
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mock_server import MockServer  # noqa: E402
+
+
+def _pool(client):
+    """Пул соединений httpcore внутри OpenAI-клиента."""
+    return client.client._client._transport._pool
+
+
+def run_once(client, server, after: float, use_async: bool, runner) -> dict:
+    from penguin_tamer.llm_client import RequestCancelled
+
+    interrupted = []
+
+    def interrupt():
+        # Ctrl+C через after секунд после первого токена
+        while client.last_timings is None or client.last_timings.first_token is None:
+            time.sleep(0.001)
+        time.sleep(after)
+        interrupted.append(time.perf_counter())
+        os.kill(os.getpid(), signal.SIGINT)
+
+    server.disconnects.clear()
+    client.last_timings = None
+    threading.Thread(target=interrupt, daemon=True).start()
+    try:
+        if use_async:
+            runner.run(client.ask_stream("question"))
+        else:
+            client.ask_stream("question")
+        raise RuntimeError("Stream finished before Ctrl+C, increase the reply or lower --after")
+    except (RequestCancelled, KeyboardInterrupt):
+        returned = time.perf_counter()
+    signal_at = interrupted[0]
+
+    pool = _pool(client)
+    deadline = time.perf_counter() + 10
+    while pool.connections and time.perf_counter() < deadline:
+        time.sleep(0.0005)
+    released = time.perf_counter() if not pool.connections else None
+
+    while not server.disconnects and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    seen = server.disconnects[0] if server.disconnects else None
+
+    return {
+        "return": returned - signal_at,
+        "pool": released - signal_at if released else None,
+        "server": seen - signal_at if seen else None,
+        "kept": client.messages[-1]["content"].endswith("[Answer interrupted by the user]"),
+    }
+
+
+def _fmt(values) -> str:
+    values = [v for v in values if v is not None]
+    if not values:
+        return "не освобождено"
+    return f"медиана {statistics.median(values) * 1000:7.1f} мс, макс {max(values) * 1000:7.1f} мс"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream cancellation benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tps", type=float, default=100, help="Скорость потока, токенов/с")
+    parser.add_argument("--after", type=float, default=0.3, help="Ctrl+C через N секунд после первого токена")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="AsyncOpenRouterClient")
+    parser.add_argument("--no-close", action="store_true", help="Не закрывать поток (поведение до отмены)")
+    args = parser.parse_args()
+
+    from rich.console import Console
+    from penguin_tamer.llm_client import AsyncOpenRouterClient, OpenRouterClient
+    from penguin_tamer.stream_pipeline import StreamReader
+
+    if args.no_close:
+        StreamReader.close = lambda self: None
+
+    server = MockServer(ttft=0.05, tps=args.tps).start()
+    cls = AsyncOpenRouterClient if args.use_async else OpenRouterClient
+    client = cls(
+        console=Console(file=io.StringIO(), width=100), logger=logging.getLogger("bench"),
+        api_key="mock", api_url=server.url, model="mock", system_content="bench")
+    runner = asyncio.Runner() if args.use_async else None
+    client.client.chat.completions  # Импорт openai не входит в замер
+
+    results = [run_once(client, server, args.after, args.use_async, runner) for _ in range(args.runs)]
+    server.stop()
+
+    print(f"Клиент: {cls.__name__}, прогонов: {args.runs}, {args.tps:.0f} ток/с, "
+          f"закрытие потока: {'нет' if args.no_close else 'да'}")
+    print(f"  Возврат из ask_stream:   {_fmt([r['return'] for r in results])}")
+    print(f"  Соединение ушло из пула: {_fmt([r['pool'] for r in results])}")
+    print(f"  Сервер увидел обрыв:     {_fmt([r['server'] for r in results])}")
+    print(f"  Частичный ответ сохранен: {sum(r['kept'] for r in results)}/{args.runs}")
+
+
+if __name__ == "__main__":
+    main()
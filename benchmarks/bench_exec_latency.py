@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк задержки вывода команд: режим PTY против каналов (pipe).
+
+Дочерний процесс раз в --interval секунд печатает строку с текущим
+time.monotonic_ns() и ничего не сбрасывает сам — как большинство
+утилит. Приемник вывода в момент записи «в терминал» сравнивает время
+со значением из строки. Задержка = от записи в дочернем процессе до
+записи в терминал пользователя.
+
+В режиме pipe вывод дочернего процесса идет в канал и буферизуется
+блоками (строки приходят пачками или только в конце), в режиме PTY
+дочерний процесс видит терминал и выводит построчно. С --flush
+дочерний процесс сбрасывает каждую строку сам: тогда видна чистая
+стоимость пересылки в обоих режимах.
+
+Запуск:
+    python benchmarks/bench_exec_latency.py [--lines 50] [--interval 0.02] [--flush]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from penguin_tamer.script_executor import LinuxCommandExecutor, PtyCommandExecutor  # noqa: E402
+
+CHILD = (
+    "import sys, time\n"
+    "for _ in range({lines}):\n"
+    "    print(time.monotonic_ns(), flush={flush})\n"
+    "    time.sleep({interval})\n"
+)
+
+
+class LatencySink:
+    """«Терминал»: для каждой полной строки с отметкой времени считает задержку."""
+
+    def __init__(self) -> None:
+        self.pending = ""
+        self.latencies = []
+
+    def write(self, data) -> int:
+        now = time.monotonic_ns()
+        text = data.decode() if isinstance(data, bytes) else data
+        self.pending += text
+        *lines, self.pending = self.pending.replace("\r", "").split("\n")
+        for line in lines:
+            if line.strip().isdigit():
+                self.latencies.append((now - int(line)) / 1e6)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def run(mode: str, command: str) -> LatencySink:
+    sink = LatencySink()
+    if mode == "pty":
+        PtyCommandExecutor(output=sink).execute(command)
+    else:
+        with contextlib.redirect_stdout(sink):
+            LinuxCommandExecutor().execute(command)
+    return sink
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Command output latency benchmark")
+    parser.add_argument("--lines", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.02, help="Пауза между строками, секунды")
+    parser.add_argument("--flush", action="store_true", help="Дочерний процесс сбрасывает каждую строку")
+    args = parser.parse_args()
+
+    script = CHILD.format(lines=args.lines, interval=args.interval, flush=args.flush)
+    # PYTHONUNBUFFERED отключил бы обычную буферизацию stdout в канал
+    command = f"env -u PYTHONUNBUFFERED {sys.executable} -c '{script}'"
+    print(f"{args.lines} строк через {args.interval * 1000:.0f} мс, "
+          f"сброс в дочернем процессе: {'да' if args.flush else 'нет'}")
+    for mode in ("pipe", "pty"):
+        latencies = run(mode, command).latencies
+        print(f"  {mode:4}: строк {len(latencies)}, задержка медиана {statistics.median(latencies):8.2f} мс, "
+              f"p90 {statistics.quantiles(latencies, n=10)[-1]:8.2f} мс, макс {max(latencies):8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Стресс-бенчмарк вывода команд: stdout и stderr одновременно.
+
+Команда пишет сотни МБ вперемешку в оба канала. Сравниваются:
+  - "before": чтение всего stdout, затем stderr (как раньше в
+    LinuxCommandExecutor) — как только команда заполняет канал stderr
+    (64 КБ), она блокируется, и чтение stdout ждет вечно; бенчмарк
+    фиксирует зависание по таймауту;
+  - "after": LinuxCommandExecutor.execute — оба канала читаются через
+    selectors, вывод пересылается сразу (здесь — в /dev/null, чтобы
+    мерить чтение, а не терминал) и сохраняется в CaptureBuffer: в памяти
+    только начало и хвост (capture_memory_kb), остальное — во временном
+    файле, поэтому пик RSS не растет с объемом вывода.
+
+Дополнительно проверяется, что stderr показывается во время работы
+команды, а не после ее завершения.
+
+Запуск:
+    python benchmarks/bench_executor_streams.py [--size 200] [--timeout 5]
+"""
+
+import argparse
+import contextlib
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from penguin_tamer.script_executor import LinuxCommandExecutor  # noqa: E402
+
+MB = 1024 * 1024
+
+# Блоки по 256 КБ строк по 100 байт, поочередно в stdout и stderr
+WRITER = (
+    "import sys\n"
+    "line = b'x' * 99 + b'\\n'\n"
+    "block = line * 2621\n"
+    "for i in range({blocks}):\n"
+    "    (sys.stdout if i % 2 == 0 else sys.stderr).buffer.write(block)\n"
+)
+
+
+def _command(size_mb: float) -> tuple:
+    blocks = max(2, int(size_mb * MB / 262100))
+    script = WRITER.format(blocks=blocks)
+    return f"{sys.executable} -c \"{script}\"", blocks * 262100
+
+
+def run_before(command: str, timeout: float) -> str:
+    """Старый порядок чтения: сначала весь stdout, потом stderr."""
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    done = threading.Event()
+
+    def read():
+        for _ in process.stdout:
+            pass
+        for _ in process.stderr:
+            pass
+        done.set()
+
+    threading.Thread(target=read, daemon=True).start()
+    start = time.perf_counter()
+    if done.wait(timeout):
+        process.wait()
+        return f"завершено за {time.perf_counter() - start:.2f} с"
+    process.kill()
+    process.wait()
+    return f"зависание: нет завершения за {timeout:.0f} с, процесс убит"
+
+
+class _Sink:
+    """Приемник вывода: считает символы и запоминает время первой записи."""
+
+    def __init__(self) -> None:
+        self.chars = 0
+        self.first = None
+
+    def write(self, text: str) -> int:
+        if self.first is None:
+            self.first = time.perf_counter()
+        self.chars += len(text)
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def run_after(command: str) -> tuple:
+    out, err = _Sink(), _Sink()
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        result = LinuxCommandExecutor().execute(command)
+    elapsed = time.perf_counter() - start
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    return result, elapsed, out, err, rss
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Command output capture stress benchmark")
+    parser.add_argument("--size", type=float, default=200, help="Объем вывода, МБ (оба канала вместе)")
+    parser.add_argument("--timeout", type=float, default=5, help="Таймаут для старого способа, секунды")
+    args = parser.parse_args()
+
+    command, total = _command(args.size)
+    print(f"Вывод команды: {total / MB:.0f} МБ, stdout и stderr блоками по 256 КБ")
+    print(f"  before: {run_before(command, args.timeout)}")
+
+    result, elapsed, out, err, rss = run_after(command)
+    captured = len(result.stdout_capture) + len(result.stderr_capture)
+    complete = result.stdout_capture.complete and result.stderr_capture.complete
+    print(f"  after:  {elapsed:.2f} с, {total / MB / elapsed:.0f} МБ/с, код {result.returncode}")
+    print(f"          переслано stdout {out.chars / MB:.0f} МБ, stderr {err.chars / MB:.0f} МБ; "
+          f"сохранено {captured / MB:.0f} МБ ({'полностью' if captured == total and complete else 'НЕ полностью'}), "
+          f"в памяти {(len(result.stdout) + len(result.stderr)) / 1024:.0f} КБ")
+    print(f"          рост пика RSS: {rss / 1024:.0f} МБ")
+    result.close()
+
+    # stderr должен появиться сразу, а не после завершения команды
+    live = "echo start >&2; sleep 1; echo done"
+    start = time.perf_counter()
+    _, elapsed, out, err, _ = run_after(live)
+    print(f"\nКоманда 1 с со stderr в начале: stderr показан через "
+          f"{(err.first - start) * 1000:.0f} мс, команда завершилась через {elapsed * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк рендеринга Markdown в потоковом режиме.
+
+Подает записанный поток (по умолчанию 10k токенов) в два рендерера:
+- "before": на каждом чанке весь ответ заново разбирается в Markdown
+  (как ask_stream делал раньше);
+- "after": инкрементальный рендерер, который разбирает только открытый хвост.
+
+Live перерисовывает экран с частотой refresh_per_second, а не на каждом
+чанке, поэтому отрисовка в обоих вариантах выполняется раз в --render-every
+чанков. Печатается суммарное CPU-время (time.process_time).
+Вариант "before" растет квадратично: на 10k токенов он работает минуты.
+
+Запуск:
+    python benchmarks/bench_markdown_stream.py [--tokens 10000] [--render-every 10]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from rich.console import Console
+from rich.markdown import Markdown
+
+from penguin_tamer.markdown_stream import IncrementalMarkdown, MarkdownStreamRenderer
+
+
+SECTION = (
+    "## Step {n}: check the service\n"
+    "\n"
+    "Before restarting anything make sure the unit is really failing and "
+    "collect the logs, otherwise you will lose the evidence.\n"
+    "\n"
+    "[Code #{n}]\n"
+    "```bash\n"
+    "systemctl status nginx --no-pager\n"
+    "journalctl -u nginx --since '10 min ago' | tail -n 50\n"
+    "```\n"
+    "\n"
+    "| Option | Meaning |\n"
+    "|--------|---------|\n"
+    "| `--no-pager` | print everything at once |\n"
+    "| `--since` | limit the time window |\n"
+    "\n"
+    "- restart only after reading the logs\n"
+    "- keep a copy of the config\n"
+    "\n"
+)
+
+
+def recorded_stream(tokens: int) -> list[str]:
+    """Синтетическая "запись" потока: ответ, нарезанный на чанки ~по 4 символа."""
+    text = ""
+    n = 1
+    while len(text) < tokens * 4:
+        text += SECTION.format(n=n)
+        n += 1
+    return [text[i:i + 4] for i in range(0, tokens * 4, 4)]
+
+
+class _NullLive:
+    """Заглушка Live: печатает замороженные блоки в консоль, хранит хвост."""
+
+    def __init__(self, console: Console) -> None:
+        self.console = console
+        self.renderable = ""
+
+    def update(self, renderable) -> None:
+        self.renderable = renderable
+
+
+def bench_before(chunks: list[str], render_every: int) -> float:
+    console = Console(file=io.StringIO(), width=100, force_terminal=True)
+    parts = []
+    start = time.process_time()
+    for i, chunk in enumerate(chunks, 1):
+        parts.append(chunk)
+        markdown = Markdown("".join(parts))
+        if i % render_every == 0:
+            list(console.render(markdown))
+    return time.process_time() - start
+
+
+def bench_after(chunks: list[str], render_every: int) -> float:
+    console = Console(file=io.StringIO(), width=100, force_terminal=True)
+    live = _NullLive(console)
+    renderer = MarkdownStreamRenderer(live)
+    start = time.process_time()
+    for i, chunk in enumerate(chunks, 1):
+        renderer.feed(chunk)
+        if i % render_every == 0:
+            list(console.render(live.renderable))
+    return time.process_time() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=10000)
+    parser.add_argument("--render-every", type=int, default=10)
+    args = parser.parse_args()
+
+    chunks = recorded_stream(args.tokens)
+    frozen = len(IncrementalMarkdown().feed("".join(chunks)))
+    print(f"Stream: {len(chunks)} chunks, {sum(map(len, chunks))} chars, {frozen} blocks")
+
+    after = bench_after(chunks, args.render_every)
+    print(f"after  (incremental): {after:8.2f} s CPU")
+    before = bench_before(chunks, args.render_every)
+    print(f"before (full reparse): {before:8.2f} s CPU")
+    print(f"speedup: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
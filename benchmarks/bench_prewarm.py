@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк TTFT первого вопроса в диалоге: с прогревом соединения и без.
+
+Каждый прогон — отдельный процесс (как новый запуск `pt`): импорт openai,
+создание клиента и соединение входят в замер. Пользователь "набирает"
+вопрос --typing секунд; с прогревом в это время работает
+ConnectionPrewarmer. Mock-сервер добавляет --connect-delay на каждое
+новое соединение (имитация DNS, TCP и TLS до удаленного API).
+
+Запуск:
+    python benchmarks/bench_prewarm.py [--runs 5] [--connect-delay 0.3] [--typing 2]
+"""
+
+import argparse
+import io
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+
+def child(url: str, prewarm: bool, typing: float) -> None:
+    """Один первый вопрос диалога; печатает TTFT в секундах."""
+    from rich.console import Console
+    from penguin_tamer.llm_client import OpenRouterClient
+    from penguin_tamer.prewarm import ConnectionPrewarmer
+
+    client = OpenRouterClient(
+        console=Console(file=io.StringIO(), width=100), logger=logging.getLogger("bench"),
+        api_key="mock", api_url=url, model="mock", system_content="bench",
+        keepalive_expiry=60)
+    prewarmer = ConnectionPrewarmer(client.prewarm).start() if prewarm else None
+    if prewarmer:
+        prewarmer.resume()
+    time.sleep(typing)  # Пользователь набирает вопрос
+    if prewarmer:
+        prewarmer.pause()
+    client.ask_stream("how do I list open ports?")
+    print(client.last_timings.ttft)
+
+
+def _run(url: str, prewarm: bool, typing: float) -> float:
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", url, "--typing", str(typing)]
+        + (["--prewarm"] if prewarm else []),
+        capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Connection prewarm benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ttft", type=float, default=0.05, help="server think time, seconds")
+    parser.add_argument("--connect-delay", type=float, default=0.3)
+    parser.add_argument("--typing", type=float, default=2.0, help="time the user types, seconds")
+    parser.add_argument("--child", metavar="URL", help=argparse.SUPPRESS)
+    parser.add_argument("--prewarm", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.prewarm, args.typing)
+        return
+
+    from mock_server import MockServer
+    server = MockServer(ttft=args.ttft, tps=0, reply="Use `ss -tlnp`.",
+                        connect_delay=args.connect_delay).start()
+    try:
+        for name, prewarm in (("cold", False), ("prewarmed", True)):
+            times = [_run(server.url, prewarm, args.typing) for _ in range(args.runs)]
+            print(f"{name:9}: first-question TTFT median {statistics.median(times) * 1000:7.1f} ms, "
+                  f"min {min(times) * 1000:7.1f} ms, max {max(times) * 1000:7.1f} ms")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
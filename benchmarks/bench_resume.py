@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк журнала диалогов (`pt --resume`).
+
+Записывает сессию из N ходов (вопрос + ответ с блоком кода) по одному
+ходу за sync, как в диалоге, и замеряет:
+  - стоимость sync на ход (write + fsync);
+  - время загрузки сессии load_session — цель для 500 ходов: < 50 мс;
+  - то же для сжатой сессии (.jsonl.gz).
+
+Запуск:
+    python benchmarks/bench_resume.py [--turns 500] [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from penguin_tamer.session_journal import (  # noqa: E402
+    SessionJournal, compress_old_sessions, list_sessions, load_session,
+)
+
+ANSWER = ("Проверьте статус сервиса и последние строки журнала:\n\n"
+          "[Код #1]\n```bash\nsystemctl status nginx\njournalctl -u nginx -n 50 --no-pager\n```\n\n"
+          "Если порт занят, найдите процесс: `ss -ltnp | grep :80`.\n") * 4
+
+
+def _timed(func, runs: int):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def _fmt(times) -> str:
+    return f"медиана {statistics.median(times) * 1000:6.2f} мс, макс {max(times) * 1000:6.2f} мс"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Session journal resume benchmark")
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = SessionJournal.create(Path(directory))
+        messages = [{"role": "system", "content": "system"}]
+        sync_times = []
+        for n in range(args.turns):
+            messages += [{"role": "user", "content": f"Вопрос {n}: почему nginx не стартует?"},
+                         {"role": "assistant", "content": ANSWER}]
+            start = time.perf_counter()
+            journal.sync(messages)
+            sync_times.append(time.perf_counter() - start)
+
+        size = journal.path.stat().st_size
+        loaded, load_times = _timed(lambda: load_session(journal.path), args.runs)
+        assert loaded == messages[1:]
+
+        os.utime(journal.path, (0, 0))
+        compress_old_sessions(Path(directory), compress_days=1)
+        gz_path = list_sessions(Path(directory))[0]
+        assert gz_path.name.endswith(".gz")
+        _, gz_times = _timed(lambda: load_session(gz_path), args.runs)
+
+    print(f"Сессия: {args.turns} ходов, {len(loaded)} сообщений, {size / 1024:.0f} КБ")
+    print(f"  sync на ход (write + fsync): {_fmt(sync_times)}")
+    print(f"  Загрузка .jsonl:             {_fmt(load_times)}")
+    print(f"  Загрузка .jsonl.gz:          {_fmt(gz_times)}")
+    verdict = "да" if statistics.median(load_times) < 0.05 else "нет"
+    print(f"  Цель < 50 мс для загрузки: {verdict}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Микробенчмарк задержки команд: новый процесс на команду против
+постоянной оболочки bash (ShellSession).
+
+Для каждого режима вывода (pipe и pty) N раз выполняется тривиальная
+команда:
+  - "new":        LinuxCommandExecutor / PtyCommandExecutor — subprocess.Popen
+                  с shell=True на каждую команду (fork/exec и запуск sh);
+  - "persistent": ShellSession — команда уходит в уже запущенный bash,
+                  код завершения приходит по каналу статуса.
+
+Команды: "true" и "echo ok" (встроенные в оболочку — в постоянной
+оболочке без fork) и "/bin/true" (внешняя программа — fork/exec есть в
+обоих случаях). Вывод идет в «пустой» приемник, чтобы мерить запуск, а
+не терминал.
+
+Запуск:
+    python benchmarks/bench_shell_session.py [--count 1000] [--command true]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from penguin_tamer.script_executor import LinuxCommandExecutor, PtyCommandExecutor  # noqa: E402
+from penguin_tamer.shell_session import ShellSession  # noqa: E402
+
+
+class _Null:
+    """Приемник вывода (текст или байты)."""
+
+    def write(self, data) -> int:
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def _measure(run, count: int) -> list:
+    run()  # Первый запуск (в постоянной оболочке — запуск bash) не входит в замер
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        result = run()
+        samples.append((time.perf_counter() - start) * 1000)
+        assert result.returncode == 0, result
+    return samples
+
+
+def bench(terminal: str, command: str, count: int) -> dict:
+    null = _Null()
+    results = {}
+    with contextlib.redirect_stdout(null), contextlib.redirect_stderr(null):
+        executor = PtyCommandExecutor(output=null) if terminal == "pty" else LinuxCommandExecutor()
+        results["new"] = _measure(lambda: executor.execute(command), count)
+        with ShellSession(terminal, stdout=null, stderr=null, output=null) as session:
+            results["persistent"] = _measure(lambda: session.run(command), count)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-command latency: new process vs persistent shell")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--command", nargs="+", default=["true", "echo ok", "/bin/true"])
+    args = parser.parse_args()
+
+    print(f"{args.count} команд, время на команду в мс")
+    print(f"{'режим':6} {'команда':12} {'способ':11} {'среднее':>8} {'p50':>8} {'p99':>8} {'всего, с':>9}")
+    for terminal in ("pipe", "pty"):
+        for command in args.command:
+            results = bench(terminal, command, args.count)
+            for name, samples in results.items():
+                p99 = statistics.quantiles(samples, n=100)[-1]
+                print(f"{terminal:6} {command:12} {name:11} {statistics.mean(samples):8.3f} "
+                      f"{statistics.median(samples):8.3f} {p99:8.3f} {sum(samples) / 1000:9.2f}")
+            speedup = statistics.mean(results["new"]) / statistics.mean(results["persistent"])
+            print(f"{'':6} {'':12} {'ускорение':11} {speedup:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
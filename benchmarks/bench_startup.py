@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк холодного старта `pt "вопрос"`: запуск в процессе против демона.
+
+Поднимает локальный mock-сервер, создает временный каталог конфигурации
+(XDG_CONFIG_HOME), указывающий на него, и замеряет полное время запуска
+точки входа `pt` (penguin_tamer.cli:main) в двух режимах:
+- "in-process": демон не запущен, все модули импортируются заново;
+- "daemon": запрос обслуживает заранее запущенный `pt --daemon`.
+
+Запуск:
+    python benchmarks/bench_startup.py [--runs 10] [--ttft 0.05]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mock_server import MockServer
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+ENTRY = "import sys; from penguin_tamer.cli import main; sys.exit(main())"
+
+CONFIG = """language: en
+global:
+  user_content: ""
+  current_LLM: "Mock"
+  temperature: 0.7
+  stream_output_mode: true
+supported_LLMs:
+  "Mock":
+    model: "mock-model"
+    api_url: "{url}"
+    api_key: "mock"
+"""
+
+
+def _env(config_home: str) -> dict:
+    env = dict(os.environ)
+    env["XDG_CONFIG_HOME"] = config_home
+    env["PYTHONPATH"] = SRC
+    return env
+
+
+def _run_pt(env: dict) -> float:
+    start = time.perf_counter()
+    # stdin — псевдотерминал не нужен: тонкий клиент проверяет только isatty
+    subprocess.run([sys.executable, "-c", ENTRY, "how", "do", "I", "list", "ports"],
+                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   stdin=sys.stdin, check=False)
+    return time.perf_counter() - start
+
+
+def _measure(env: dict, runs: int) -> list:
+    _run_pt(env)  # Прогрев файлового кэша ОС
+    return [_run_pt(env) for _ in range(runs)]
+
+
+def _report(name: str, times: list) -> None:
+    print(f"{name:11}: median {statistics.median(times) * 1000:7.1f} ms, "
+          f"min {min(times) * 1000:7.1f} ms, max {max(times) * 1000:7.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="pt startup benchmark")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    args = parser.parse_args()
+
+    if not sys.stdin.isatty():
+        print("Run from a terminal: the thin client uses the daemon only for interactive stdin.")
+        return
+
+    server = MockServer(ttft=args.ttft, tps=0, reply="Use `ss -tlnp`.").start()
+    config_home = tempfile.mkdtemp(prefix="pt-bench-")
+    config_dir = Path(config_home) / "ai-ebash"
+    config_dir.mkdir(parents=True)
+    (config_dir / "config.yaml").write_text(CONFIG.format(url=server.url), encoding="utf-8")
+    env = _env(config_home)
+    daemon = None
+    try:
+        _report("in-process", _measure(env, args.runs))
+
+        daemon = subprocess.Popen([sys.executable, "-c", ENTRY, "--daemon"], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        sock = config_dir / "daemon.sock"
+        deadline = time.time() + 30
+        while not sock.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        _report("daemon", _measure(env, args.runs))
+    finally:
+        if daemon is not None:
+            daemon.terminate()
+            daemon.wait()
+        server.stop()
+        shutil.rmtree(config_home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
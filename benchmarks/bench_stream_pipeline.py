@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк потокового режима против локального mock-сервера.
+
+Сравнивает:
+- "before": чтение и отрисовка в одном потоке, sleep(sleep_time) на каждом
+  чанке и полный разбор Markdown (как ask_stream работал раньше);
+- "after": OpenRouterClient.ask_stream — фоновое чтение потока и отрисовка
+  не чаще refresh_per_second раз в секунду.
+
+Печатает TTFT и полное время запроса. Опция --slow-terminal добавляет
+задержку на каждую запись в терминал (имитация SSH по плохому каналу).
+
+Запуск:
+    python benchmarks/bench_stream_pipeline.py [--ttft 0.3] [--tps 500] [--slow-terminal 0.002]
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from openai import OpenAI
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+
+from mock_server import MockServer
+from penguin_tamer.llm_client import OpenRouterClient
+from penguin_tamer.stream_pipeline import StreamTimings
+
+
+class SlowTerminal(io.StringIO):
+    """Файл-терминал, каждая запись в который занимает delay секунд."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__()
+        self.delay = delay
+
+    def write(self, s: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return super().write(s)
+
+
+def _console(delay: float) -> Console:
+    return Console(file=SlowTerminal(delay), width=100, force_terminal=True)
+
+
+def run_before(url: str, delay: float, sleep_time: float = 0.01) -> StreamTimings:
+    console = _console(delay)
+    client = OpenAI(base_url=url, api_key="mock")
+    timings = StreamTimings()
+    stream = client.chat.completions.create(
+        model="mock", messages=[{"role": "user", "content": "hi"}], stream=True)
+    parts = []
+    with Live(console=console, refresh_per_second=10, auto_refresh=True) as live:
+        for chunk in stream:
+            text = chunk.choices[0].delta.content if chunk.choices else None
+            if not text:
+                continue
+            timings.mark_first_token()
+            timings.chunks += 1
+            parts.append(text)
+            live.update(Markdown("".join(parts)))
+            time.sleep(sleep_time)
+    timings.mark_finished()
+    return timings
+
+
+def run_after(url: str, delay: float) -> StreamTimings:
+    client = OpenRouterClient(
+        console=_console(delay), logger=logging.getLogger("bench"),
+        api_key="mock", api_url=url, model="mock", system_content="bench")
+    client.ask_stream("hi")
+    return client.last_timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stream pipeline benchmark")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tps", type=float, default=500)
+    parser.add_argument("--slow-terminal", type=float, default=0.0,
+                        help="delay per terminal write, seconds")
+    args = parser.parse_args()
+
+    server = MockServer(ttft=args.ttft, tps=args.tps).start()
+    try:
+        for name, run in (("before", run_before), ("after", run_after)):
+            timings = run(server.url, args.slow_terminal)
+            print(f"{name:6}: {timings}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
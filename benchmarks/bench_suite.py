@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Набор end-to-end бенчмарков клиента против локального mock-сервера.
+
+В отличие от tests/test_openai_client.py (заглушки на уровне Python),
+здесь работает весь настоящий путь: OpenAI SDK, HTTP и SSE, чтение
+потока, Rich Live с Markdown и extract_labeled_code_blocks. Mock-сервер
+запускается в отдельном процессе, чтобы его CPU не попадал в замеры.
+
+Сценарии:
+  ask            — OpenRouterClient.ask (без потока)
+  ask_stream     — OpenRouterClient.ask_stream
+  dialog         — ходы диалога: ask_stream + извлечение блоков кода,
+                   история растет от хода к ходу
+  stream_errors  — ask_stream, когда часть запросов отвечает 503
+                   (повторы с задержкой, см. retry.py)
+
+Для каждого сценария: TTFT и полное время (p50/p90), время отрисовки,
+CPU клиента на токен ответа (process_time), время извлечения блоков кода
+и пик памяти (tracemalloc, отдельный прогон). Результаты пишутся в JSON
+(--output) вместе с коммитом; --compare печатает изменения относительно
+прошлого файла результатов.
+
+Запуск:
+    python benchmarks/bench_suite.py [--runs 5] [--ttft 0.05] [--tps 2000] [--jitter 0.2]
+        [--chunk-tokens 1-4] [--reply markdown] [--only dialog] [--output new.json] [--compare old.json]
+"""
+
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from mock_server import MockServer, parse_chunk_tokens  # noqa: E402
+
+SCENARIOS = {
+    "ask": {"mode": "ask"},
+    "ask_stream": {"mode": "stream"},
+    "dialog": {"mode": "dialog"},
+    "stream_errors": {"mode": "stream", "server": {"error_rate": 0.3, "error_status": 503}},
+}
+
+# Метрики результата: чем меньше, тем лучше
+METRICS = ("ttft_p50", "ttft_p90", "total_p50", "total_p90", "render_p50",
+           "cpu_us_per_token", "extract_us_p50", "peak_kb")
+
+
+def _serve(server_kwargs: dict, conn) -> None:
+    """Процесс mock-сервера: передает URL и работает, пока родитель не закроет канал."""
+    server = MockServer(**server_kwargs).start()
+    conn.send(server.url)
+    try:
+        conn.recv()
+    except EOFError:
+        pass
+    server.stop()
+
+
+class ServerProcess:
+    """MockServer в отдельном процессе."""
+
+    def __init__(self, **server_kwargs) -> None:
+        ctx = multiprocessing.get_context("spawn")
+        self._conn, child = ctx.Pipe()
+        self._process = ctx.Process(target=_serve, args=(server_kwargs, child), daemon=True)
+
+    def __enter__(self) -> str:
+        self._process.start()
+        return self._conn.recv()
+
+    def __exit__(self, *exc) -> None:
+        self._conn.close()
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.kill()
+
+
+def _client(url: str):
+    from rich.console import Console
+    from penguin_tamer.llm_client import OpenRouterClient
+    from penguin_tamer.retry import RetryPolicy
+
+    console = Console(file=io.StringIO(), force_terminal=True, width=100, color_system="truecolor")
+    return OpenRouterClient(
+        console=console, logger=logging.getLogger("bench"),
+        api_key="mock", api_url=url, model="mock", system_content="You are a sysadmin assistant.",
+        retry=RetryPolicy(rules={"server": 5}, base_delay=0.02, max_delay=0.1))
+
+
+def _request(client, mode: str, question: str) -> dict:
+    from penguin_tamer.formatter_text import extract_labeled_code_blocks
+    from penguin_tamer.token_counter import count_text
+
+    cpu = time.process_time()
+    reply = client.ask(question) if mode == "ask" else client.ask_stream(question)
+    cpu = time.process_time() - cpu
+    sample = {"ttft": client.last_timings.ttft, "total": client.last_timings.total,
+              "render": client.last_timings.render, "tokens": count_text(reply), "cpu": cpu,
+              "retries": client._retries}
+    if mode == "dialog":
+        start = time.perf_counter()
+        extract_labeled_code_blocks(reply)
+        sample["extract"] = time.perf_counter() - start
+    return sample
+
+
+def _run(url: str, mode: str, runs: int, turns: int) -> list:
+    """Прогоны сценария; в диалоге один прогон — turns ходов с общей историей."""
+    samples = []
+    client = _client(url)
+    _request(client, mode, "warm-up")  # Импорт openai и соединение не входят в замер
+    for _ in range(runs):
+        if mode == "dialog":
+            client = _client(url)
+            client.prewarm()
+            samples += [_request(client, mode, f"Question {turn}") for turn in range(turns)]
+        else:
+            client.messages = client.messages[:1]
+            samples.append(_request(client, mode, "Why does nginx fail to start?"))
+    return samples
+
+
+def _peak_kb(url: str, mode: str, turns: int) -> float:
+    client = _client(url)
+    _request(client, mode, "warm-up")
+    tracemalloc.start()
+    for turn in range(turns if mode == "dialog" else 1):
+        _request(client, mode, f"Question {turn}")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+
+def run_scenario(name: str, args) -> dict:
+    from penguin_tamer.metrics import percentile
+
+    scenario = SCENARIOS[name]
+    server_kwargs = {"ttft": args.ttft, "tps": args.tps, "jitter": args.jitter, "reply": args.reply,
+                     "chunk_tokens": parse_chunk_tokens(args.chunk_tokens), "seed": 1,
+                     **scenario.get("server", {})}
+    with ServerProcess(**server_kwargs) as url:
+        samples = _run(url, scenario["mode"], args.runs, args.turns)
+        peak = _peak_kb(url, scenario["mode"], args.turns)
+
+    def p(field, q, scale=1):
+        value = percentile([s[field] for s in samples if s.get(field) is not None], q)
+        return None if value is None else round(value * scale, 4)
+
+    tokens = sum(s["tokens"] for s in samples)
+    return {
+        "requests": len(samples),
+        "retries": sum(s["retries"] for s in samples),
+        "ttft_p50": p("ttft", 50), "ttft_p90": p("ttft", 90),
+        "total_p50": p("total", 50), "total_p90": p("total", 90),
+        "render_p50": p("render", 50) if scenario["mode"] != "ask" else None,
+        "cpu_us_per_token": round(sum(s["cpu"] for s in samples) / tokens * 1e6, 2) if tokens else None,
+        "extract_us_p50": p("extract", 50, scale=1e6),
+        "peak_kb": peak,
+    }
+
+
+def _commit() -> str:
+    root = Path(__file__).resolve().parents[1]
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                               capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def _fmt(value) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def print_results(results: dict) -> None:
+    scenarios = results["scenarios"]
+    print(f"Коммит {results['meta']['commit']}, время в секундах")
+    print(f"{'':18}" + "".join(f"{name:>15}" for name in scenarios))
+    for metric in ("requests", "retries") + METRICS:
+        print(f"{metric:18}" + "".join(f"{_fmt(row.get(metric)):>15}" for row in scenarios.values()))
+
+
+def compare(base: dict, current: dict, threshold: float = 10.0) -> None:
+    """Изменения относительно base; рост больше threshold % помечается «!»."""
+    print(f"\nСравнение с {base['meta']['commit']} ({base['meta']['date']}):")
+    for name, row in current["scenarios"].items():
+        old = base["scenarios"].get(name)
+        if not old:
+            continue
+        changes = []
+        for metric in METRICS:
+            a, b = old.get(metric), row.get(metric)
+            if not a or b is None:
+                continue
+            delta = (b - a) / a * 100
+            mark = " !" if delta > threshold else ""
+            changes.append(f"{metric} {_fmt(a)} -> {_fmt(b)} ({delta:+.0f}%{mark})")
+        print(f"  {name}:")
+        for change in changes:
+            print(f"    {change}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="End-to-end client benchmark suite")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=5, help="Ходов в одном прогоне диалога")
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--tps", type=float, default=2000)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--chunk-tokens", default="1-4", help="Токенов в чанке: N или MIN-MAX")
+    parser.add_argument("--reply", default="markdown", help="Заготовка ответа mock-сервера")
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), help="Только эти сценарии")
+    parser.add_argument("--output", help="Файл результатов JSON")
+    parser.add_argument("--compare", help="Прошлый файл результатов для сравнения")
+    args = parser.parse_args()
+
+    # Метрики запросов пишутся как обычно, но не в журнал пользователя
+    from penguin_tamer import llm_client
+    from penguin_tamer.metrics import MetricsLog
+    metrics_dir = tempfile.TemporaryDirectory()
+    llm_client.metrics = MetricsLog(Path(metrics_dir.name) / "metrics.jsonl")
+
+    results = {
+        "meta": {"commit": _commit(), "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")}},
+        "scenarios": {},
+    }
+    for name in args.only or SCENARIOS:
+        results["scenarios"][name] = run_scenario(name, args)
+    metrics_dir.cleanup()
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты: {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк подсчета токенов истории диалога.
+
+Имитирует длинный диалог: на каждом ходе добавляются вопрос и ответ,
+после чего считается размер запроса. Сравниваются:
+- "naive": пересчет всей истории заново на каждом ходе (O(история));
+- "cached": TokenCounter.sync + ContextWindow.build с кэшем по сообщениям.
+
+Для "cached" время хода и число вызовов токенайзера не растут с длиной
+истории: токенизируются только новые сообщения.
+
+Запуск:
+    python benchmarks/bench_token_counter.py [--turns 2000] [--size 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Добавляем путь к модулю
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from penguin_tamer.context_window import ContextWindow
+from penguin_tamer.token_counter import MESSAGE_OVERHEAD, count_text, _get_encoding
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Token counting benchmark")
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--size", type=int, default=2000, help="characters per message")
+    parser.add_argument("--budget", type=int, default=0, help="context budget, 0 - unlimited")
+    args = parser.parse_args()
+
+    print(f"Tokenizer: {'tiktoken' if _get_encoding() else 'heuristic'}")
+    checkpoints = {10, 100, 500, 1000, args.turns}
+    history = [{"role": "system", "content": "system prompt"}]
+    window = ContextWindow(budget=args.budget)
+    counter = window.counter
+    naive_total = cached_total = 0.0
+
+    print(f"{'turn':>6} | {'naive ms/turn':>14} | {'cached ms/turn':>15} | {'tokenized':>9} | {'history tokens':>14}")
+    for turn in range(1, args.turns + 1):
+        history.append({"role": "user", "content": f"question {turn} " + "q" * args.size})
+        history.append({"role": "assistant", "content": f"answer {turn} " + "a" * args.size})
+
+        start = time.perf_counter()
+        naive = sum(count_text(m["content"]) + MESSAGE_OVERHEAD for m in history)
+        naive_turn = time.perf_counter() - start
+        naive_total += naive_turn
+
+        start = time.perf_counter()
+        window.build(history)
+        cached = counter.sync(history)
+        cached_turn = time.perf_counter() - start
+        cached_total += cached_turn
+
+        assert naive == cached
+        if turn in checkpoints:
+            print(f"{turn:>6} | {naive_turn * 1000:>14.3f} | {cached_turn * 1000:>15.3f} | "
+                  f"{counter.tokenized:>9} | {cached:>14}")
+
+    print(f"total: naive {naive_total:.2f} s, cached {cached_total:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
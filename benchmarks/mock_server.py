@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Локальный OpenAI-совместимый сервер для бенчмарков.
+
+Отвечает на POST /v1/chat/completions. Потоковые ответы (stream=true)
+отдаются в формате SSE с заданной задержкой до первого токена (TTFT)
+и скоростью генерации (токенов в секунду). Задержка connect_delay
+на каждое новое соединение имитирует DNS, TCP и TLS до удаленного API.
+
+Чтобы поведение было ближе к настоящим провайдерам:
+  - jitter — случайный разброс TTFT и пауз между чанками (доля, 0.3 = ±30%);
+  - chunk_tokens — токенов в одном SSE-чанке (число или диапазон (min, max));
+  - error_rate / error_status / retry_after — доля запросов, отвечающих
+    ошибкой HTTP (например, 429 с Retry-After), fail_first — первые N
+    запросов отвечают ошибкой всегда;
+  - drop_after — поток обрывается после стольких токенов (без [DONE]);
+  - reply — текст ответа или имя заготовки из REPLIES ("default",
+    "markdown" — заголовки, списки, таблица, несколько блоков кода).
+Случайность воспроизводима: seed.
+
+В usage ответа (в потоке — при stream_options.include_usage) сервер
+сообщает cached_tokens, как кэш промпта OpenAI: совпадающее с прошлым
+запросом начало промпта блоками по 128 токенов, если оно не короче 1024.
+
+Запуск:
+    python benchmarks/mock_server.py [--port 8765] [--ttft 0.3] [--tps 200] [--jitter 0.3]
+        [--chunk-tokens 1] [--error-rate 0.1] [--error-status 429] [--reply markdown]
+
+Использование из кода:
+    server = MockServer(ttft=0.3, tps=200).start()
+    ... OpenAI(base_url=server.url, api_key="x") ...
+    server.stop()
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple, Union
+
+
+DEFAULT_REPLY = (
+    "Check the service state first.\n\n"
+    "[Code #1]\n```bash\nsystemctl status nginx --no-pager\n```\n\n"
+    "Then look at the recent logs:\n\n"
+    "[Code #2]\n```bash\njournalctl -u nginx -n 50\n```\n"
+) * 20
+
+MARKDOWN_REPLY = """## Почему nginx не запускается
+
+Скорее всего, **порт 80 уже занят** или в конфигурации есть ошибка.
+Проверьте по шагам:
+
+1. Синтаксис конфигурации:
+
+[Code #1]
+```bash
+sudo nginx -t
+```
+
+2. Кто слушает порт 80:
+
+[Code #2]
+```bash
+sudo ss -ltnp 'sport = :80'
+```
+
+3. Последние сообщения службы:
+
+[Code #3]
+```bash
+journalctl -u nginx -n 50 --no-pager
+```
+
+| Симптом | Причина | Что делать |
+|---------|---------|------------|
+| `Address already in use` | порт занят | остановить процесс или сменить `listen` |
+| `unknown directive` | опечатка | исправить строку, указанную в `nginx -t` |
+| `Permission denied` | нет прав | запуск от root или `setcap` |
+
+> Если порт занимает `apache2`, отключите его: `sudo systemctl disable --now apache2`.
+
+- После исправления перезапустите службу: `sudo systemctl restart nginx`
+- Убедитесь, что она *активна*: `systemctl is-active nginx`
+
+[Code #4]
+```python
+import urllib.request
+print(urllib.request.urlopen("http://localhost").status)
+```
+""" * 3
+
+REPLIES = {
+    "default": DEFAULT_REPLY,
+    "markdown": MARKDOWN_REPLY,
+    "short": "Use `ss -tlnp`.",
+}
+
+
+def _tokens(text: str) -> list[str]:
+    """Грубая нарезка текста на "токены" по ~4 символа."""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    """Длина общего начала (двоичный поиск сравнением срезов — быстро и для больших промптов)."""
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def log_message(self, format, *args):  # Тихий режим
+        pass
+
+    def setup(self):
+        # Новое соединение: имитация рукопожатия с удаленным сервером
+        time.sleep(self.server.mock.connect_delay)
+        super().setup()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        cfg = self.server.mock
+        model = request.get("model", "mock-model")
+        usage = cfg.usage(request.get("messages", []))
+
+        time.sleep(cfg.jittered(cfg.ttft))
+        status = cfg.injected_error()
+        if status is not None:
+            self._error(status)
+            return
+        if not request.get("stream"):
+            body = json.dumps({
+                "id": "mock", "object": "chat.completion", "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": cfg.reply}}],
+                "usage": usage,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        delay = 1.0 / cfg.tps if cfg.tps else 0.0
+        tokens = _tokens(cfg.reply)
+        if cfg.drop_after is not None:
+            tokens = tokens[:cfg.drop_after]
+        try:
+            i = 0
+            while i < len(tokens):
+                n = cfg.chunk_size()
+                self._event({"index": 0, "delta": {"content": "".join(tokens[i:i + n])},
+                             "finish_reason": None}, model)
+                i += n
+                if delay:
+                    time.sleep(cfg.jittered(delay * n))
+            if cfg.drop_after is not None:
+                return  # Обрыв: соединение закрывается без завершающего чанка и [DONE]
+            self._event({"index": 0, "delta": {}, "finish_reason": "stop"}, model)
+            if (request.get("stream_options") or {}).get("include_usage"):
+                self._event(None, model, usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            cfg.disconnects.append(time.perf_counter())  # Клиент закрыл поток, не дочитав
+        self.close_connection = True
+
+    def _error(self, status: int) -> None:
+        cfg = self.server.mock
+        body = json.dumps({"error": {"message": f"Mock error {status}", "type": "mock_error",
+                                     "code": status}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if cfg.retry_after is not None:
+            self.send_header("Retry-After", str(cfg.retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _event(self, choice: dict, model: str, usage: dict = None) -> None:
+        payload = {"id": "mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                   "model": model, "choices": [choice] if choice else []}
+        if usage is not None:
+            payload["usage"] = usage
+        self.wfile.write(b"data: " + json.dumps(payload).encode() + b"\n\n")
+        self.wfile.flush()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockServer"
+
+
+class MockServer:
+    """Фоновый mock-сервер с настраиваемыми TTFT, скоростью генерации и задержкой соединения."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 ttft: float = 0.3, tps: float = 200, reply: str = DEFAULT_REPLY,
+                 connect_delay: float = 0.0, jitter: float = 0.0,
+                 chunk_tokens: Union[int, Tuple[int, int]] = 1,
+                 error_rate: float = 0.0, error_status: int = 500, retry_after: Optional[float] = None,
+                 fail_first: int = 0, drop_after: Optional[int] = None, seed: Optional[int] = None) -> None:
+        self.ttft = ttft
+        self.connect_delay = connect_delay
+        self.tps = tps
+        self.reply = REPLIES.get(reply, reply)
+        self.jitter = jitter
+        self.chunk_tokens = chunk_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.fail_first = fail_first
+        self.drop_after = drop_after
+        self.rng = random.Random(seed)
+        self.requests = 0  # Сколько запросов POST получено
+        self.errors = 0  # Сколько из них ответили ошибкой
+        self.disconnects: list[float] = []  # perf_counter() обрывов потока клиентом
+        self._last_prompt = b""
+        self._lock = threading.Lock()
+        self._httpd = _Server((host, port), _Handler)
+        self._httpd.mock = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def jittered(self, seconds: float) -> float:
+        if not self.jitter or not seconds:
+            return seconds
+        with self._lock:
+            return max(0.0, seconds * self.rng.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def chunk_size(self) -> int:
+        """Токенов в очередном чанке."""
+        if isinstance(self.chunk_tokens, int):
+            return max(1, self.chunk_tokens)
+        with self._lock:
+            return max(1, self.rng.randint(*self.chunk_tokens))
+
+    def injected_error(self) -> Optional[int]:
+        """HTTP-статус ошибки для очередного запроса или None."""
+        with self._lock:
+            self.requests += 1
+            if self.requests <= self.fail_first or (self.error_rate and self.rng.random() < self.error_rate):
+                self.errors += 1
+                return self.error_status
+        return None
+
+    def usage(self, messages: list) -> dict:
+        """usage ответа с cached_tokens по совпадению начала промпта с прошлым запросом."""
+        prompt = json.dumps(messages, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            common = _common_prefix(prompt, self._last_prompt)
+            self._last_prompt = prompt
+        cached = common // 4 // 128 * 128
+        return {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(_tokens(self.reply)),
+                "total_tokens": len(prompt) // 4 + len(_tokens(self.reply)),
+                "prompt_tokens_details": {"cached_tokens": cached if cached >= 1024 else 0}}
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def parse_chunk_tokens(value: str) -> Union[int, Tuple[int, int]]:
+    """"4" -> 4, "1-8" -> (1, 8)."""
+    low, _, high = value.partition("-")
+    return (int(low), int(high)) if high else int(low)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tps", type=float, default=200)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0, help="Разброс задержек, доля (0.3 = ±30%%)")
+    parser.add_argument("--chunk-tokens", default="1", help="Токенов в чанке: N или MIN-MAX")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля запросов с ошибкой")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--retry-after", type=float, default=None, help="Заголовок Retry-After у ошибок")
+    parser.add_argument("--drop-after", type=int, default=None, help="Оборвать поток после N токенов")
+    parser.add_argument("--reply", default="default", help="Текст ответа или " + ", ".join(REPLIES))
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    server = MockServer(port=args.port, ttft=args.ttft, tps=args.tps, connect_delay=args.connect_delay,
+                        jitter=args.jitter, chunk_tokens=parse_chunk_tokens(args.chunk_tokens),
+                        error_rate=args.error_rate, error_status=args.error_status,
+                        retry_after=args.retry_after, drop_after=args.drop_after,
+                        reply=args.reply, seed=args.seed)
+    print(f"Mock server: {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
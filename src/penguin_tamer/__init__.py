@@ -0,0 +1,2 @@
+# Имя приложения: каталог пользовательской конфигурации, логов и сокета демона
+APP_NAME = "ai-ebash"
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
+import functools
+import inspect
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 
 # Добавляем parent (src) в sys.path для локального запуска
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -29,6 +33,9 @@ class LazyLogger:
     def debug(self, msg):
         _get_logger().debug(msg)
 
+    def warning(self, msg):
+        _get_logger().warning(msg)
+
     def error(self, msg):
         _get_logger().error(msg)
 
@@ -37,10 +44,17 @@ class LazyLogger:
 
 logger = LazyLogger()
 
-# Простой декоратор без импорта
+# Простой декоратор без импорта логгера: логгер загружается при первом вызове
 def log_execution_time(func):
-    """Простой декоратор времени выполнения"""
-    return func  # Временно отключаем для ускорения загрузки
+    """Логирует время выполнения функции (уровень DEBUG)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            logger.debug(f"Function {func.__name__} executed in {time.perf_counter() - start_time:.3f} s")
+    return wrapper
 
 
 # Ленивый импорт i18n
@@ -164,12 +178,16 @@ def _get_formatter_text():
     return _formatter_text
 
 # Импортируем только самое необходимое для быстрого старта
-from penguin_tamer.llm_client import OpenRouterClient
+from penguin_tamer.llm_client import OpenRouterClient, AsyncOpenRouterClient, RequestCancelled
+from penguin_tamer.context_window import ContextWindow
 from penguin_tamer.arguments import parse_args
 from penguin_tamer.error_messages import connection_error
+from penguin_tamer.retry import RetryPolicy
 
 
 STREAM_OUTPUT_MODE: bool = config.get("global", "stream_output_mode")
+ASYNC_CLIENT: bool = config.get("global", "async_client", False)
+EXEC_MODE: str = config.get("global", "exec_mode", "pipe")  # Выполнение блоков кода: auto, pty, pipe
 logger.info(f"Settings - Stream output mode: {STREAM_OUTPUT_MODE}")
 
 # Ленивый импорт Markdown из rich (легкий модуль) для ускорения загрузки
@@ -190,11 +208,17 @@ educational_text = (
     "If there are multiple code blocks, number them sequentially. "
     "In each new reply, start numbering from 1 again. Do not discuss numbering; just do it automatically."
 )
-EDUCATIONAL_CONTENT = [{'role': 'user', 'content': educational_text}]
+
 
 @log_execution_time
 def get_system_content() -> str:
-    """Construct system prompt content with lazy system info loading"""
+    """Construct system prompt content with lazy system info loading
+
+    Промпт одинаков побайтно во всех ходах и запусках (пока не меняются
+    настройки): провайдер кэширует этот префикс запроса. Поэтому здесь нет
+    изменчивых данных (время, текущий каталог), а инструкция о нумерации
+    блоков кода — часть промпта, а не сообщение перед первым вопросом.
+    """
     user_content = config.get("global", "user_content", "")
     json_mode = config.get("global", "json_mode", False)
 
@@ -211,29 +235,247 @@ def get_system_content() -> str:
         "You and the user always work in a terminal. "
         "Respond based on the user's environment and commands. "
     )
-    
-    system_content = f"{user_content} {additional_content_json} {additional_content_main}".strip()
-    return system_content
+
+    parts = [additional_content_main, educational_text, additional_content_json]
+    if config.get("global", "environment_context", True):
+        from penguin_tamer.sys_info import get_environment_context
+        parts.append(get_environment_context())
+    # Текст пользователя — последним: его правка не сбрасывает кэш остальной части
+    parts.append(user_content)
+    return "\n\n".join(part.strip() for part in parts if part and part.strip())
+
+
+# Корутины AsyncOpenRouterClient выполняются в одном долгоживущем event loop
+_async_runner = None
+
+
+def _run_request(result):
+    """Возвращает ответ клиента.
+
+    Для AsyncOpenRouterClient result — корутина: она выполняется в общем
+    asyncio.Runner. По Ctrl+C Runner отменяет задачу (HTTP-поток закрывается,
+    частичный ответ остается в истории) и пробрасывает KeyboardInterrupt;
+    здесь он, как и у синхронного клиента, становится RequestCancelled.
+    """
+    global _async_runner
+    if not inspect.isawaitable(result):
+        return result
+    if _async_runner is None:
+        import asyncio
+        _async_runner = asyncio.Runner()
+    try:
+        return _async_runner.run(result)
+    except KeyboardInterrupt:
+        raise RequestCancelled() from None
+
+
+def _close_async_runner() -> None:
+    global _async_runner
+    if _async_runner is not None:
+        _async_runner.close()
+        _async_runner = None
 
 
 # === Основная логика ===
 @log_execution_time
-def run_single_query(chat_client: OpenRouterClient, query: str, console) -> None:
-    """Run a single query (optionally streaming)"""
+def run_single_query(chat_client: OpenRouterClient, query: str, console,
+                     cache=None, refresh: bool = False) -> None:
+    """Run a single query (optionally streaming).
+
+    With a response cache, an identical earlier request is answered from disk
+    without touching the network; refresh=True skips the lookup but stores the new reply.
+    """
     logger.info(f"Running query: '{query[:50]}'...")
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.make_key(chat_client.model, chat_client.api_url, chat_client.temperature,
+                                   chat_client.messages + [{"role": "user", "content": query}])
+        cached_reply = None if refresh else cache.get(cache_key)
+        if cached_reply is not None:
+            console.print(_get_markdown()(cached_reply))
+            return
     try:
         if STREAM_OUTPUT_MODE:
-            reply = chat_client.ask_stream(query)
+            reply = _run_request(chat_client.ask_stream(query))
         else:
-            reply = chat_client.ask(query)
+            reply = _run_request(chat_client.ask(query))
             console.print(_get_markdown()(reply))
     except Exception as e:
         console.print(connection_error(e))
         logger.error(f"Connection error: {e}")
+        return
+    if cache_key is not None and reply:
+        cache.put(cache_key, reply, model=chat_client.model)
+
+
+def _get_response_cache(args):
+    """Кэш ответов, если он включен в настройках и не отключен флагом --no-cache"""
+    if getattr(args, "no_cache", False) or not config.get("global", "response_cache", False):
+        return None
+    from penguin_tamer.response_cache import ResponseCache
+    return ResponseCache(
+        config.user_config_dir / "response_cache",
+        ttl=config.get("global", "response_cache_ttl", 86400),
+        max_bytes=int(config.get("global", "response_cache_max_mb", 50) * 1024 * 1024),
+    )
+
+
+def print_cache_stats(console) -> None:
+    """Печатает статистику кэша ответов (pt --cache-stats)"""
+    from penguin_tamer.response_cache import ResponseCache
+    stats = ResponseCache(config.user_config_dir / "response_cache").stats()
+    console.print(t("[bold]Response cache[/bold]"))
+    console.print(t("Hits: {hits}, misses: {misses}, hit rate: {rate:.1%}").format(
+        hits=stats["hits"], misses=stats["misses"], rate=stats["hit_rate"]))
+    console.print(t("Bytes saved: {saved}").format(saved=stats["bytes_saved"]))
+    console.print(t("Entries: {entries}, size on disk: {size} bytes").format(
+        entries=stats["entries"], size=stats["size_bytes"]))
+
+
+def print_stats(console, window: str = "7d") -> int:
+    """Печатает процентили метрик запросов по LLM и моделям (pt --stats)"""
+    from penguin_tamer.metrics import metrics, parse_window, summarize
+    try:
+        seconds = parse_window(window)
+    except ValueError:
+        console.print(t("Invalid time window: {window}. Examples: 30m, 24h, 7d").format(window=window))
+        return 2
+    records = metrics.read("request", since=time.time() - seconds)
+    if not records:
+        console.print(t("No requests recorded in the last {window}.").format(window=window))
+        return 0
+
+    from rich import box
+    from rich.table import Table
+
+    def fmt(value, digits=2):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    console.print(t("[bold]Requests for the last {window}[/bold], time in seconds").format(window=window))
+    for key, title in (("provider", t("Provider")), ("model", t("Model"))):
+        table = Table(box=box.SIMPLE_HEAD, padding=(0, 0, 0, 1))  # 11 колонок в 80 символов
+        table.add_column(title, overflow="fold", min_width=len(title))
+        for column in (t("Req"), t("Err"), t("Retry"), "TTFT p50", "TTFT p90", "TTFT p99",
+                       t("Total p50"), t("Total p90"), t("Tok/s p50"), t("Cache %")):
+            table.add_column(column.replace(" ", "\n"), justify="right")  # Заголовок в две строки: уже таблица
+        for name, row in summarize(records, key).items():
+            table.add_row(name, str(row["requests"]), str(row["errors"]), str(row["retries"]),
+                          fmt(row["ttft_p50"]), fmt(row["ttft_p90"]), fmt(row["ttft_p99"]),
+                          fmt(row["total_p50"]), fmt(row["total_p90"]), fmt(row["tps_p50"], 0),
+                          fmt(row["cache_hit"], 0))
+        console.print(table)
+    return 0
+
+
+def run_batch_mode(args) -> int:
+    """Пакетный режим: запросы из файла параллельно, результаты в JSONL (pt --batch)"""
+    import json
+    from penguin_tamer.batch import BatchRunner, read_prompts
+    from penguin_tamer.hedging import Provider
+    from penguin_tamer.llm_client import _get_openai_client
+
+    try:
+        if args.batch == "-":
+            items = read_prompts(sys.stdin)
+        else:
+            with open(args.batch, "r", encoding="utf-8") as f:
+                items = read_prompts(f)
+    except (OSError, ValueError) as e:
+        print(t("Cannot read batch prompts: {error}").format(error=e), file=sys.stderr)
+        return 2
+
+    concurrency = args.concurrency or config.get("global", "batch_concurrency", 4)
+    llm_config = config.get_current_llm_config()
+    provider = Provider.from_config(config.current_llm, concurrency)
+    # Один клиент — один пул соединений на весь прогон
+    provider.client = _get_openai_client()(api_key=provider.api_key, base_url=provider.api_url)
+    runner = BatchRunner(
+        provider.client, provider,
+        system_content=get_system_content(),
+        temperature=config.get("global", "temperature", 0.7),
+        concurrency=concurrency,
+        rate_per_minute=llm_config.get("rate_limit", config.get("global", "batch_rate_limit", 0)),
+        prompt_cache=llm_config.get("prompt_cache", config.get("global", "prompt_cache", False)),
+    )
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+
+    def write(result):
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+
+    try:
+        summary = runner.run(items, write, ordered=args.order == "input")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        provider.client.close()
+    print(t("Batch: {items} prompts, {errors} errors, {elapsed:.1f} s").format(**summary), file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+def _ask_stream_in_dialog(chat_client: OpenRouterClient, console, user_prompt: str) -> str:
+    """Потоковый ответ в диалоге; готовые блоки кода можно запускать цифрой, не дожидаясь конца."""
+    if not config.get("global", "stream_run_keys", False):
+        return _run_request(chat_client.ask_stream(user_prompt))
+
+    from penguin_tamer.stream_keys import StreamBlockRunner
+    with StreamBlockRunner(console) as runner:
+        chat_client.on_code_block = runner.on_code_block
+        try:
+            return _run_request(chat_client.ask_stream(user_prompt))
+        finally:
+            chat_client.on_code_block = None
+
+
+def _keep_command_run(pending_runs: Optional[list], code: str, process) -> None:
+    """Запоминает результат команды для следующего вопроса (pending_runs не None) или сразу
+    закрывает его вывод: временные файлы не ждут сборщика мусора."""
+    if process is None:
+        return
+    if pending_runs is not None:
+        from penguin_tamer.command_feedback import CommandRun
+        pending_runs.append(CommandRun.from_process(code, process))
+        return
+    close = getattr(process, "close", None)  # CapturedProcess
+    if close is not None:
+        close()
+
+
+def _cancelled_reply_blocks(chat_client: OpenRouterClient, console) -> list:
+    """Сообщает об остановке ответа; блоки кода, успевшие прийти целиком, можно запустить."""
+    console.print(t("[dim]Answer stopped. The partial answer is kept in the dialog.[/dim]"))
+    return _get_formatter_text()(chat_client.messages[-1]["content"])
+
+
+def _sessions_dir() -> Path:
+    return config.user_config_dir / "sessions"
+
+
+def _open_session_journal(chat_client: OpenRouterClient, console, resume_path: Optional[Path]):
+    """Журнал диалога на диске; при --resume загружает в chat_client сообщения сессии."""
+    from penguin_tamer.session_journal import SessionJournal, compress_in_background
+
+    if resume_path is not None:
+        journal, messages = SessionJournal.resume(resume_path)
+        chat_client.messages = chat_client.messages[:1] + messages
+        console.print(t("[dim]Resumed session {id}: {count} messages[/dim]").format(
+            id=journal.id, count=len(messages)))
+        if messages and messages[-1].get("role") == "assistant":
+            console.print(_get_markdown()(messages[-1]["content"]))
+        console.print()
+    elif config.get("global", "session_journal", True):
+        journal = SessionJournal.create(_sessions_dir())
+    else:
+        return None
+    compress_in_background(_sessions_dir(), config.get("global", "session_compress_days", 7),
+                           config.get("global", "session_max", 200), keep=journal.path)
+    return journal
 
 
 @log_execution_time
-def run_dialog_mode(chat_client: OpenRouterClient, console, initial_user_prompt: str = None) -> None:
+def run_dialog_mode(chat_client: OpenRouterClient, console, initial_user_prompt: str = None,
+                    resume_path: Optional[Path] = None) -> None:
     """Interactive dialog mode"""
     
     # Загружаем prompt_toolkit только когда нужен диалоговый режим
@@ -251,23 +493,39 @@ def run_dialog_mode(chat_client: OpenRouterClient, console, initial_user_prompt:
 
     logger.info("Starting dialog mode")
 
-    # Use module global EDUCATIONAL_CONTENT inside the function
-    global EDUCATIONAL_CONTENT
-
     last_code_blocks = []  # code blocks from the last AI answer
 
+    # Результаты команд, выполненных после последнего вопроса (attach_command_output)
+    attach_output = config.get("global", "attach_command_output", False)
+    pending_runs = []
+
+    journal = _open_session_journal(chat_client, console, resume_path)
+    if resume_path is not None and chat_client.messages[-1]["role"] == "assistant":
+        last_code_blocks = _get_formatter_text()(chat_client.messages[-1]["content"])
+
+    # Прогрев соединения с API, пока пользователь набирает вопрос
+    prewarmer = None
+    if config.get("global", "prewarm", True):
+        from penguin_tamer.prewarm import ConnectionPrewarmer
+        prewarmer = ConnectionPrewarmer(chat_client.prewarm,
+                                        interval=config.get("global", "prewarm_interval", 50),
+                                        max_idle=config.get("global", "prewarm_max_idle", 600)).start()
+
     # If there is an initial prompt, process it
     if initial_user_prompt:
         initial_user_prompt
         try:
             if STREAM_OUTPUT_MODE:
-                reply = chat_client.ask_stream(initial_user_prompt, educational_content=EDUCATIONAL_CONTENT)
+                reply = _ask_stream_in_dialog(chat_client, console, initial_user_prompt)
                 console.print(_get_markdown()(reply))
             else:
-                reply = chat_client.ask(initial_user_prompt, educational_content=EDUCATIONAL_CONTENT)
+                reply = _run_request(chat_client.ask(initial_user_prompt))
                 console.print(_get_markdown()(reply))
-            EDUCATIONAL_CONTENT = []  # clear educational content after first use
             last_code_blocks = _get_formatter_text()(reply)
+            if prewarmer:
+                prewarmer.mark_used()
+        except RequestCancelled:
+            last_code_blocks = _cancelled_reply_blocks(chat_client, console)
         except Exception as e:
             console.print(connection_error(e))
             logger.error(f"Connection error: {e}")
@@ -275,6 +533,8 @@ def run_dialog_mode(chat_client: OpenRouterClient, console, initial_user_prompt:
 
     # Main dialog loop
     while True:
+        if journal:
+            journal.sync(chat_client.messages)  # конец хода
         try:
 
             # Define prompt styles с поддержкой подсветки команд
@@ -336,7 +596,13 @@ def run_dialog_mode(chat_client: OpenRouterClient, console, initial_user_prompt:
                     'input_processors': [dot_processor]  # Добавляем процессор для real-time подсветки
                 }
 
-                user_prompt = prompt(get_prompt_tokens, **prompt_kwargs)
+                if prewarmer:
+                    prewarmer.resume()
+                try:
+                    user_prompt = prompt(get_prompt_tokens, **prompt_kwargs)
+                finally:
+                    if prewarmer:
+                        prewarmer.pause()
                     
             except Exception as e:
                 # Fallback на стандартный input() если prompt_toolkit не работает
@@ -356,55 +622,153 @@ def run_dialog_mode(chat_client: OpenRouterClient, console, initial_user_prompt:
                 command_to_execute = user_prompt[1:].strip()  # Remove the dot and strip spaces
                 if command_to_execute:  # Only execute if there's something after the dot
                     console.print(f"[dim]>>> Executing command:[/dim] {command_to_execute}")
-                    _get_execute_handler()(console, command_to_execute)
+                    process = _get_execute_handler()(console, command_to_execute, EXEC_MODE)
+                    _keep_command_run(pending_runs if attach_output else None, command_to_execute, process)
                     console.print()
                     continue
                 else:
                     console.print("[dim]Empty command after '.' - skipping.[/dim]")
                     continue
 
-            # If a number is entered
-            if user_prompt.isdigit():
-                block_index = int(user_prompt)
-                if 1 <= block_index <= len(last_code_blocks):
-                    _get_script_executor()(console, last_code_blocks, block_index)
+            # Номер блока кода, диапазон или список ("3", "1-4", "1,3,5"; "&" в конце — параллельно)
+            from penguin_tamer.multi_block import parse_block_selection
+            try:
+                selection = parse_block_selection(user_prompt, len(last_code_blocks))
+            except ValueError as e:
+                console.print(f"[dim]{e}[/dim]")
+                continue
+            if selection:
+                indices, parallel = selection
+                if len(indices) == 1 and not parallel:
+                    process = _get_script_executor()(console, last_code_blocks, indices[0], EXEC_MODE)
+                    _keep_command_run(pending_runs if attach_output else None,
+                                      last_code_blocks[indices[0] - 1], process)
                     console.print()
-                    continue
                 else:
-                    console.print(f"[dim]Code block #{user_prompt} not found.[/dim]")
-                    continue
+                    from penguin_tamer.multi_block import run_code_blocks
+                    results = run_code_blocks(console, last_code_blocks, indices, parallel,
+                                              run_block=functools.partial(_get_script_executor(), mode=EXEC_MODE),
+                                              keep_output=attach_output)
+                    if attach_output:
+                        from penguin_tamer.command_feedback import CommandRun
+                        for result in results:
+                            if result.returncode is not None:
+                                pending_runs.append(CommandRun.from_block(result))
+                            else:
+                                result.close()
+                    console.print()
+                continue
 
             # Если введен текст, отправляем как запрос к AI
+            if pending_runs:
+                # Вместе с вопросом — сжатые результаты выполненных команд
+                from penguin_tamer.command_feedback import attach_command_results
+                user_prompt = attach_command_results(user_prompt, pending_runs,
+                                                     config.get("global", "command_output_budget", 2000))
+                console.print(t("[dim]Attached results of {count} command(s) to the question[/dim]").format(
+                    count=len(pending_runs)))
+                for run in pending_runs:
+                    run.close()
+                pending_runs.clear()
             if STREAM_OUTPUT_MODE:
-                reply = chat_client.ask_stream(user_prompt, educational_content=EDUCATIONAL_CONTENT)
+                reply = _ask_stream_in_dialog(chat_client, console, user_prompt)
             else:
-                reply = chat_client.ask(user_prompt, educational_content=EDUCATIONAL_CONTENT)
+                reply = _run_request(chat_client.ask(user_prompt))
                 console.print(_get_markdown()(reply))
-            EDUCATIONAL_CONTENT = []  # clear educational content after first use
             last_code_blocks = _get_formatter_text()(reply)
+            if prewarmer:
+                prewarmer.mark_used()
             console.print()  # new line after answer
 
+        except RequestCancelled:
+            # Первый Ctrl+C останавливает только текущий ответ
+            last_code_blocks = _cancelled_reply_blocks(chat_client, console)
+            console.print()
         except KeyboardInterrupt:
             break
         except Exception as e:
             console.print(connection_error(e))
             logger.error(f"Connection error: {e}")
 
+    for run in pending_runs:  # Результаты, не отправленные до выхода
+        run.close()
+    if prewarmer:
+        prewarmer.stop()
+    if journal:
+        journal.sync(chat_client.messages)
+        journal.close()
+        if journal.path.exists():
+            console.print(t("[dim]Dialog saved, continue it with: pt --resume {id}[/dim]").format(id=journal.id))
+
+
+def _create_hedge():
+    """Хеджирование запросов, если задана запасная LLM (hedge_llm)."""
+    secondary = config.get("global", "hedge_llm")
+    if not secondary or secondary == config.current_llm:
+        return None
+    if secondary not in config.get_available_llms():
+        logger.warning(f"hedge_llm '{secondary}' is not in supported_LLMs, hedging disabled")
+        return None
+    from penguin_tamer.hedging import Hedge, Provider
+    limit = config.get("global", "provider_concurrency", 2)
+    return Hedge(Provider.from_config(config.current_llm, limit),
+                 Provider.from_config(secondary, limit),
+                 delay=config.get("global", "hedge_delay", 3))
+
+
+def _create_router():
+    """Переключение на исправную LLM при сбоях, если оно включено (failover)."""
+    if not config.get("global", "failover", False):
+        return None
+    from penguin_tamer.provider_router import ProviderRouter
+    return ProviderRouter(
+        config.user_config_dir / "providers.json",
+        current=config.current_llm,
+        names=config.get_available_llms(),
+        failure_threshold=config.get("global", "circuit_failures", 3),
+        cooldown=config.get("global", "circuit_cooldown", 120),
+    )
+
 
-def _create_chat_client(console):
+def _create_chat_client(console, client_class=None):
     """Ленивое создание LLM клиента только когда он действительно нужен"""
     logger.info("Initializing OpenRouterChat client")
 
     llm_config = config.get_current_llm_config()
-    
-    chat_client = OpenRouterClient(
+
+    # Бюджет контекста: из настроек модели, иначе общий
+    context_window = ContextWindow(
+        budget=llm_config.get("context_budget", config.get("global", "context_budget")),
+        summarize=config.get("global", "context_summary", False),
+    )
+
+    client_kwargs = {}
+    if client_class is None:
+        client_class = AsyncOpenRouterClient if ASYNC_CLIENT else OpenRouterClient
+    if client_class is AsyncOpenRouterClient:
+        client_kwargs["request_timeout"] = config.get("global", "request_timeout")
+    else:
+        # Хеджирование и переключение LLM — только синхронный клиент
+        client_kwargs["hedge"] = _create_hedge()
+        client_kwargs["router"] = _create_router()
+    if config.get("global", "prewarm", True):
+        # Пул держит соединение дольше интервала прогрева, иначе прогрев бесполезен
+        client_kwargs["keepalive_expiry"] = config.get("global", "prewarm_interval", 50) + 10
+
+    chat_client = client_class(
         console=console,
         logger=logger,
         api_key=llm_config["api_key"],
         api_url=llm_config["api_url"],
         model=llm_config["model"],
         system_content=get_system_content(),
-        temperature=config.get("global", "temperature", 0.7)
+        temperature=config.get("global", "temperature", 0.7),
+        context_window=context_window,
+        llm_name=config.current_llm,
+        retry=RetryPolicy.from_config(),
+        prompt_cache=llm_config.get("prompt_cache", config.get("global", "prompt_cache", False)),
+        stream_usage=llm_config.get("stream_usage", config.get("global", "stream_usage", False)),
+        **client_kwargs
     )
     logger.info("OpenRouterChat client created: " + f"{chat_client}")
     return chat_client
@@ -412,9 +776,12 @@ def _create_chat_client(console):
 
 @log_execution_time
 def main() -> None:
+    global EXEC_MODE
 
     try:
         args = parse_args()
+        if args.exec_mode:
+            EXEC_MODE = args.exec_mode
 
         # Settings mode - не нужен LLM клиент
         if args.settings:
@@ -424,24 +791,59 @@ def main() -> None:
             logger.info("Configuration mode finished")
             return 0
 
+        if args.daemon:
+            from penguin_tamer.daemon import serve
+            return serve()
+
+        if args.cache_stats:
+            print_cache_stats(_get_console()())
+            return 0
+
+        if args.stats:
+            return print_stats(_get_console()(), args.since)
+
+        if args.batch:
+            return run_batch_mode(args)
+
+        resume_path = None
+        if args.resume is not None:
+            from penguin_tamer.session_journal import find_session
+            resume_path = find_session(_sessions_dir(), args.resume)
+            if resume_path is None:
+                print(t("Saved dialog not found: {id}").format(id=args.resume or "-"), file=sys.stderr)
+                return 1
+
         # Создаем консоль и клиент только если они нужны для AI операций
         console = _get_console()()
         chat_client = _create_chat_client(console)
 
         # Determine execution mode
-        dialog_mode: bool = args.dialog
-        prompt_parts: list = args.prompt or []
+        dialog_mode: bool = args.dialog or resume_path is not None
+        from penguin_tamer.piped_input import (
+            attach_piped_input, read_piped_input, should_read_stdin, split_stdin_arg,
+        )
+        prompt_parts, stdin_requested = split_stdin_arg(args.prompt or [])
         prompt: str = " ".join(prompt_parts).strip()
 
+        # Данные из конвейера: journalctl -u foo | pt - "почему падает сервис"
+        if not dialog_mode and should_read_stdin(prompt, stdin_requested):
+            sampler = read_piped_input(sys.stdin.buffer, budget=config.get("global", "stdin_budget", 4000))
+            logger.info(f"Piped input: {sampler.total_bytes} bytes, {sampler.total_lines} lines, "
+                        f"{sampler.omitted_lines} omitted")
+            if sampler.total_bytes:
+                prompt = attach_piped_input(prompt or t("Explain this input and point out any problems."),
+                                            sampler)
+
         if dialog_mode or not prompt:
             # Dialog mode
             logger.info("Starting in dialog mode")
-            run_dialog_mode(chat_client, console, prompt if prompt else None)
+            run_dialog_mode(chat_client, console, prompt if prompt else None, resume_path)
         else:
             # Single query mode
             logger.info("Starting in single-query mode")
 
-            run_single_query(chat_client, prompt, console)
+            run_single_query(chat_client, prompt, console,
+                             cache=_get_response_cache(args), refresh=args.refresh)
 
     except KeyboardInterrupt:
         logger.info("Interrupted by user")
@@ -450,6 +852,7 @@ def main() -> None:
         logger.critical(f"Unhandled error: {e}", exc_info=True)
         return 1
     finally:
+        _close_async_runner()
         print()  # print empty line anyway
 
     logger.info("Program finished successfully")
@@ -25,10 +25,90 @@ parser.add_argument(
     help=t("Open interactive settings menu."),
 )
 
+parser.add_argument(
+    "--daemon",
+    action="store_true",
+    help=t("Run a background daemon that keeps modules and connections warm. "
+           "Single queries are then served by it."),
+)
+
+parser.add_argument(
+    "--no-cache",
+    action="store_true",
+    help=t("Do not use the response cache for this query."),
+)
+
+parser.add_argument(
+    "--refresh",
+    action="store_true",
+    help=t("Ignore the cached response and store a fresh one."),
+)
+
+parser.add_argument(
+    "--cache-stats",
+    action="store_true",
+    help=t("Show response cache statistics and exit."),
+)
+
+parser.add_argument(
+    "--stats",
+    action="store_true",
+    help=t("Show request latency percentiles per provider and model and exit."),
+)
+
+parser.add_argument(
+    "--since",
+    default="7d",
+    metavar="WINDOW",
+    help=t("Time window for --stats, e.g. 30m, 24h, 7d (default: 7d)."),
+)
+
+parser.add_argument(
+    "--resume",
+    nargs="?",
+    const="",
+    metavar="ID",
+    help=t("Continue a saved dialog: the last one or the session with this ID."),
+)
+
+parser.add_argument(
+    "--exec-mode",
+    choices=["auto", "pty", "pipe"],
+    help=t("How to run code blocks: in a pseudo-terminal (colors, interactive programs) or with pipes."),
+)
+
+parser.add_argument(
+    "--batch",
+    metavar="FILE",
+    help=t("Run prompts from FILE (one per line or JSONL with a \"prompt\" field; - for stdin) "
+           "concurrently and print results as JSONL."),
+)
+
+parser.add_argument(
+    "--concurrency",
+    type=int,
+    metavar="N",
+    help=t("Number of concurrent requests in --batch mode (default: batch_concurrency setting)."),
+)
+
+parser.add_argument(
+    "--order",
+    choices=("input", "completion"),
+    default="input",
+    help=t("Order of --batch results: input order or as they complete (default: input)."),
+)
+
+parser.add_argument(
+    "-o",
+    "--output",
+    metavar="FILE",
+    help=t("Write --batch results to FILE instead of stdout."),
+)
+
 parser.add_argument(
     "prompt",
     nargs="*",
-    help=t("Your prompt to the AI."),
+    help=t("Your prompt to the AI. Add - to attach data from stdin: cmd | pt - \"question\"."),
 )
 
 
@@ -38,5 +118,6 @@ def parse_args() -> argparse.Namespace:
     args = parser.parse_args()
     logger.info("Parsing command line arguments...")
     logger.debug(f"Args received: dialog={args.dialog}, settings={args.settings}, "
+                 f"no_cache={args.no_cache}, refresh={args.refresh}, "
                  f"prompt={args.prompt or '(empty)'}")
     return args
@@ -0,0 +1,186 @@
+"""
+Пакетный режим: `pt --batch prompts.txt`.
+
+Читает запросы из файла или stdin (по одному в строке или JSONL с полем
+"prompt" и необязательным "id"), выполняет их параллельно с ограничением
+числа одновременных запросов и частоты запросов к LLM и пишет результаты
+в JSONL: в порядке входа или по мере готовности. Все запросы идут через
+один OpenAI-клиент, то есть через один пул HTTP-соединений. При Ctrl+C
+клиент закрывается: запросы в работе обрываются, а ждущие очереди не
+начинаются, поэтому pt не ждет ответов, которые уже никто не выведет.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from penguin_tamer.config_manager import config
+from penguin_tamer.hedging import Provider
+from penguin_tamer.logger import logger
+from penguin_tamer.metrics import metrics
+from penguin_tamer.prompt_cache import usage_tokens, with_cache_control
+
+
+def read_prompts(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Разбирает входные строки: текст запроса или JSON-объект {"prompt": ..., "id": ...}.
+
+    Пустые строки пропускаются. Для строк без id используется номер строки.
+
+    Raises:
+        ValueError: JSON-строка без поля prompt
+    """
+    items = []
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        item: Dict[str, Any] = {"id": line_no, "prompt": line}
+        if line.startswith("{"):
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = None  # Обычный текст, который начинается с "{"
+            if isinstance(data, dict):
+                if not data.get("prompt"):
+                    raise ValueError(f"line {line_no}: JSON object without \"prompt\"")
+                item = {"id": data.get("id", line_no), "prompt": str(data["prompt"])}
+        items.append(item)
+    return items
+
+
+class RateLimiter:
+    """Не больше per_minute запросов в минуту, равномерно (0 — без ограничения)."""
+
+    def __init__(self, per_minute: float = 0) -> None:
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, stop: Optional[threading.Event] = None) -> None:
+        """Ждет своей очереди; stop прерывает ожидание."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            if stop is None:
+                time.sleep(start - now)
+            else:
+                stop.wait(start - now)
+
+
+class BatchRunner:
+    """Параллельное выполнение независимых запросов к одной LLM.
+
+    Args:
+        client: OpenAI-клиент, общий для всех запросов
+        provider: LLM (модель и семафор одновременных запросов)
+        system_content: Системный промпт каждого запроса
+        temperature: Температура генерации
+        concurrency: Число рабочих потоков
+        rate_per_minute: Лимит запросов в минуту (0 — без ограничения)
+        prompt_cache: Метка cache_control на общем системном промпте (см. prompt_cache.py)
+    """
+
+    def __init__(self, client, provider: Provider, system_content: str, temperature: float = 0.7,
+                 concurrency: int = 4, rate_per_minute: float = 0, prompt_cache: bool = False) -> None:
+        self.client = client
+        self.provider = provider
+        self.system_content = system_content
+        self.temperature = temperature
+        self.concurrency = max(1, int(concurrency))
+        self.rate_limiter = RateLimiter(rate_per_minute)
+        self.prompt_cache = prompt_cache
+        self._stopped = threading.Event()  # Прогон прерван: новые запросы не отправляются
+
+    def _ask(self, index: int, item: Dict[str, Any]) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"index": index, "id": item["id"], "prompt": item["prompt"],
+                                  "reply": None, "error": None, "latency": None,
+                                  "provider": self.provider.name, "model": self.provider.model}
+        messages = [{"role": "system", "content": self.system_content},
+                    {"role": "user", "content": item["prompt"]}]
+        if self.prompt_cache:
+            messages = with_cache_control(messages, last=False)
+        usage = None
+        with self.provider.semaphore:
+            self.rate_limiter.acquire(self._stopped)
+            if self._stopped.is_set():
+                result["error"] = "Cancelled"
+                return result
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.provider.model,
+                    messages=messages,
+                    temperature=self.temperature
+                )
+                result["reply"] = response.choices[0].message.content
+                usage = getattr(response, "usage", None)
+            except Exception as e:
+                logger.error(f"Batch item {item['id']} failed: {e}")
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["latency"] = round(time.perf_counter() - start, 3)
+
+        if self._stopped.is_set() or not config.get("global", "telemetry", True):
+            return result
+        reply_bytes = len((result["reply"] or "").encode("utf-8"))
+        prompt_tokens, cached_tokens = usage_tokens(usage)
+        metrics.record("request", provider=self.provider.name, model=self.provider.model, mode="batch",
+                       ok=result["error"] is None, error=result["error"] and result["error"].split(":")[0],
+                       ttft=result["latency"], total=result["latency"],
+                       req_bytes=len(json.dumps(messages, ensure_ascii=False).encode("utf-8")),
+                       resp_bytes=reply_bytes, prompt_tokens=prompt_tokens, cached_tokens=cached_tokens)
+        return result
+
+    def run(self, items: List[Dict[str, Any]], write: Callable[[Dict[str, Any]], None],
+            ordered: bool = True) -> Dict[str, Any]:
+        """Выполняет запросы и передает каждый результат в write.
+
+        Args:
+            items: Запросы из read_prompts
+            write: Получает результат (dict) сразу, как только его можно вывести
+            ordered: True — в порядке входа, False — по мере готовности
+
+        Returns:
+            Сводка: число запросов, ошибок и общее время.
+        """
+        start = time.perf_counter()
+        errors = 0
+        pending: Dict[int, Dict[str, Any]] = {}
+        next_index = 0
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch")
+        try:
+            futures = [executor.submit(self._ask, i, item) for i, item in enumerate(items)]
+            for future in as_completed(futures):
+                result = future.result()
+                errors += result["error"] is not None
+                if not ordered:
+                    write(result)
+                    continue
+                # В порядке входа: выводим непрерывный готовый префикс
+                pending[result["index"]] = result
+                while next_index in pending:
+                    write(pending.pop(next_index))
+                    next_index += 1
+        except BaseException:
+            # Ctrl+C: рабочие потоки не демоны — без закрытия клиента выход ждал бы их ответов
+            self._stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._close_client()
+            raise
+        executor.shutdown()
+        return {"items": len(items), "errors": errors, "elapsed": round(time.perf_counter() - start, 3)}
+
+    def _close_client(self) -> None:
+        """Закрывает пул соединений клиента: запросы в работе обрываются с ошибкой."""
+        close = getattr(self.client, "close", None)
+        if close is None:
+            return
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Failed to close batch client: {e}")
@@ -0,0 +1,175 @@
+"""
+Буфер вывода команды с фиксированным бюджетом памяти.
+
+`find /` или `journalctl` выводят гигабайты, и хранить весь вывод в
+памяти нельзя. CaptureBuffer держит в памяти только начало (head) и
+скользящий хвост (tail); все, что идет после начала, при переполнении
+дописывается во временный файл (анонимный, удаляется при закрытии).
+Полный вывод можно потоково прочитать через iter_bytes / iter_lines,
+например чтобы отправить сводку LLM; text() — короткое представление
+«начало + пропуск + конец» для экрана.
+"""
+
+import codecs
+import os
+import tempfile
+from typing import Iterator, Optional
+
+from penguin_tamer.i18n import t
+
+CHUNK_SIZE = 64 * 1024
+
+
+class CaptureBuffer:
+    """Вывод одного канала команды: начало и хвост в памяти, остальное — на диске.
+
+    В памяти одновременно не больше memory_budget байт: половина — начало
+    вывода, хвост занимает от четверти до половины бюджета.
+
+    Args:
+        memory_budget: Бюджет памяти в байтах
+        spill_limit: Сколько байт максимум писать во временный файл
+            (0 — не писать: полный вывод не сохраняется, только начало и хвост)
+    """
+
+    def __init__(self, memory_budget: int = 1024 * 1024, spill_limit: int = 1024 ** 3) -> None:
+        self.head_limit = memory_budget // 2
+        self.tail_limit = max(1, memory_budget // 4)
+        self.spill_limit = spill_limit
+        self.head = bytearray()
+        self._tail = bytearray()
+        self.total_bytes = 0
+        self._spill = None  # Временный файл: весь вывод после head
+        self._spilled = 0
+        self.spill_truncated = False  # Вывод превысил spill_limit
+
+    def __len__(self) -> int:
+        return self.total_bytes
+
+    def __enter__(self) -> "CaptureBuffer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, data: bytes) -> None:
+        self.total_bytes += len(data)
+        room = self.head_limit - len(self.head)
+        if room > 0:
+            self.head += data[:room]
+            data = data[room:]
+            if not data:
+                return
+        if self._spill is not None:
+            self._spill_write(data)
+        if len(self._tail) + len(data) > 2 * self.tail_limit:
+            if self._spill is None and self.spill_limit:
+                # Первое переполнение: с этого момента все после начала пишется в файл
+                self._spill = tempfile.TemporaryFile(prefix="pt-output-")
+                self._spill_write(self._tail)
+                self._spill_write(data)
+            # Хвост обрезается до добавления, чтобы не выходить за бюджет
+            keep = self.tail_limit - len(data)
+            if keep > 0:
+                del self._tail[:-keep]
+            else:
+                self._tail.clear()
+                data = data[-self.tail_limit:]
+        self._tail += data
+
+    def _spill_write(self, data) -> None:
+        room = self.spill_limit - self._spilled
+        if room <= 0:
+            self.spill_truncated = True
+            return
+        if len(data) > room:
+            data = data[:room]
+            self.spill_truncated = True
+        self._spill.write(data)
+        self._spilled += len(data)
+
+    @property
+    def tail(self) -> bytes:
+        """Последние байты вывода (после начала)."""
+        return bytes(self._tail)
+
+    @property
+    def omitted_bytes(self) -> int:
+        """Сколько байт нет в памяти (ни в начале, ни в хвосте)."""
+        return self.total_bytes - len(self.head) - len(self._tail)
+
+    @property
+    def complete(self) -> bool:
+        """Полный вывод доступен через iter_bytes."""
+        return self.omitted_bytes == 0 or (self._spill is not None and not self.spill_truncated)
+
+    def text(self) -> str:
+        """Начало и хвост вывода; пропущенная середина заменена пометкой."""
+        head, tail = bytes(self.head), bytes(self._tail)
+        omitted = self.omitted_bytes
+        if not omitted:
+            return (head + tail).decode("utf-8", errors="replace")
+        # Пропуск — по границам строк: начало и хвост состоят из целых строк
+        cut = head.rfind(b"\n") + 1
+        if cut:
+            omitted += len(head) - cut
+            head = head[:cut]
+        cut = tail.find(b"\n") + 1
+        if 0 < cut < len(tail):
+            omitted += cut
+            tail = tail[cut:]
+        head_text = head.decode("utf-8", errors="replace")
+        if head_text and not head_text.endswith("\n"):
+            head_text += "\n"
+        marker = t("[... {count} bytes of output omitted ...]").format(count=omitted)
+        return head_text + marker + "\n" + tail.decode("utf-8", errors="replace")
+
+    def iter_bytes(self, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """Полный вывод блоками (если complete; иначе — все, что сохранено)."""
+        if self.head:
+            yield bytes(self.head)
+        if self._spill is None:
+            if self._tail:
+                yield bytes(self._tail)
+            return
+        self._spill.flush()
+        fd = self._spill.fileno()
+        offset = 0
+        while offset < self._spilled:
+            chunk = os.pread(fd, min(chunk_size, self._spilled - offset), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    def iter_lines(self) -> Iterator[str]:
+        """Полный вывод по строкам (без перевода строки), декодированный как UTF-8."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending = ""
+        for chunk in self.iter_bytes():
+            lines = (pending + decoder.decode(chunk)).split("\n")
+            pending = lines.pop()
+            yield from lines
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            yield pending
+
+    def close(self) -> None:
+        """Удаляет временный файл."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            self._spilled = 0
+            self.spill_truncated = True  # Полный вывод больше недоступен
+
+    def __repr__(self) -> str:
+        return (f"CaptureBuffer(total={self.total_bytes}, head={len(self.head)}, tail={len(self._tail)}, "
+                f"spilled={self._spilled}, complete={self.complete})")
+
+
+def capture_buffer_from_config(memory_budget: Optional[int] = None) -> CaptureBuffer:
+    """CaptureBuffer с бюджетом и лимитом временного файла из настроек."""
+    from penguin_tamer.config_manager import config
+    if memory_budget is None:
+        memory_budget = config.get("global", "capture_memory_kb", 1024) * 1024
+    return CaptureBuffer(memory_budget, spill_limit=config.get("global", "capture_spill_mb", 1024) * 1024 * 1024)
@@ -0,0 +1,96 @@
+"""
+Точка входа `pt` — тонкий клиент фонового демона.
+
+Если запущен `pt --daemon`, одиночный запрос (`pt "вопрос"`) отправляется
+демону через Unix-сокет, а отрисованный ответ потоково выводится в
+терминал: rich, openai, yaml и prompt_toolkit в этом процессе не
+импортируются. Если демон не запущен (или режим не поддерживается
+демоном), выполняется обычный запуск в текущем процессе.
+"""
+
+import json
+import os
+import shutil
+import socket
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from penguin_tamer import APP_NAME
+
+# Флаги, с которыми одиночный запрос можно передать демону
+_DAEMON_FLAGS = {"--no-cache", "--refresh"}
+
+
+def socket_path() -> Path:
+    """Путь к Unix-сокету демона (рядом с пользовательской конфигурацией)."""
+    from platformdirs import user_config_dir
+    return Path(user_config_dir(APP_NAME)) / "daemon.sock"
+
+
+def _is_daemon_query(argv: List[str]) -> bool:
+    """Одиночный запрос без флагов, которые требуют локального запуска."""
+    if not hasattr(socket, "AF_UNIX") or not sys.stdin.isatty():
+        return False
+    words = [a for a in argv if not a.startswith("-")]
+    flags = [a for a in argv if a.startswith("-")]
+    return bool(words) and all(f in _DAEMON_FLAGS for f in flags)
+
+
+def _color_system() -> Optional[str]:
+    if not sys.stdout.isatty():
+        return None
+    if os.environ.get("COLORTERM") in ("truecolor", "24bit"):
+        return "truecolor"
+    return "256"
+
+
+def query_daemon(argv: List[str]) -> Optional[int]:
+    """Отправляет запрос демону и выводит ответ.
+
+    Returns:
+        Код возврата или None, если демон недоступен.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(socket_path()))
+    except OSError:
+        sock.close()
+        return None
+
+    request = {
+        "prompt": " ".join(a for a in argv if not a.startswith("-")),
+        "no_cache": "--no-cache" in argv,
+        "refresh": "--refresh" in argv,
+        "width": shutil.get_terminal_size().columns,
+        "color_system": _color_system(),
+    }
+    out = sys.stdout.buffer
+    try:
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            out.write(data)
+            out.flush()
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        sock.close()
+    return 0
+
+
+def main() -> int:
+    argv = sys.argv[1:]
+    if _is_daemon_query(argv):
+        code = query_daemon(argv)
+        if code is not None:
+            return code
+
+    from penguin_tamer.__main__ import main as run_in_process
+    return run_in_process()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""
+Результаты выполненных команд — в следующий вопрос к LLM.
+
+Если включена опция attach_command_output, диалог запоминает команды,
+выполненные после последнего вопроса (блоки кода и команды с точкой), и
+прикладывает к следующему вопросу их код завершения и вывод. Вывод
+сжимается до бюджета токенов command_output_budget тем же потоковым
+StreamSampler, что и данные из конвейера (piped_input): начало и конец,
+одинаковые строки подряд схлопываются (отличающиеся только числами — лишь
+когда вывод не помещается в бюджет), управляющие последовательности
+терминала убираются, пропуск отмечается числом строк. Полный вывод читается из
+CaptureBuffer блоками (в том числе из временного файла), поэтому ни
+память, ни размер запроса не зависят от объема вывода.
+"""
+
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple, Union
+
+from penguin_tamer.capture_buffer import CHUNK_SIZE, CaptureBuffer
+from penguin_tamer.piped_input import StreamSampler
+
+OutputSource = Union[CaptureBuffer, str, bytes]
+
+
+@dataclass
+class CommandRun:
+    """Выполненная команда: код, код завершения и вывод по каналам."""
+
+    code: str
+    returncode: Optional[int]  # None — прервана
+    outputs: List[Tuple[str, OutputSource]] = field(default_factory=list)
+
+    @classmethod
+    def from_process(cls, code: str, process) -> "CommandRun":
+        """По результату исполнителя (CapturedProcess или CompletedProcess)."""
+        stdout_capture = getattr(process, "stdout_capture", None)
+        if stdout_capture is None:
+            return cls(code, process.returncode, [("stdout", process.stdout or ""), ("stderr", process.stderr or "")])
+        if process.stderr_capture is None:  # PTY: stdout и stderr вместе
+            return cls(code, process.returncode, [("output", stdout_capture)])
+        return cls(code, process.returncode, [("stdout", stdout_capture), ("stderr", process.stderr_capture)])
+
+    @classmethod
+    def from_block(cls, result) -> "CommandRun":
+        """По итогу блока из multi_block.run_code_blocks."""
+        if result.process is not None:
+            return cls.from_process(result.code, result.process)
+        outputs = [("output", result.output)] if result.output is not None else []
+        return cls(result.code, result.returncode, outputs)
+
+    def close(self) -> None:
+        """Удаляет временные файлы с полным выводом."""
+        for _, source in self.outputs:
+            if isinstance(source, CaptureBuffer):
+                source.close()
+
+
+def _chunks(source: OutputSource) -> Iterator[bytes]:
+    if isinstance(source, CaptureBuffer):
+        if source.complete:
+            yield from source.iter_bytes()
+        else:  # Середина не сохранена (capture_spill_mb): начало, пометка и конец
+            yield source.text().encode("utf-8")
+        return
+    if isinstance(source, str):
+        source = source.encode("utf-8", errors="replace")
+    for start in range(0, len(source), CHUNK_SIZE):
+        yield source[start:start + CHUNK_SIZE]
+
+
+def sample_output(source: OutputSource, budget: int) -> StreamSampler:
+    """Выборка вывода команды в пределах бюджета токенов (потоково)."""
+    sampler = StreamSampler(budget, strip_ansi=True)
+    for chunk in _chunks(source):
+        sampler.feed(chunk)
+    sampler.close()
+    return sampler
+
+
+def describe_run(run: CommandRun, budget: int) -> str:
+    """Команда, код завершения и выборка вывода для LLM."""
+    status = "interrupted" if run.returncode is None else f"exit code {run.returncode}"
+    parts = [f"Command ({status}):\n```bash\n{run.code.strip()}\n```"]
+    streams = [(name, source) for name, source in run.outputs if len(source)]
+    if not streams:
+        parts.append("No output.")
+    for name, source in streams:
+        sampler = sample_output(source, max(1, budget // len(streams)))
+        if isinstance(source, CaptureBuffer) and not source.complete:
+            # Середина не сохранена: число строк неизвестно
+            header = f"{name} ({len(source)} bytes, sampled: beginning and end"
+        else:
+            header = f"{name} ({sampler.total_lines} lines, {sampler.total_bytes} bytes"
+            if sampler.omitted_lines:
+                header += ", sampled: beginning and end"
+        header += "):"
+        parts.append(f"{header}\n```\n{sampler.text()}\n```")
+    return "\n".join(parts)
+
+
+def attach_command_results(prompt: str, runs: List[CommandRun], budget: int = 2000) -> str:
+    """Добавляет к вопросу результаты команд; бюджет делится между ними поровну."""
+    share = max(1, budget // len(runs))
+    results = "\n\n".join(describe_run(run, share) for run in runs)
+    return f"{prompt}\n\nResults of the commands I ran:\n\n{results}"
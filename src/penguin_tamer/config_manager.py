@@ -40,6 +40,7 @@ import shutil
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from platformdirs import user_config_dir
+from penguin_tamer import APP_NAME
 from penguin_tamer.i18n import detect_system_language
 
 
@@ -51,7 +52,7 @@ class ConfigManager:
     если пользовательский config.yaml не существует.
     """
 
-    def __init__(self, app_name: str = "ai-ebash"):
+    def __init__(self, app_name: str = APP_NAME):
         """
         Инициализация менеджера конфигурации.
 
@@ -0,0 +1,141 @@
+"""
+Ограничение контекста диалога бюджетом токенов.
+
+ContextWindow строит из полной истории OpenRouterClient.messages список
+сообщений для очередного запроса, который укладывается в бюджет токенов:
+- системный промпт и последний обмен (текущий вопрос) сохраняются всегда;
+- более старые обмены добавляются от новых к старым, пока хватает бюджета;
+- не поместившиеся обмены отбрасываются или, если включено, заменяются
+  коротким локальным пересказом (без обращения к LLM), который кэшируется.
+  В кэше остаются только обмены, пересказанные в последнем запросе.
+
+Полная история при этом не изменяется.
+"""
+
+from itertools import chain
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from penguin_tamer.token_counter import MESSAGE_OVERHEAD, TokenCounter, count_text
+
+Message = Dict[str, str]
+
+# Длина строки пересказа одного сообщения (символов)
+_SUMMARY_LINE_CHARS = 120
+
+
+def _iter_turns_reversed(messages: List[Message], start: int) -> Iterator[Tuple[int, int]]:
+    """Границы обменов (begin, end) от последнего к первому.
+
+    Обмен начинается с сообщения пользователя, которое идет после ответа
+    ассистента (или первым после системных); подряд идущие сообщения
+    пользователя относятся к одному обмену. Обход с конца позволяет
+    остановиться, как только бюджет исчерпан, не просматривая всю историю.
+    """
+    end = len(messages)
+    i = end - 1
+    while i >= start:
+        if messages[i].get("role") == "user" and (i == start or messages[i - 1].get("role") != "user"):
+            yield i, end
+            end = i
+        i -= 1
+    if end > start:
+        yield start, end
+
+
+def _first_line(text: str) -> str:
+    line = (text or "").strip().split("\n", 1)[0]
+    if len(line) > _SUMMARY_LINE_CHARS:
+        line = line[:_SUMMARY_LINE_CHARS - 3] + "..."
+    return line
+
+
+class ContextWindow:
+    """Собирает контекст запроса в пределах бюджета токенов.
+
+    Args:
+        budget: Максимум токенов на запрос (None или 0 — без ограничения)
+        summarize: Заменять отброшенные обмены локальным пересказом
+    """
+
+    def __init__(self, budget: Optional[int] = None, summarize: bool = False,
+                 counter: Optional[TokenCounter] = None) -> None:
+        self.budget = budget or None
+        self.summarize = summarize
+        self.counter = counter or TokenCounter()
+        self.last_tokens = 0          # Токенов в последнем собранном запросе
+        self.last_dropped = 0         # Сколько сообщений истории не вошло в последний запрос
+        # id первого сообщения обмена -> ((сообщение, content) обмена, строка пересказа, ее токены)
+        self._summary_cache: Dict[int, Tuple[tuple, str, int]] = {}
+
+    def build(self, messages: List[Message]) -> List[Message]:
+        """Возвращает список сообщений для запроса."""
+        count = self.counter.count
+        start = 0
+        while start < len(messages) and messages[start].get("role") == "system":
+            start += 1
+        used = sum(count(m) for m in messages[:start])
+
+        if self.budget is None:
+            # Без ограничения отправляется вся история: итог берется нарастающий
+            self.last_tokens = self.counter.sync(messages)
+            self.last_dropped = 0
+            return list(messages)
+
+        # Последний обмен (текущий вопрос) входит всегда, остальные — пока хватает бюджета
+        turns = _iter_turns_reversed(messages, start)
+        kept_from = len(messages)
+        for begin, end in turns:
+            tokens = sum(count(m) for m in messages[begin:end])
+            if kept_from < len(messages) and used + tokens > self.budget:
+                dropped = [(begin, end)]
+                break
+            used += tokens
+            kept_from = begin
+        else:
+            dropped = []
+
+        context = messages[:start]
+        if dropped and self.summarize:
+            # Пересказ строится по мере необходимости: новые обмены важнее старых
+            dropped_turns = (messages[b:e] for b, e in chain(dropped, turns))
+            summary, tokens = self._summary(dropped_turns, self.budget - used)
+            if summary is not None:
+                context.append(summary)
+                used += tokens
+        context.extend(messages[kept_from:])
+
+        self.last_tokens = used
+        self.last_dropped = kept_from - start
+        return context
+
+    def _summary(self, turns: Iterator[List[Message]], budget: int) -> Tuple[Optional[Message], int]:
+        """Пересказ отброшенных обменов (от новых к старым): по строке на обмен.
+
+        Возвращает сообщение с пересказом (или None) и его размер в токенах.
+        """
+        header = "Summary of earlier conversation (oldest first):"
+        lines: List[str] = []
+        used = MESSAGE_OVERHEAD + count_text(header)
+        # id сообщения может достаться другому обмену (после --resume или замены истории):
+        # запись действительна, только если это те же объекты сообщений с тем же content
+        cache: Dict[int, Tuple[tuple, str, int]] = {}
+        for turn in turns:
+            key = tuple((m, m.get("content")) for m in turn)
+            cached = self._summary_cache.get(id(turn[0]))
+            if (cached is None or len(cached[0]) != len(key)
+                    or any(a is not b or x is not y for (a, x), (b, y) in zip(cached[0], key))):
+                question = _first_line(" ".join(m.get("content", "") for m in turn if m.get("role") == "user"))
+                answer = _first_line(" ".join(m.get("content", "") for m in turn if m.get("role") == "assistant"))
+                line = f"- Q: {question} | A: {answer}"
+                cached = (key, line, count_text(line) + 1)
+            cache[id(turn[0])] = cached
+            _, line, cost = cached
+            if used + cost > budget:
+                break
+            lines.append(line)
+            used += cost
+        self._summary_cache = cache  # Только обмены этого запроса: кэш не растет с длиной диалога
+        if not lines:
+            return None, 0
+        lines.append(header)
+        return {"role": "system", "content": "\n".join(reversed(lines))}, used
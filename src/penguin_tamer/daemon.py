@@ -0,0 +1,161 @@
+"""
+Фоновый демон `pt --daemon`.
+
+Держит в памяти прогретые модули (rich, openai, yaml), загруженную
+конфигурацию и общий OpenAI-клиент с пулом HTTP-соединений. Тонкий
+клиент (penguin_tamer.cli) передает запрос через Unix-сокет, демон
+выполняет его как `pt "вопрос"` и потоково пишет отрисованный ответ
+(с ANSI-последовательностями) обратно в сокет.
+
+Изменения настроек применяются после перезапуска демона.
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+from types import SimpleNamespace
+
+from penguin_tamer.cli import socket_path
+from penguin_tamer.i18n import t
+from penguin_tamer.logger import logger
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Один запрос: JSON-строка с параметрами, в ответ — поток вывода."""
+
+    server: "_Server"
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            return
+        out = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        try:
+            self.server.state.run_query(request, out)
+            out.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Клиент отключился (например, Ctrl+C) — просто прекращаем вывод
+            logger.info("Daemon client disconnected")
+        finally:
+            try:
+                out.detach()
+            except Exception:
+                pass
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    state: "DaemonState"
+
+
+class DaemonState:
+    """Прогретое состояние демона, общее для всех запросов."""
+
+    def __init__(self) -> None:
+        self._shared_client = None
+        self._client_key = None
+
+    def warm(self) -> None:
+        """Импортирует тяжелые модули и создает общий OpenAI-клиент."""
+        from rich.console import Console
+        from rich.live import Live  # noqa: F401
+        from rich.markdown import Markdown  # noqa: F401
+        from penguin_tamer import __main__ as app
+        from penguin_tamer.llm_client import OpenRouterClient
+        self._share_client(app._create_chat_client(Console(file=io.StringIO()), client_class=OpenRouterClient))
+        logger.info("Daemon warmed up")
+
+    def _share_client(self, chat_client) -> None:
+        """Общий OpenAI-клиент: соединения переиспользуются между запросами.
+
+        Клиент создает сам chat_client (свойство client) с теми же параметрами,
+        что и без демона: без встроенных повторов openai при своих (retry_rules)
+        и с keep-alive пула для прогрева.
+        """
+        key = (chat_client.api_key, chat_client.api_url)
+        if self._client_key != key:
+            self._shared_client = chat_client.client
+            self._client_key = key
+        chat_client._client = self._shared_client
+
+    def run_query(self, request: dict, out) -> None:
+        from rich.console import Console
+        from penguin_tamer import __main__ as app
+        from penguin_tamer.llm_client import OpenRouterClient
+
+        color_system = request.get("color_system")
+        console = Console(
+            file=out,
+            width=request.get("width") or 80,
+            force_terminal=color_system is not None,
+            color_system=color_system,
+        )
+        prompt = (request.get("prompt") or "").strip()
+        if not prompt:
+            return
+        logger.info(f"Daemon query: '{prompt[:50]}'")
+
+        chat_client = app._create_chat_client(console, client_class=OpenRouterClient)
+        self._share_client(chat_client)
+        args = SimpleNamespace(no_cache=request.get("no_cache", False))
+        app.run_single_query(chat_client, prompt, console,
+                             cache=app._get_response_cache(args),
+                             refresh=request.get("refresh", False))
+
+
+def _daemon_running(path) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+
+def serve() -> int:
+    """Запускает демон в текущем процессе (до Ctrl+C)."""
+    if not hasattr(socket, "AF_UNIX"):
+        print(t("Daemon mode is not supported on this platform."))
+        return 1
+
+    path = socket_path()
+    if path.exists():
+        if _daemon_running(path):
+            print(t("Daemon is already running: {path}").format(path=path))
+            return 1
+        path.unlink()  # Сокет остался от аварийно завершенного демона
+
+    # Сокет сразу создается с доступом только для владельца: между bind и chmod
+    # другой пользователь не успеет подключиться к демону с нашим ключом API
+    old_umask = os.umask(0o077)
+    try:
+        server = _Server(str(path), _Handler)
+    finally:
+        os.umask(old_umask)
+    os.chmod(path, 0o600)
+    server.state = DaemonState()
+    server.state.warm()
+    print(t("Daemon is listening on {path}. Ctrl+C - stop").format(path=path))
+
+    def _terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        logger.info("Daemon stopped")
+    return 0
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from penguin_tamer.i18n import t
 
 _openai_exceptions = None
@@ -8,13 +10,15 @@ def _get_openai_exceptions():
     global _openai_exceptions
     if _openai_exceptions is None:
         from openai import (RateLimitError, APIError, OpenAIError, AuthenticationError, 
-                            APIConnectionError, PermissionDeniedError, NotFoundError, BadRequestError)
+                            APIConnectionError, APITimeoutError, PermissionDeniedError, NotFoundError,
+                            BadRequestError)
         _openai_exceptions = {
             'RateLimitError': RateLimitError,
             'APIError': APIError,
             'OpenAIError': OpenAIError,
             'AuthenticationError': AuthenticationError,
             'APIConnectionError': APIConnectionError,
+            'APITimeoutError': APITimeoutError,
             'PermissionDeniedError': PermissionDeniedError,
             'NotFoundError': NotFoundError,
             'BadRequestError': BadRequestError
@@ -22,6 +26,32 @@ def _get_openai_exceptions():
     return _openai_exceptions
 
 
+def error_class(error: BaseException) -> Optional[str]:
+    """Класс временной ошибки: rate_limit (429), server (5xx), timeout, connection; иначе None."""
+    exceptions = _get_openai_exceptions()
+    if isinstance(error, exceptions['RateLimitError']):
+        return 'rate_limit'
+    status = getattr(error, 'status_code', None)
+    if isinstance(error, exceptions['APIError']) and status is not None and status >= 500:
+        return 'server'
+    if isinstance(error, (TimeoutError, exceptions['APITimeoutError'])):
+        return 'timeout'
+    if isinstance(error, (ConnectionError, exceptions['APIConnectionError'])):
+        return 'connection'
+    # Обрыв потока при чтении чанков приходит от httpx без обертки openai
+    httpx_classes = {cls.__name__ for cls in type(error).__mro__ if cls.__module__.startswith('httpx')}
+    if 'TimeoutException' in httpx_classes:
+        return 'timeout'
+    if 'TransportError' in httpx_classes:
+        return 'connection'
+    return None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """429, 5xx и ошибки соединения: запрос имеет смысл повторить (у этой или другой LLM)."""
+    return error_class(error) is not None
+
+
 def connection_error(error: Exception) -> str:
     """Map API errors to localized messages (English as keys)."""
     try:
@@ -1,5 +1,6 @@
 import re
 import platform
+from typing import Optional
 from penguin_tamer.logger import log_execution_time
 from penguin_tamer.i18n import t
 
@@ -16,11 +17,76 @@ def format_api_key_display(api_key: str) -> str:
         return f"{api_key[:5]}...{api_key[-5:]}"
 
 
+# Подпись в квадратных скобках, за ней блок кода до первой закрывающей ```
+_LABELED_BLOCK_RE = re.compile(r"\[[^\]]+\]\s*```.*?\n(.*?)```", flags=re.DOTALL)
+
+
 def extract_labeled_code_blocks(text: str) -> list[str]:
     """
     Извлекает содержимое блоков кода, у которых сверху есть подпись в квадратных скобках.
     Подпись может быть любой: [Код #1], [Пример], [Test], и т.п.
     """
-    pattern = r"\[[^\]]+\]\s*```.*?\n(.*?)```"
-    matches = re.findall(pattern, text, flags=re.DOTALL)
+    matches = _LABELED_BLOCK_RE.findall(text)
     return [m.strip() for m in matches]
+
+
+# Подпись и открывающая ``` со строкой языка: с этого места начинается тело блока
+_BLOCK_OPENING_RE = re.compile(r"\[[^\]]+\]\s*```[^\n]*\n")
+# ], после которой до конца текста еще может получиться открывающая ```
+_OPEN_LABEL_END_RE = re.compile(r"\](?=\s*(?:`{0,2}|```[^\n]*)\Z)")
+
+
+class CodeBlockDetector:
+    """Потоковый вариант extract_labeled_code_blocks.
+
+    Получает ответ по чанкам и возвращает блок сразу после его закрывающей
+    ```, не дожидаясь конца ответа. Итоговый список blocks совпадает с
+    extract_labeled_code_blocks(полный ответ) при любом разбиении на чанки.
+
+    Каждый символ просматривается ограниченное число раз: у открытого блока
+    закрывающая ``` ищется только в новом тексте, а тело копится по частям;
+    текст перед местом, где еще может начаться подпись, отбрасывается.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""  # Еще не разобранный текст
+        self._pos = 0  # Отсюда ищется подпись или, в открытом блоке, ```
+        self._body: Optional[list[str]] = None  # Части тела открытого блока
+        self.blocks: list[str] = []
+
+    def feed(self, text: str) -> list[str]:
+        """Добавляет чанк и возвращает блоки, завершенные этим чанком."""
+        self._buffer += text
+        finished = []
+        while True:
+            if self._body is None:
+                match = _BLOCK_OPENING_RE.search(self._buffer, self._pos)
+                if match is None:
+                    self._pos = self._live_start()
+                    break
+                self._body, self._pos = [], match.end()
+            end = self._buffer.find("```", self._pos)
+            if end < 0:
+                # Последние два символа могут оказаться началом ```
+                keep = max(self._pos, len(self._buffer) - 2)
+                self._body.append(self._buffer[self._pos:keep])
+                self._pos = keep
+                break
+            self._body.append(self._buffer[self._pos:end])
+            finished.append("".join(self._body).strip())
+            self._body, self._pos = None, end + 3
+        self._buffer, self._pos = self._buffer[self._pos:], 0
+        self.blocks.extend(finished)
+        return finished
+
+    def _live_start(self) -> int:
+        """Самое раннее место, где еще может начаться подпись блока.
+
+        Подпись — [ и текст до первой ]. Подписи, чья ] уже не может стать
+        началом открывающей ``` (после нее не пробелы и ```), не подойдут;
+        еще подходят те, что кончаются на «живой» ], и те, у которых ] пока нет.
+        """
+        live = _OPEN_LABEL_END_RE.search(self._buffer, self._pos)
+        end = live.start() if live else len(self._buffer)
+        start = self._buffer.find("[", max(self._pos, self._buffer.rfind("]", self._pos, end) + 1))
+        return len(self._buffer) if start < 0 else start
@@ -0,0 +1,176 @@
+"""
+Хеджирование запросов между несколькими LLM из supported_LLMs.
+
+Если текущая LLM не прислала первый токен за hedge_delay секунд (или
+сразу вернула ошибку), тот же запрос отправляется запасной LLM.
+Побеждает тот, кто первым начал отвечать; поток проигравшего
+закрывается. Число одновременных запросов к одной LLM ограничено
+семафором, общим для всего процесса (важно для демона). Итог каждого
+запроса записывается в журнал метрик (событие "hedge"), если включена
+телеметрия (telemetry).
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from penguin_tamer.config_manager import config
+from penguin_tamer.logger import logger
+from penguin_tamer.metrics import metrics
+from penguin_tamer.stream_pipeline import StreamReader, StreamTimings
+
+_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_semaphores_lock = threading.Lock()
+
+
+def provider_semaphore(name: str, limit: int) -> threading.BoundedSemaphore:
+    """Семафор одновременных запросов к LLM name (один на процесс)."""
+    with _semaphores_lock:
+        if name not in _semaphores:
+            _semaphores[name] = threading.BoundedSemaphore(max(1, int(limit)))
+        return _semaphores[name]
+
+
+class Provider:
+    """LLM из supported_LLMs с ограничением одновременных запросов."""
+
+    def __init__(self, name: str, model: str, api_url: str, api_key: str, max_concurrency: int = 2) -> None:
+        self.name = name
+        self.model = model
+        self.api_url = api_url
+        self.api_key = api_key
+        self.semaphore = provider_semaphore(name, max_concurrency)
+        self.client: Any = None  # OpenAI-клиент, создается при первом запросе
+
+    @classmethod
+    def from_config(cls, name: str, default_concurrency: int = 2) -> "Provider":
+        llm = config.get_llm_config(name)
+        return cls(name, llm.get("model", ""), llm.get("api_url", ""), llm.get("api_key", ""),
+                   llm.get("max_concurrency", default_concurrency))
+
+
+class _Candidate:
+    """Запрос к одному провайдеру: поток открывается и читается в StreamReader."""
+
+    def __init__(self, provider: Provider, create: Callable[[Provider], Iterable],
+                 timings: StreamTimings, notify: threading.Event, acquired: bool = False) -> None:
+        self.provider = provider
+        self.cancelled = False
+        self._create = create
+        self._acquired = acquired  # Слот семафора уже занят вызывающим
+        self._stream = None
+        self._lock = threading.Lock()
+        self.reader = StreamReader(self._chunks(), timings, notify)
+        self.reader.on_close = self.cancel  # Генератор _chunks нельзя закрыть из другого потока
+
+    def _chunks(self):
+        if not self._acquired:
+            self.provider.semaphore.acquire()
+        try:
+            stream = self._create(self.provider)
+            with self._lock:
+                self._stream = stream
+                if self.cancelled:
+                    self._close(stream)
+                    return
+            yield from stream
+        finally:
+            self.provider.semaphore.release()
+
+    def cancel(self) -> None:
+        """Прерывает запрос: закрывает поток (или закроет сразу после открытия)."""
+        with self._lock:
+            self.cancelled = True
+            stream = self._stream
+        if stream is not None:
+            self._close(stream)
+
+    @staticmethod
+    def _close(stream) -> None:
+        try:
+            stream.close()
+        except Exception as e:
+            logger.debug(f"Failed to close hedged stream: {e}")
+
+
+class Hedge:
+    """Основная и запасная LLM с задержкой хеджирования.
+
+    Args:
+        primary: Текущая LLM
+        secondary: Запасная LLM
+        delay: Сколько ждать первый токен основной LLM (секунды)
+    """
+
+    def __init__(self, primary: Provider, secondary: Provider, delay: float = 3.0) -> None:
+        self.primary = primary
+        self.secondary = secondary
+        self.delay = delay
+
+    def open(self, create: Callable[[Provider], Iterable], started: Optional[float] = None
+             ) -> Tuple[StreamReader, Provider]:
+        """Открывает поток у первой ответившей LLM.
+
+        Args:
+            create: Открывает поток ответа у переданного провайдера
+            started: Время начала запроса (perf_counter) для замеров TTFT
+
+        Returns:
+            Запущенный StreamReader победителя (первый токен уже получен,
+            либо все попытки завершились, и ошибку нужно пробросить) и его провайдер.
+        """
+        notify = threading.Event()
+
+        def start(provider: Provider, acquired: bool = False) -> _Candidate:
+            timings = StreamTimings()
+            if started is not None:
+                timings.started = started
+            candidate = _Candidate(provider, create, timings, notify, acquired)
+            candidate.reader.start()
+            return candidate
+
+        candidates = [start(self.primary)]
+        hedge_at: Optional[float] = time.monotonic() + self.delay
+        try:
+            while True:
+                notify.clear()
+                answered = [c for c in candidates if c.reader.timings.first_token is not None]
+                if answered:
+                    winner = min(answered, key=lambda c: c.reader.timings.first_token)
+                    break
+                failed = all(c.reader.done.is_set() for c in candidates)
+                if hedge_at is not None and (failed or time.monotonic() >= hedge_at):
+                    hedge_at = None
+                    if self.secondary.semaphore.acquire(blocking=False):
+                        logger.info(f"No first token from '{self.primary.name}', hedging to '{self.secondary.name}'")
+                        candidates.append(start(self.secondary, acquired=True))
+                        continue
+                    logger.info(f"Hedge skipped: '{self.secondary.name}' is at its concurrency limit")
+                elif failed:
+                    winner = candidates[0]  # Ошибку основной LLM пробросит вызывающий
+                    break
+                # Ожидание с таймаутом, чтобы Ctrl+C доходил до основного потока
+                timeout = 0.1 if hedge_at is None else min(0.1, max(0.0, hedge_at - time.monotonic()))
+                notify.wait(timeout)
+        except BaseException:
+            for candidate in candidates:
+                candidate.cancel()
+            raise
+
+        for candidate in candidates:
+            if candidate is not winner:
+                candidate.cancel()
+
+        ttft = winner.reader.timings.ttft
+        if config.get("global", "telemetry", True):
+            metrics.record(
+                "hedge",
+                primary=self.primary.name,
+                secondary=self.secondary.name,
+                hedged=len(candidates) > 1,
+                winner=winner.provider.name if ttft is not None else None,
+                ttft=round(ttft, 3) if ttft is not None else None,
+            )
+        if len(candidates) > 1:
+            logger.info(f"Hedged request won by '{winner.provider.name}'")
+        return winner.reader, winner.provider
@@ -1,30 +1,26 @@
+import asyncio
+import json
 import threading
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional
 import time
-from penguin_tamer.formatter_text import format_api_key_display
+from penguin_tamer.formatter_text import CodeBlockDetector, format_api_key_display
 from penguin_tamer.i18n import t
 from penguin_tamer.logger import log_execution_time
 from penguin_tamer.config_manager import config
+from penguin_tamer.markdown_stream import MarkdownStreamRenderer
+from penguin_tamer.context_window import ContextWindow
+from penguin_tamer.error_messages import error_class, is_transient_error
+from penguin_tamer.hedging import Hedge, Provider
+from penguin_tamer.metrics import metrics
+from penguin_tamer.prompt_cache import usage_tokens, with_cache_control
+from penguin_tamer.provider_router import ProviderRouter
+from penguin_tamer.retry import RetryPolicy
+from penguin_tamer.token_counter import count_text
+from penguin_tamer.stream_pipeline import StreamReader, AsyncStreamReader, StreamTimings
 
 # Ленивый импорт Rich
-_console = None
-_markdown = None
 _live = None
 
-def _get_console():
-    global _console
-    if _console is None:
-        from rich.console import Console
-        _console = Console()
-    return _console
-
-def _get_markdown():
-    global _markdown
-    if _markdown is None:
-        from rich.markdown import Markdown
-        _markdown = Markdown
-    return _markdown
-
 def _get_live():
     global _live
     if _live is None:
@@ -32,8 +28,18 @@ def _get_live():
         _live = Live
     return _live
 
+_spinner_cls = None
+
+def _get_spinner():
+    global _spinner_cls
+    if _spinner_cls is None:
+        from rich.spinner import Spinner
+        _spinner_cls = Spinner
+    return _spinner_cls
+
 # Ленивый импорт OpenAI (самый тяжелый модуль)
 _openai_client = None
+_async_openai_client = None
 
 
 def _get_openai_client():
@@ -45,14 +51,34 @@ def _get_openai_client():
     return _openai_client
 
 
+def _get_async_openai_client():
+    """Ленивый импорт асинхронного OpenAI клиента"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        from openai import AsyncOpenAI
+        _async_openai_client = AsyncOpenAI
+    return _async_openai_client
+
+
+# Пометка в истории для ответа, прерванного пользователем (ее видит и LLM)
+CANCELLED_MARKER = "[Answer interrupted by the user]"
+
+
+class RequestCancelled(KeyboardInterrupt):
+    """Ctrl+C во время запроса: поток закрыт, частичный ответ сохранен в истории.
+
+    Наследует KeyboardInterrupt, поэтому вне диалога Ctrl+C по-прежнему
+    завершает программу; диалог перехватывает его и возвращается к вводу.
+    """
+
+
 class OpenRouterClient:
 
     def _spinner(self, stop_spinner: threading.Event) -> None:
         """Визуальный индикатор работы ИИ с точечным спиннером.
         Пока stop_event не установлен, показывает "Аи печатает...".
         """
-        console = _get_console()
-        with console.status("[dim]" + t('Ai thinking...') + "[/dim]", spinner="dots", spinner_style="dim"):
+        with self.console.status("[dim]" + t('Ai thinking...') + "[/dim]", spinner="dots", spinner_style="dim"):
             while not stop_spinner.is_set():
                 time.sleep(0.1)
         # console.print("[green]Ai: [/green]")
@@ -60,7 +86,15 @@ class OpenRouterClient:
     @log_execution_time
     def __init__(self, console, logger, api_key: str, api_url: str, model: str,
                  system_content: str,
-                 temperature: float = 0.7):
+                 temperature: float = 0.7,
+                 context_window: Optional[ContextWindow] = None,
+                 keepalive_expiry: Optional[float] = None,
+                 hedge: Optional[Hedge] = None,
+                 router: Optional[ProviderRouter] = None,
+                 llm_name: str = "",
+                 retry: Optional[RetryPolicy] = None,
+                 prompt_cache: bool = False,
+                 stream_usage: bool = False):
         self.console = console
         self.logger = logger
         self.api_key = api_key
@@ -70,15 +104,268 @@ class OpenRouterClient:
         self.messages: List[Dict[str, str]] = [
             {"role": "system", "content": system_content}
         ]
+        self.context_window = context_window or ContextWindow()
         self._client = None  # Ленивая инициализация
+        self._client_lock = threading.Lock()  # Клиент может создать фоновый прогрев
+        # Сколько секунд пул держит простаивающее соединение (None - по умолчанию httpx)
+        self.keepalive_expiry = keepalive_expiry
+        self._http_client = None  # httpx-клиент пула с keep-alive (через него идет прогрев)
+        self.hedge = hedge  # Запасная LLM для потокового режима (см. hedging.py)
+        self.router = router  # Переключение на исправную LLM при сбоях (см. provider_router.py)
+        self._providers: Dict[str, Provider] = {}
+        self.llm_name = llm_name or model  # Имя LLM из supported_LLMs (для метрик)
+        self._served_by: Optional[Provider] = None  # LLM, ответившая на последний запрос
+        self._request_bytes = 0
+        self.retry = retry  # Повтор при 429/5xx/ошибках соединения (см. retry.py)
+        self._retries = 0  # Повторов в последнем запросе
+        self._retry_wait = 0.0  # Сколько секунд они добавили
+        self.prompt_cache = prompt_cache  # Метки cache_control для провайдера (см. prompt_cache.py)
+        self.stream_usage = stream_usage  # Просить usage в потоке (stream_options.include_usage)
+        # Вызывается из ask_stream с (номер, код), как только закрылся очередной блок кода
+        self.on_code_block: Optional[Callable[[int, str], None]] = None
+        self.last_timings: Optional[StreamTimings] = None  # Замеры последнего запроса
 
     @property
     def client(self):
         """Ленивая инициализация OpenAI клиента"""
         if self._client is None:
-            self._client = _get_openai_client()(api_key=self.api_key, base_url=self.api_url)
+            with self._client_lock:
+                if self._client is None:
+                    self._client = _get_openai_client()(
+                        api_key=self.api_key, base_url=self.api_url,
+                        **self._openai_client_kwargs("DefaultHttpxClient"))
         return self._client
 
+    def _openai_client_kwargs(self, factory: str = "") -> dict:
+        """Параметры OpenAI-клиента: свои повторы вместо встроенных, пул с увеличенным keep-alive."""
+        kwargs = {}
+        if self.retry is not None:
+            kwargs["max_retries"] = 0
+        if not self.keepalive_expiry or not factory:
+            return kwargs
+        import httpx
+        import openai
+        limits = httpx.Limits(max_connections=1000, max_keepalive_connections=100,
+                              keepalive_expiry=self.keepalive_expiry)
+        kwargs["http_client"] = self._http_client = getattr(openai, factory)(limits=limits)
+        return kwargs
+
+    def _provider_client(self, provider: Provider):
+        """OpenAI-клиент другой LLM (для того же API — общий self.client)."""
+        if (provider.api_url, provider.api_key) == (self.api_url, self.api_key):
+            return self.client
+        if provider.client is None:
+            provider.client = _get_openai_client()(api_key=provider.api_key, base_url=provider.api_url,
+                                                   **self._openai_client_kwargs())
+        return provider.client
+
+    def _on_retry(self, retries: int, error: BaseException, delay: float) -> None:
+        """Учитывает повтор в логе, метриках и замерах запроса."""
+        self._retries = retries
+        self._retry_wait += delay
+        provider = self._served_by
+        self.logger.warning(f"Retry {retries} in {delay:.2f}s after {type(error).__name__}: {error}")
+        self.console.print(t("[dim]Temporary error, retrying in {delay:.1f} s...[/dim]").format(delay=delay))
+        if config.get("global", "telemetry", True):
+            metrics.record("retry", provider=provider.name if provider else self.llm_name,
+                           model=provider.model if provider else self.model,
+                           error=type(error).__name__, kind=error_class(error),
+                           attempt=retries, delay=round(delay, 3))
+
+    def _with_retry(self, request: Callable[[], Any]) -> Any:
+        """Выполняет request по правилам повтора (без них — один раз)."""
+        if self.retry is None:
+            return request()
+        return self.retry.call(request, self._on_retry)
+
+    def _failover(self, request: Callable[[Provider], Any]) -> Any:
+        """Выполняет request у текущей LLM, при сбое — у следующей исправной.
+
+        На другую LLM переключают 429, 5xx и ошибки соединения; ошибки
+        настройки текущей LLM (401, 404, ...) пробрасываются сразу.
+        """
+        names = self.router.candidates()
+        for index, name in enumerate(names):
+            if name not in self._providers:
+                self._providers[name] = Provider.from_config(name)
+            provider = self._providers[name]
+            start = time.perf_counter()
+            try:
+                result = request(provider)
+            except Exception as e:
+                self.router.record_failure(name)
+                last = index == len(names) - 1
+                if last or (index == 0 and name == self.router.current and not is_transient_error(e)):
+                    raise
+                self.logger.warning(f"LLM '{name}' failed: {e}")
+                self.console.print(t("[dim]{name} is unavailable, switching to {next}...[/dim]").format(
+                    name=name, next=names[index + 1]))
+                continue
+            self.router.record_success(name, time.perf_counter() - start)
+            self._served_by = provider
+            if name != self.router.current:
+                self.logger.info(f"Request served by fallback LLM '{name}'")
+            return result
+
+    def _open_stream(self, timings: StreamTimings) -> StreamReader:
+        """Открывает поток ответа и ждет первый токен.
+
+        Повторяется только попытка, которая не дала ни одного токена:
+        показанный пользователю текст не переигрывается.
+        """
+        messages = self._request_messages()
+        return self._with_retry(lambda: self._open_stream_once(messages, timings))
+
+    def _open_stream_once(self, messages: List[Dict[str, str]], timings: StreamTimings) -> StreamReader:
+        """Одна попытка открыть поток; при хеджировании — у первой ответившей LLM."""
+        if self.router is not None and self.hedge is None:
+            def request(provider: Provider) -> StreamReader:
+                stream = self._provider_client(provider).chat.completions.create(
+                    model=provider.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    **self._stream_kwargs()
+                )
+                attempt = StreamTimings()
+                attempt.started = timings.started
+                reader = StreamReader(stream, attempt)
+                reader.start()
+                self._wait_first_token(reader)  # Сбой до первого токена — можно переключиться
+                return reader
+
+            reader = self._failover(request)
+            self.last_timings = reader.timings
+            return reader
+
+        if self.hedge is None:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                **self._stream_kwargs()
+            )
+            reader = StreamReader(stream, timings)
+            reader.start()
+            self._wait_first_token(reader)
+            return reader
+
+        reader, self._served_by = self.hedge.open(
+            lambda provider: self._provider_client(provider).chat.completions.create(
+                model=provider.model,
+                messages=messages,
+                temperature=self.temperature,
+                **self._stream_kwargs()
+            ),
+            started=timings.started,
+        )
+        self.last_timings = reader.timings
+        if reader.timings.first_token is None:
+            reader.raise_error()
+        return reader
+
+    @staticmethod
+    def _wait_first_token(reader: StreamReader) -> None:
+        """Ждет первый токен; ошибку до него пробрасывает, по Ctrl+C закрывает поток."""
+        try:
+            reader.wait_first_token()
+        except BaseException:
+            reader.close()
+            raise
+        if reader.timings.first_token is None:
+            reader.raise_error()
+
+    def _keep_cancelled(self, partial: str) -> None:
+        """Сохраняет в истории прерванный ответ с пометкой (роли user/assistant чередуются)."""
+        content = f"{partial}\n\n{CANCELLED_MARKER}" if partial else CANCELLED_MARKER
+        self.messages.append({"role": "assistant", "content": content})
+        self.logger.info(f"Request cancelled by user, kept {len(partial)} chars of the reply")
+
+    def _detect_code_blocks(self, detector: CodeBlockDetector, text: str) -> None:
+        """Сообщает on_code_block о блоках кода, закрытых очередным фрагментом ответа."""
+        if self.on_code_block is None:
+            return
+        first = len(detector.blocks) + 1
+        for index, code in enumerate(detector.feed(text), start=first):
+            self.on_code_block(index, code)
+
+    def _stream_kwargs(self) -> Dict[str, Any]:
+        """Параметры потокового запроса; usage в последнем чанке нужен для учета кэша промпта."""
+        kwargs: Dict[str, Any] = {"stream": True}
+        if self.stream_usage:
+            kwargs["stream_options"] = {"include_usage": True}
+        return kwargs
+
+    def _record_request(self, mode: str, timings: StreamTimings, reply: str = "",
+                        error: Optional[BaseException] = None, usage: Any = None) -> None:
+        """Пишет метрики запроса в журнал (событие "request")."""
+        prompt_tokens, cached_tokens = usage_tokens(usage)
+        if cached_tokens is not None:
+            self.logger.info(f"Prompt cache: {cached_tokens} of {prompt_tokens} prompt tokens cached")
+        if not config.get("global", "telemetry", True):
+            return
+        if timings.finished is None:
+            timings.mark_finished()
+        response_tokens = count_text(reply) if reply else 0
+        # Скорость генерации: в потоке — от первого токена, без потока — за весь запрос
+        generation = timings.total
+        if mode == "stream" and timings.first_token is not None and timings.finished > timings.first_token:
+            generation = timings.finished - timings.first_token
+        provider = self._served_by
+        metrics.record(
+            "request",
+            provider=provider.name if provider else self.llm_name,
+            model=provider.model if provider else self.model,
+            mode=mode,
+            ok=error is None,
+            error=type(error).__name__ if error is not None else None,
+            ttft=round(timings.ttft, 3) if timings.ttft is not None else None,
+            total=round(timings.total, 3),
+            render=round(timings.render, 3),
+            tps=round(response_tokens / generation, 1) if response_tokens and generation else None,
+            req_tokens=self.context_window.last_tokens,
+            resp_tokens=response_tokens,
+            req_bytes=self._request_bytes,
+            resp_bytes=len(reply.encode("utf-8")),
+            retries=self._retries,
+            retry_wait=round(self._retry_wait, 3),
+            prompt_tokens=prompt_tokens,
+            cached_tokens=cached_tokens,
+        )
+
+    def prewarm(self, timeout: float = 5.0) -> None:
+        """Прогрев: импорт openai, создание клиента и keep-alive соединение с api_url.
+
+        DNS, TCP и TLS устанавливаются HEAD-запросом через пул httpx клиента;
+        любой HTTP-ответ (даже 404) оставляет в пуле готовое соединение.
+        Без keep-alive (keepalive_expiry) свой пул не создается, и соединение
+        не открывается.
+        """
+        client = self.client
+        client.chat.completions  # Ресурсы openai импортируются при первом обращении
+        if self._http_client is not None:
+            self._http_client.head(str(client.base_url), timeout=timeout)
+
+    @property
+    def token_counter(self):
+        """Счетчик токенов истории (кэш на каждое сообщение)."""
+        return self.context_window.counter
+
+    def _request_messages(self) -> List[Dict[str, str]]:
+        """Сообщения для очередного запроса в пределах бюджета контекста."""
+        messages = self.context_window.build(self.messages)
+        if self.prompt_cache:
+            messages = with_cache_control(messages)
+        self._served_by = None
+        self._retries = 0
+        self._retry_wait = 0.0
+        self._request_bytes = len(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+        self.logger.info(
+            f"Request context: {len(messages)} messages, ~{self.context_window.last_tokens} tokens"
+            f" (history ~{self.token_counter.sync(self.messages)} tokens,"
+            f" dropped messages: {self.context_window.last_dropped})"
+        )
+        return messages
+
     @log_execution_time
     def ask(self, user_input: str, educational_content: list = None) -> str:
         """Обычный (не потоковый) режим с сохранением контекста"""
@@ -86,6 +373,8 @@ class OpenRouterClient:
             educational_content = []
         self.messages.extend(educational_content)
         self.messages.append({"role": "user", "content": user_input})
+        timings = StreamTimings()
+        self.last_timings = timings
 
         # Показ спиннера в отдельном потоке
         stop_spinner = threading.Event()
@@ -93,13 +382,27 @@ class OpenRouterClient:
         spinner_thread.start()
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.messages,
-                temperature=self.temperature
-            )
+            messages = self._request_messages()
+            if self.router is not None:
+                response = self._with_retry(lambda: self._failover(
+                    lambda provider: self._provider_client(provider).chat.completions.create(
+                        model=provider.model,
+                        messages=messages,
+                        temperature=self.temperature
+                    )))
+            else:
+                response = self._with_retry(lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature
+                ))
 
             reply = response.choices[0].message.content
+            # В обычном режиме первый токен приходит вместе со всем ответом
+            timings.mark_first_token()
+            timings.mark_finished()
+            self.logger.info(f"Request finished: {timings}")
+            self._record_request("plain", timings, reply, usage=getattr(response, "usage", None))
 
             # Останавливаем спиннер
             stop_spinner.set()
@@ -110,78 +413,90 @@ class OpenRouterClient:
 
             return reply
 
-        except Exception as e:
+        except BaseException as e:
             # Останавливаем спиннер
             stop_spinner.set()
             spinner_thread.join()
+            self._record_request("plain", timings, error=e)
+            if isinstance(e, KeyboardInterrupt):
+                self._keep_cancelled("")
+                raise RequestCancelled() from None
             raise
 
 
     @log_execution_time
     def ask_stream(self, user_input: str, educational_content: list = None) -> str:
-        """Потоковый режим с сохранением контекста и обработкой Markdown в реальном времени"""
+        """Потоковый режим с сохранением контекста и обработкой Markdown в реальном времени.
+
+        Чтение потока идет в отдельном потоке (StreamReader) на полной скорости,
+        отрисовка выполняется не чаще refresh_per_second раз в секунду.
+        """
         if educational_content is None:
             educational_content = []
         self.messages.extend(educational_content)
         self.messages.append({"role": "user", "content": user_input})
         reply_parts = []
+        timings = StreamTimings()
+        self.last_timings = timings
         # Показ спиннера в отдельном потоке
         stop_spinner = threading.Event()
         spinner_thread = threading.Thread(target=self._spinner, args=(stop_spinner,))
         spinner_thread.start()
-        
+
+        reader = None
         try:
-            stream = self.client.chat.completions.create(
-                model=self.model,
-                messages=self.messages,
-                temperature=self.temperature,
-                stream=True
-            )
+            reader = self._open_stream(timings)
+            timings = reader.timings
 
             # Ждем первый чанк с контентом перед запуском Live
-            first_content_chunk = None
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    first_content_chunk = chunk.choices[0].delta.content
-                    reply_parts.append(first_content_chunk)
-                    break
-            
+            reader.wait_first_token()
+
             # Останавливаем спиннер после получения первого чанка
             stop_spinner.set()
             if spinner_thread.is_alive():
                 spinner_thread.join()
 
-            sleep_time = config.get("global", "sleep_time", 0.01)
             refresh_per_second = config.get("global", "refresh_per_second", 10)
-            # Используем Live для динамического обновления отображения с Markdown
-            with _get_live()(console=self.console, refresh_per_second=refresh_per_second, auto_refresh=True) as live:
-                # Показываем первый чанк
-                if first_content_chunk:
-                    markdown = _get_markdown()(first_content_chunk)
-                    live.update(markdown)
-                
-                # Продолжаем обрабатывать остальные чанки
-                for chunk in stream:
-                    if chunk.choices[0].delta.content:
-                        text = chunk.choices[0].delta.content
+            frame = 1.0 / max(1, refresh_per_second)
+            # Используем Live для динамического обновления отображения с Markdown.
+            # Завершенные блоки печатаются над Live-областью один раз,
+            # повторно разбирается только открытый хвост ответа
+            detector = CodeBlockDetector()
+            with _get_live()(console=self.console, auto_refresh=False) as live:
+                renderer = MarkdownStreamRenderer(live)
+                while True:
+                    frame_start = time.perf_counter()
+                    text = reader.drain()
+                    if text:
                         reply_parts.append(text)
-                        # Объединяем все части и обрабатываем как Markdown
-                        full_text = "".join(reply_parts)
-                        markdown = _get_markdown()(full_text)
-                        live.update(markdown)
-                        time.sleep(sleep_time)  # Небольшая задержка для плавности обновления
+                        renderer.feed(text)
+                        live.refresh()
+                        timings.render += time.perf_counter() - frame_start
+                        self._detect_code_blocks(detector, text)
+                    if reader.done.is_set() and not text:
+                        break
+                    # Следующий кадр не раньше чем через frame; конец потока будит сразу
+                    reader.done.wait(max(0.0, frame - (time.perf_counter() - frame_start)))
+            reader.raise_error()
             reply = "".join(reply_parts)
+            self.logger.info(f"Stream finished: {timings}")
+            self._record_request("stream", timings, reply, usage=reader.usage)
             self.messages.append({"role": "assistant", "content": reply})
             return reply
 
-        except Exception as e:
+        except BaseException as e:
             # Останавливаем спиннер в случае ошибки
             stop_spinner.set()
             if spinner_thread.is_alive():
                 spinner_thread.join()
+            partial = "".join(reply_parts)  # Только то, что уже показано пользователю
+            if reader is not None:
+                reader.close()  # Сразу освобождаем соединение: фоновый поток не дочитывает ответ
+            self._record_request("stream", timings, partial, error=e)
+            if isinstance(e, KeyboardInterrupt):
+                self._keep_cancelled(partial)
+                raise RequestCancelled() from None
             raise
-  
-
 
     def __str__(self) -> str:
         """Человекочитаемое представление клиента со всеми полями.
@@ -194,7 +509,9 @@ class OpenRouterClient:
         for k, v in self.__dict__.items():
             if k == 'api_key':
                 items[k] = format_api_key_display(v)
-            elif k == 'messages' or k == 'console' or k == '_client' or k == 'logger':
+            elif k in ('messages', 'console', '_client', '_http_client', '_client_lock', 'logger', 'last_timings',
+                       'context_window', 'hedge', 'router', '_providers', '_served_by',
+                       'on_code_block', 'retry'):
                 continue
             else:
                 try:
@@ -207,3 +524,166 @@ class OpenRouterClient:
             parts.append(f"  {key}={val!r},")
         parts.append(")")
         return "\n".join(parts)
+
+
+class AsyncOpenRouterClient(OpenRouterClient):
+    """Асинхронный вариант клиента на openai.AsyncOpenAI.
+
+    Спиннер, чтение потока, отрисовка, таймауты и отмена выполняются
+    корутинами в одном event loop, без вспомогательных потоков.
+    Отмена задачи (Ctrl+C в asyncio.Runner) закрывает HTTP-поток.
+    """
+
+    def __init__(self, *args, request_timeout: Optional[float] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request_timeout = request_timeout  # Таймаут ожидания первого токена (секунды)
+
+    @property
+    def client(self):
+        """Ленивая инициализация AsyncOpenAI клиента"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = _get_async_openai_client()(
+                        api_key=self.api_key, base_url=self.api_url,
+                        **self._openai_client_kwargs("DefaultAsyncHttpxClient"))
+        return self._client
+
+    def prewarm(self, timeout: float = 5.0) -> None:
+        """Прогрев без сети: импорт openai и создание клиента.
+
+        Соединения AsyncOpenAI привязаны к циклу событий, который не работает,
+        пока открыт prompt_toolkit, поэтому соединение здесь не открывается.
+        """
+        self.client.chat.completions
+
+    async def _spinner(self) -> None:
+        """Спиннер "Ai thinking..." до отмены задачи."""
+        spinner = _get_spinner()("dots", text="[dim]" + t('Ai thinking...') + "[/dim]", style="dim")
+        with _get_live()(spinner, console=self.console, auto_refresh=False, transient=True) as live:
+            while True:
+                live.refresh()
+                await asyncio.sleep(0.1)
+
+    async def _awith_retry(self, request: Callable[[], Any]) -> Any:
+        """Асинхронный вариант _with_retry."""
+        if self.retry is None:
+            return await request()
+        return await self.retry.acall(request, self._on_retry)
+
+    async def _open_stream_once(self, messages: List[Dict[str, str]], timings: StreamTimings) -> AsyncStreamReader:
+        """Одна попытка открыть поток; ошибка до первого токена пробрасывается (ее можно повторить)."""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature,
+            **self._stream_kwargs()
+        )
+        reader = AsyncStreamReader(stream, timings)
+        reader.start()
+        try:
+            await reader.wait_first_token()
+            if timings.first_token is None:
+                await reader.join()
+        except BaseException:
+            # Ошибка, таймаут или отмена до первого токена: освобождаем соединение
+            await reader.aclose()
+            raise
+        return reader
+
+    @staticmethod
+    async def _stop(task: asyncio.Task) -> None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    async def ask(self, user_input: str, educational_content: list = None) -> str:
+        """Обычный (не потоковый) режим с сохранением контекста"""
+        if educational_content is None:
+            educational_content = []
+        self.messages.extend(educational_content)
+        self.messages.append({"role": "user", "content": user_input})
+        timings = StreamTimings()
+        self.last_timings = timings
+
+        spinner = asyncio.create_task(self._spinner())
+        try:
+            messages = self._request_messages()
+            async with asyncio.timeout(self.request_timeout):
+                response = await self._awith_retry(lambda: self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature
+                ))
+        except BaseException as e:
+            self._record_request("plain", timings, error=e)
+            if isinstance(e, asyncio.CancelledError):
+                # Ctrl+C в asyncio.Runner отменяет задачу (см. _run_request в __main__)
+                self._keep_cancelled("")
+            raise
+        finally:
+            await self._stop(spinner)
+
+        reply = response.choices[0].message.content
+        timings.mark_first_token()
+        timings.mark_finished()
+        self.logger.info(f"Request finished: {timings}")
+        self._record_request("plain", timings, reply, usage=getattr(response, "usage", None))
+        self.messages.append({"role": "assistant", "content": reply})
+        return reply
+
+    async def ask_stream(self, user_input: str, educational_content: list = None) -> str:
+        """Потоковый режим: чтение потока и отрисовка — задачи одного event loop."""
+        if educational_content is None:
+            educational_content = []
+        self.messages.extend(educational_content)
+        self.messages.append({"role": "user", "content": user_input})
+        reply_parts = []
+        timings = StreamTimings()
+        self.last_timings = timings
+
+        spinner = asyncio.create_task(self._spinner())
+        reader = None
+        try:
+            messages = self._request_messages()
+            async with asyncio.timeout(self.request_timeout):
+                reader = await self._awith_retry(lambda: self._open_stream_once(messages, timings))
+            await self._stop(spinner)
+
+            refresh_per_second = config.get("global", "refresh_per_second", 10)
+            frame = 1.0 / max(1, refresh_per_second)
+            detector = CodeBlockDetector()
+            with _get_live()(console=self.console, auto_refresh=False) as live:
+                renderer = MarkdownStreamRenderer(live)
+                while True:
+                    text = reader.drain()
+                    if text:
+                        render_start = time.perf_counter()
+                        reply_parts.append(text)
+                        renderer.feed(text)
+                        live.refresh()
+                        timings.render += time.perf_counter() - render_start
+                        self._detect_code_blocks(detector, text)
+                    if reader.done.is_set() and not text:
+                        break
+                    try:
+                        await asyncio.wait_for(reader.done.wait(), frame)
+                    except TimeoutError:
+                        pass
+            await reader.join()
+        except BaseException as e:
+            # Ошибка, таймаут или отмена: закрываем поток, чтобы освободить соединение
+            if reader is not None:
+                await reader.aclose()
+            partial = "".join(reply_parts)
+            self._record_request("stream", timings, partial, error=e)
+            if isinstance(e, asyncio.CancelledError):
+                self._keep_cancelled(partial)
+            raise
+        finally:
+            await self._stop(spinner)
+
+        reply = "".join(reply_parts)
+        self.logger.info(f"Stream finished: {timings}")
+        self._record_request("stream", timings, reply, usage=reader.usage)
+        self.messages.append({"role": "assistant", "content": reply})
+        return reply
@@ -7,8 +7,9 @@ import platform
 from logging.handlers import RotatingFileHandler
 from platformdirs import user_config_dir
 
+from penguin_tamer import APP_NAME
+
 # Константы
-APP_NAME = "ai-ebash"
 log_dir = Path(user_config_dir(APP_NAME)) / "logs"
 log_dir.mkdir(parents=True, exist_ok=True)
 
@@ -0,0 +1,159 @@
+"""
+Инкрементальный рендеринг Markdown для потокового режима.
+
+Вместо повторного разбора всего ответа на каждом чанке текст делится на
+блоки. Завершенные блоки (закрытые абзацы, закрытые блоки кода, таблицы,
+после которых уже идет следующий блок) "замораживаются": печатаются один раз
+над Live-областью и больше не разбираются. Заново разбирается только
+открытый хвост, поэтому стоимость одного чанка пропорциональна размеру
+последнего блока, а не всего ответа.
+"""
+
+import re
+from typing import List, Optional
+
+# Открывающая/закрывающая строка блока кода: ``` или ~~~ (до 3 пробелов отступа)
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+
+# Элемент списка: -, +, * или номер с . или ) (до 3 пробелов отступа)
+_LIST_ITEM_RE = re.compile(r"^ {0,3}(?:[-+*]|\d{1,9}[.)])(?:[ \t]|$)")
+
+# Ленивый импорт Rich
+_markdown = None
+_padding = None
+
+
+def _get_markdown():
+    global _markdown
+    if _markdown is None:
+        from rich.markdown import Markdown
+        _markdown = Markdown
+    return _markdown
+
+
+def _get_padding():
+    global _padding
+    if _padding is None:
+        from rich.padding import Padding
+        _padding = Padding
+    return _padding
+
+
+class IncrementalMarkdown:
+    """Делит поток Markdown-текста на завершенные блоки и открытый хвост.
+
+    Границей блока считается:
+    - закрывающая строка блока кода (```/~~~), если он не внутри списка;
+    - пустая строка вне блока кода, если за ней началась строка без отступа
+      (строка с отступом считается продолжением предыдущего блока,
+      например вложенным абзацем элемента списка), а если блок — список,
+      то и не следующий элемент списка: «свободный» список (с пустыми
+      строками между элементами) остается одним блоком, и нумерация
+      не начинается заново.
+
+    Пустые строки между блоками в сами блоки не входят.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""          # Незамороженный текст (начинается с открытого блока)
+        self._pos = 0              # Смещение первой непросмотренной строки в _buffer
+        self._fence: Optional[str] = None  # Маркер открытого блока кода
+        self._boundary: Optional[int] = None  # Начало серии пустых строк после контента
+        self._has_content = False  # Есть ли в текущем блоке непустые строки
+        self._in_list = False  # Есть ли в текущем блоке список
+
+    def feed(self, text: str) -> List[str]:
+        """Добавляет чанк и возвращает список только что завершенных блоков."""
+        self._buffer += text
+        finished: List[str] = []
+
+        while True:
+            end = self._buffer.find("\n", self._pos)
+            if end == -1:
+                break
+            line = self._buffer[self._pos:end]
+            line_start, self._pos = self._pos, end + 1
+
+            if self._fence is not None:
+                stripped = line.strip()
+                if stripped.startswith(self._fence) and not stripped.lstrip(self._fence[0]):
+                    # Блок кода закрыт — блок завершен вместе с этой строкой
+                    # (блок кода внутри элемента списка список не завершает)
+                    self._fence = None
+                    if not self._in_list:
+                        finished.append(self._cut(self._pos))
+                continue
+
+            if not line.strip():
+                if self._has_content and self._boundary is None:
+                    self._boundary = line_start
+                continue
+
+            list_item = _LIST_ITEM_RE.match(line) is not None
+            if self._boundary is not None:
+                if line[0] in " \t" or (self._in_list and list_item):
+                    # Продолжение предыдущего блока (вложенный абзац, следующий элемент списка)
+                    self._boundary = None
+                else:
+                    block = self._buffer[:self._boundary]
+                    self._cut(line_start)
+                    finished.append(block.rstrip("\n"))
+
+            fence = _FENCE_RE.match(line)
+            if fence:
+                self._fence = fence.group(1)
+            self._has_content = True
+            self._in_list = self._in_list or list_item
+
+        return [block for block in finished if block.strip()]
+
+    @property
+    def tail(self) -> str:
+        """Текущий открытый (незавершенный) блок."""
+        if self._boundary is not None and self._pos == len(self._buffer):
+            return self._buffer[:self._boundary]
+        return self._buffer
+
+    def _cut(self, offset: int) -> str:
+        """Отрезает начало буфера до offset и сбрасывает состояние блока."""
+        block = self._buffer[:offset]
+        self._buffer = self._buffer[offset:]
+        self._pos -= offset
+        self._boundary = None
+        self._has_content = False
+        self._in_list = False
+        return block.rstrip("\n")
+
+
+class MarkdownStreamRenderer:
+    """Связывает IncrementalMarkdown с rich.live.Live.
+
+    Завершенные блоки печатаются через live.console.print (над Live-областью),
+    в самой Live-области отображается только открытый хвост.
+    """
+
+    def __init__(self, live) -> None:
+        self.live = live
+        self.blocks = IncrementalMarkdown()
+        self._printed = 0  # Сколько блоков уже напечатано над Live-областью
+
+    def _renderable(self, text: str):
+        markdown = _get_markdown()(text)
+        if self._printed:
+            # Отступ между блоками, как между элементами одного документа
+            return _get_padding()(markdown, (1, 0, 0, 0))
+        return markdown
+
+    def feed(self, text: str) -> None:
+        """Обрабатывает чанк: печатает завершенные блоки, обновляет хвост."""
+        for block in self.blocks.feed(text):
+            self.live.console.print(self._renderable(block))
+            self._printed += 1
+        self.refresh_tail()
+
+    def refresh_tail(self) -> None:
+        tail = self.blocks.tail
+        if tail.strip():
+            self.live.update(self._renderable(tail))
+        else:
+            self.live.update("")
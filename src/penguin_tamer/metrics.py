@@ -0,0 +1,127 @@
+"""
+Журнал метрик запросов к LLM.
+
+Каждое событие — одна JSON-строка в metrics.jsonl рядом с настройками
+пользователя. При превышении лимита размера файл переименовывается
+в metrics.jsonl.1 (хранится одна предыдущая копия).
+
+События "request" (время до первого токена, скорость, размеры запроса
+и ответа, LLM и модель) сводятся в процентили для `pt --stats`.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from penguin_tamer.config_manager import config
+from penguin_tamer.logger import logger
+
+
+class MetricsLog:
+    """Потокобезопасная запись событий в JSONL-файл.
+
+    Args:
+        path: Путь к файлу журнала
+        max_bytes: Размер файла, после которого он ротируется
+    """
+
+    def __init__(self, path: Path, max_bytes: int = 5 * 1024 * 1024) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def record(self, event: str, **fields: Any) -> None:
+        """Добавляет событие; ошибки записи только логируются."""
+        line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False)
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError as e:
+                logger.debug(f"Failed to write metrics: {e}")
+
+    def read(self, event: Optional[str] = None, since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Возвращает события (опционально только заданного типа и не старше since).
+
+        Читается и предыдущая копия журнала, чтобы окно не обрывалось на ротации.
+        """
+        records = []
+        for path in (self.path.with_name(self.path.name + ".1"), self.path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue  # Строка, оборванная при аварийном завершении
+                        if event is not None and record.get("event") != event:
+                            continue
+                        if since is not None and record.get("ts", 0) < since:
+                            continue
+                        records.append(record)
+            except OSError:
+                pass
+        return records
+
+
+_WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_window(window: str) -> float:
+    """Длительность окна в секундах из строки вида 30m, 24h, 7d, 2w.
+
+    Raises:
+        ValueError: Если строка не распознана
+    """
+    window = window.strip().lower()
+    if window and window[-1] in _WINDOW_UNITS:
+        return float(window[:-1]) * _WINDOW_UNITS[window[-1]]
+    return float(window)
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Процентиль q (0-100) с линейной интерполяцией; None для пустого списка."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(records: List[Dict[str, Any]], key: str) -> Dict[str, Dict[str, Any]]:
+    """Сводка событий "request" по значению поля key (provider или model).
+
+    Для каждой группы: число запросов, ошибок, повторов, процентили p50/p90/p99
+    времени до первого токена, полного времени и токенов в секунду, а также
+    доля токенов промпта из кэша провайдера (cache_hit, % — None, если
+    провайдер не сообщал cached_tokens).
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault(str(record.get(key) or "?"), []).append(record)
+
+    summary = {}
+    for name, items in sorted(groups.items()):
+        ok = [r for r in items if r.get("ok")]
+        row: Dict[str, Any] = {"requests": len(items), "errors": len(items) - len(ok),
+                               "retries": sum(r.get("retries") or 0 for r in items)}
+        for field in ("ttft", "total", "tps"):
+            values = [r[field] for r in ok if r.get(field) is not None]
+            for q in (50, 90, 99):
+                row[f"{field}_p{q}"] = percentile(values, q)
+        cached = [r for r in items if r.get("cached_tokens") is not None and r.get("prompt_tokens")]
+        prompt_tokens = sum(r["prompt_tokens"] for r in cached)
+        row["cache_hit"] = 100 * sum(r["cached_tokens"] for r in cached) / prompt_tokens if cached else None
+        summary[name] = row
+    return summary
+
+
+metrics = MetricsLog(config.user_config_dir / "metrics.jsonl")
@@ -0,0 +1,278 @@
+"""
+Запуск нескольких блоков кода одной командой диалога.
+
+Вместо номера блока можно ввести диапазон или список: "1-4", "1,3,5",
+"1-3,6". Блоки выполняются по очереди, как при вводе номеров по одному.
+С "&" в конце ("1-4&") блоки выполняются одновременно, не больше
+parallel_workers сразу: каждый в отдельном процессе (в каталоге
+постоянной оболочки диалога, если она есть), без терминала (stdin —
+/dev/null), их вывод (stdout и stderr вместе) собирается в CaptureBuffer
+и печатается целиком по завершении блока, чтобы вывод разных команд не
+перемешивался. В конце — таблица кодов завершения и общее время.
+"""
+
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from rich.console import Console
+from rich.markup import escape
+
+from penguin_tamer.capture_buffer import CHUNK_SIZE, CaptureBuffer, capture_buffer_from_config
+from penguin_tamer.i18n import t
+from penguin_tamer.logger import logger
+
+# Сколько ждать завершения блоков после SIGTERM, прежде чем послать SIGKILL (секунды)
+STOP_TIMEOUT = 5.0
+
+# "3", "1-4", "1,3,5", "1-3, 6 &"
+_SELECTION = re.compile(r"^\s*(\d+(?:\s*-\s*\d+)?(?:\s*,\s*\d+(?:\s*-\s*\d+)?)*)\s*(&)?\s*$")
+
+
+def parse_block_selection(text: str, total: int) -> Optional[Tuple[List[int], bool]]:
+    """Разбирает выбор блоков кода.
+
+    Args:
+        text: Ввод пользователя
+        total: Сколько блоков в последнем ответе
+
+    Returns:
+        (номера блоков без повторов в порядке ввода, запускать параллельно);
+        None — ввод не является выбором блоков (это вопрос)
+
+    Raises:
+        ValueError: Номер блока вне 1..total
+    """
+    match = _SELECTION.match(text)
+    if not match:
+        return None
+    indices = {}
+    for part in match.group(1).split(","):
+        first, _, last = part.partition("-")
+        start = int(first)
+        end = int(last) if last else start
+        for index in (start, end):
+            if not 1 <= index <= total:
+                raise ValueError(t("Code block #{idx} not found.").format(idx=index))
+        step = 1 if end >= start else -1
+        indices.update(dict.fromkeys(range(start, end + step, step)))
+    return list(indices), match.group(2) is not None
+
+
+@dataclass
+class BlockResult:
+    """Итог одного блока."""
+
+    index: int
+    code: str
+    returncode: Optional[int] = None  # None — блок не запускался или прерван
+    elapsed: float = 0.0
+    output: Optional[CaptureBuffer] = None  # Только у параллельных блоков
+    process: Optional[subprocess.CompletedProcess] = None  # Только у последовательных блоков
+    error: Optional[str] = None  # Блок не удалось выполнить (например, ошибка запуска)
+
+    def close(self) -> None:
+        """Удаляет временные файлы с полным выводом блока."""
+        if self.output is not None:
+            self.output.close()
+        close = getattr(self.process, "close", None)  # CapturedProcess
+        if close is not None:
+            close()
+
+
+class _ParallelRun:
+    """Параллельное выполнение блоков: процессы, остановка по Ctrl+C."""
+
+    def __init__(self) -> None:
+        from penguin_tamer.shell_session import current_cwd
+        self._lock = threading.Lock()
+        self._processes: List[subprocess.Popen] = []
+        cwd = current_cwd()
+        self._cwd = cwd if cwd and os.path.isdir(cwd) else None
+        self.stopped = False
+
+    def run(self, result: BlockResult) -> BlockResult:
+        start = time.perf_counter()
+        with self._lock:
+            if self.stopped:
+                return result
+            process = subprocess.Popen(
+                result.code,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=self._cwd,
+                start_new_session=os.name == "posix",  # Остановка всей группы процессов блока
+            )
+            self._processes.append(process)
+        result.output = capture_buffer_from_config()
+        with process.stdout:
+            for chunk in iter(lambda: os.read(process.stdout.fileno(), CHUNK_SIZE), b""):
+                result.output.write(chunk)
+        result.returncode = process.wait()
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def stop(self, timeout: float = STOP_TIMEOUT) -> None:
+        """Завершает запущенные блоки; новые больше не запускаются.
+
+        Блоки, не завершившиеся за timeout секунд после SIGTERM (перехватили
+        или игнорируют его), завершаются SIGKILL.
+        """
+        with self._lock:
+            self.stopped = True
+            processes = [p for p in self._processes if p.poll() is None]
+        for process in processes:
+            self._signal(process, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            try:
+                process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Code block process {process.pid} didn't terminate gracefully, killing it")
+                self._signal(process, getattr(signal, "SIGKILL", signal.SIGTERM))
+
+    @staticmethod
+    def _signal(process: subprocess.Popen, signum: int) -> None:
+        """Сигнал всей группе процессов блока (на Windows — только процессу)."""
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signum)
+            elif signum == signal.SIGTERM:
+                process.terminate()
+            else:
+                process.kill()
+        except OSError:
+            pass
+
+
+def _print_block(console: Console, result: BlockResult) -> None:
+    console.print(t("[dim]>>> Block #{idx}:[/dim]").format(idx=result.index))
+    console.print(result.code, markup=False)
+    console.print(t("[dim]>>> Result:[/dim]"))
+    text = result.output.text()
+    if text:
+        console.out(text, highlight=False, end="" if text.endswith("\n") else "\n")
+    console.print(t("[dim]>>> Exit code: {code}[/dim]").format(code=result.returncode))
+    console.print()
+
+
+def _run_parallel(console: Console, results: List[BlockResult], workers: int) -> bool:
+    """Выполняет блоки одновременно; False — прервано пользователем."""
+    console.print(t("[dim]>>> Running blocks {blocks} in parallel, up to {workers} at a time[/dim]").format(
+        blocks=", ".join(f"#{r.index}" for r in results), workers=workers))
+    console.print()
+    run = _ParallelRun()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code-block")
+    try:
+        futures = {pool.submit(run.run, result): result for result in results}
+        for future in as_completed(futures):
+            result = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                # Ошибка одного блока (cwd, запись вывода) не останавливает остальные
+                logger.error(f"Code block #{result.index} failed: {e}")
+                result.error = f"{type(e).__name__}: {e}"
+                console.print(t("[red]>>> Block #{idx} failed: {error}[/red]").format(
+                    idx=result.index, error=escape(result.error)))
+                console.print()
+                continue
+            if result.returncode is not None:
+                _print_block(console, result)
+    except KeyboardInterrupt:
+        logger.info("Parallel code blocks interrupted by user (Ctrl+C)")
+        run.stop()
+        pool.shutdown(wait=True, cancel_futures=True)
+        console.print(t("[dim]>>> Command interrupted by user (Ctrl+C)[/dim]"))
+        return False
+    finally:
+        pool.shutdown(wait=True)
+    return True
+
+
+def _run_sequential(console: Console, code_blocks: list, results: List[BlockResult], run_block: Callable) -> bool:
+    """Выполняет блоки по очереди с выводом в реальном времени; False — прервано."""
+    for result in results:
+        start = time.perf_counter()
+        process = run_block(console, code_blocks, result.index)
+        result.elapsed = time.perf_counter() - start
+        console.print()
+        if process is None:
+            return False  # Ctrl+C или ошибка запуска: остальные блоки не выполняются
+        result.returncode = process.returncode
+        result.process = process
+    return True
+
+
+def print_summary(console: Console, results: List[BlockResult], wall: float) -> None:
+    """Таблица кодов завершения и общее время."""
+    from rich import box
+    from rich.table import Table
+    from rich.text import Text
+
+    table = Table(box=box.SIMPLE_HEAD, padding=(0, 0, 0, 1))
+    table.add_column("#", justify="right")
+    table.add_column(t("Command"), no_wrap=True, overflow="ellipsis", max_width=50)
+    table.add_column(t("Exit code"), justify="right")
+    table.add_column(t("Time, s"), justify="right")
+    for result in results:
+        if result.error is not None:
+            status, elapsed = t("[red]failed[/red]"), "-"
+        elif result.returncode is None:
+            status, elapsed = t("[yellow]not finished[/yellow]"), "-"
+        else:
+            color = "green" if result.returncode == 0 else "red"
+            status, elapsed = f"[{color}]{result.returncode}[/{color}]", f"{result.elapsed:.2f}"
+        command = result.code.strip().splitlines()[0] if result.code.strip() else ""
+        table.add_row(str(result.index), Text(command), status, elapsed)
+    console.print(table)
+    console.print(t("[dim]Total: {wall:.2f} s, sum of block times: {total:.2f} s[/dim]").format(
+        wall=wall, total=sum(r.elapsed for r in results)))
+
+
+def run_code_blocks(console: Console, code_blocks: list, indices: List[int], parallel: bool = False,
+                    run_block: Optional[Callable] = None, workers: Optional[int] = None,
+                    keep_output: bool = False) -> List[BlockResult]:
+    """
+    Выполняет несколько блоков кода и печатает сводку.
+
+    Args:
+        console (Console): Консоль для вывода
+        code_blocks (list): Список блоков кода
+        indices (list): Номера блоков (с 1)
+        parallel (bool): Выполнять одновременно (вывод печатается по завершении блока)
+        run_block: Запуск одного блока (console, blocks, index) для последовательного режима
+            (по умолчанию run_code_block)
+        workers (int): Сколько блоков выполнять одновременно (по умолчанию parallel_workers из настроек)
+        keep_output (bool): Не закрывать вывод блоков (закрывает вызывающий через
+            BlockResult.close, например после отправки результатов LLM)
+
+    Returns:
+        Итоги блоков в порядке indices
+    """
+    results = [BlockResult(index, code_blocks[index - 1]) for index in indices]
+    logger.info(f"Running code blocks {indices} ({'parallel' if parallel else 'sequential'})")
+    start = time.perf_counter()
+    if parallel:
+        if workers is None:
+            from penguin_tamer.config_manager import config
+            workers = config.get("global", "parallel_workers", 4)
+        _run_parallel(console, results, max(1, workers))
+    else:
+        if run_block is None:
+            from penguin_tamer.script_executor import run_code_block as run_block
+        _run_sequential(console, code_blocks, results, run_block)
+    print_summary(console, results, time.perf_counter() - start)
+    if keep_output:
+        return results
+    for result in results:
+        result.close()
+    return results
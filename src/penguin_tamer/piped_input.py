@@ -0,0 +1,187 @@
+"""
+Данные из конвейера: `journalctl -u foo | pt - "почему падает сервис"`.
+
+stdin читается, только если среди аргументов есть "-" или вопроса в
+аргументах нет вовсе (`journalctl -u foo | pt`). Иначе pt, запущенный
+в цикле `while read p; do pt "$p"; done < prompts.txt`, забрал бы
+остаток ввода цикла, а под cron или CI с унаследованным, никогда не
+закрывающимся каналом — завис бы до запроса.
+
+stdin читается блоками фиксированного размера, поэтому в памяти никогда
+не оказывается весь поток. Одинаковые строки подряд схлопываются в одну
+с пометкой числа повторов. В бюджет токенов попадают начало потока (head)
+и его последние строки (tail, скользящее окно); середина заменяется
+строкой с числом пропущенных строк. Когда поток уже не помещается в
+бюджет, схлопываются и строки, отличающиеся только числами (метки
+времени, PID, счетчики), — с пометкой «похожих строк», а не повторов:
+вывод `ss -tln` или `df`, который помещается в бюджет, не теряет строк.
+Память ограничена бюджетом, а не размером входа.
+"""
+
+import os
+import stat
+import sys
+from collections import deque
+from typing import BinaryIO, List, Optional, Tuple
+
+from penguin_tamer.terminal import clean_terminal_output
+
+# Размер блока чтения stdin
+CHUNK_SIZE = 64 * 1024
+
+# Строки длиннее обрезаются (иначе одна строка без \n займет всю память)
+MAX_LINE_BYTES = 4096
+
+# Байты, которые не учитываются при сравнении похожих строк
+_IGNORED_BYTES = b"0123456789\r"
+
+# Аргумент вместо вопроса или рядом с ним: данные из stdin
+STDIN_ARG = "-"
+
+def stdin_is_piped() -> bool:
+    """stdin — конвейер или файл (`pt < log`), а не терминал или /dev/null."""
+    try:
+        mode = os.fstat(sys.stdin.fileno()).st_mode
+    except (AttributeError, OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode)
+
+
+def split_stdin_arg(prompt_parts: List[str]) -> Tuple[List[str], bool]:
+    """Убирает из слов вопроса аргумент "-"; True — данные из stdin запрошены явно."""
+    words = [part for part in prompt_parts if part != STDIN_ARG]
+    return words, len(words) != len(prompt_parts)
+
+
+def should_read_stdin(prompt: str, requested: bool) -> bool:
+    """Читать ли stdin в режиме одного запроса: запрошен "-" или вопроса нет, а stdin — конвейер."""
+    return requested or (not prompt and stdin_is_piped())
+
+
+class _Entry:
+    """Строка и число ее повторов (или похожих строк) подряд."""
+
+    __slots__ = ("line", "count", "similar", "tokens")
+
+    def __init__(self, line: bytes) -> None:
+        self.line = line
+        self.count = 1
+        self.similar = False  # Среди схлопнутых есть строки, отличающиеся числами
+        # Как heuristic_tokens: ~4 символа ASCII или ~2 символа кириллицы на токен — ~4 байта UTF-8
+        self.tokens = len(line) // 4 + 1
+
+    def render(self) -> str:
+        text = self.line.rstrip(b"\r").decode("utf-8", errors="replace")
+        if self.count == 1:
+            return text
+        if self.similar:
+            return f"{text}  [{self.count} similar lines, numbers differ]"
+        return f"{text}  [repeated {self.count} times]"
+
+
+class StreamSampler:
+    """Выборка начала и конца потока строк в пределах бюджета токенов.
+
+    Строки разбираются и сравниваются как байты; декодируются только
+    строки, попавшие в выборку.
+
+    Args:
+        budget: Бюджет токенов на всю выборку (половина — начало, половина — конец)
+        max_line_bytes: Максимальная длина одной строки
+        strip_ansi: Убирать управляющие последовательности терминала
+            (вывод команд в псевдотерминале)
+    """
+
+    def __init__(self, budget: int = 4000, max_line_bytes: int = MAX_LINE_BYTES, strip_ansi: bool = False) -> None:
+        self.head_budget = budget // 2
+        self.tail_budget = budget - self.head_budget
+        self.max_line_bytes = max_line_bytes
+        self.strip_ansi = strip_ansi
+        self.head: List[_Entry] = []
+        self.tail: "deque[_Entry]" = deque()
+        self.head_tokens = 0
+        self.tail_tokens = 0
+        self.total_lines = 0
+        self.total_bytes = 0
+        self.omitted_lines = 0
+        self._head_full = False
+        self._last: Optional[_Entry] = None
+        self._last_line: Optional[bytes] = None
+        self._last_key: Optional[bytes] = None
+        self._partial = b""
+
+    def feed(self, data: bytes) -> None:
+        """Добавляет очередной блок байтов."""
+        self.total_bytes += len(data)
+        lines = data.split(b"\n")
+        lines[0] = self._partial + lines[0]
+        # Незавершенная строка ждет следующего блока, но не длиннее max_line_bytes
+        self._partial = lines.pop()[:self.max_line_bytes]
+        self.total_lines += len(lines)
+        if self.strip_ansi and lines:
+            lines = clean_terminal_output(b"\n".join(lines) + b"\n").split(b"\n")
+            lines.pop()
+        last_line, last_key = self._last_line, self._last_key
+        for line in lines:
+            if line == last_line:
+                self._last.count += 1
+                continue
+            key = line.translate(None, _IGNORED_BYTES)
+            # Строки, отличающиеся только числами, — только если выборка уже не помещается в бюджет
+            if key == last_key and self.omitted_lines:
+                self._last.count += 1
+                self._last.similar = True
+                continue
+            last_line, last_key = line, key
+            self._add(line[:self.max_line_bytes])
+        self._last_line, self._last_key = last_line, last_key
+
+    def _add(self, line: bytes) -> None:
+        entry = _Entry(line)
+        self._last = entry
+        if not self._head_full and self.head_tokens + entry.tokens <= self.head_budget:
+            self.head.append(entry)
+            self.head_tokens += entry.tokens
+            return
+        self._head_full = True
+        self.tail.append(entry)
+        self.tail_tokens += entry.tokens
+        while self.tail_tokens > self.tail_budget and len(self.tail) > 1:
+            dropped = self.tail.popleft()
+            self.tail_tokens -= dropped.tokens
+            self.omitted_lines += dropped.count
+
+    def close(self) -> None:
+        """Завершает поток (последняя строка без перевода строки)."""
+        if self._partial:
+            self.total_bytes -= 1  # Добавленный \n не входит в размер входа
+            self.feed(b"\n")
+
+    def text(self) -> str:
+        """Итоговая выборка: начало, пометка о пропуске, конец."""
+        lines = [entry.render() for entry in self.head]
+        if self.omitted_lines:
+            lines.append(f"... [{self.omitted_lines} lines omitted] ...")
+        lines.extend(entry.render() for entry in self.tail)
+        return "\n".join(lines)
+
+
+def read_piped_input(stream: BinaryIO, budget: int = 4000, chunk_size: int = CHUNK_SIZE) -> StreamSampler:
+    """Читает поток блоками chunk_size и возвращает его выборку."""
+    sampler = StreamSampler(budget)
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        sampler.feed(data)
+    sampler.close()
+    return sampler
+
+
+def attach_piped_input(prompt: str, sampler: StreamSampler) -> str:
+    """Добавляет выборку входных данных к вопросу пользователя."""
+    header = f"Input ({sampler.total_lines} lines, {sampler.total_bytes} bytes"
+    if sampler.omitted_lines:
+        header += ", sampled: beginning and end"
+    header += "):"
+    return f"{prompt}\n\n{header}\n```\n{sampler.text()}\n```"
@@ -0,0 +1,101 @@
+"""
+Фоновый прогрев соединения с API в диалоговом режиме.
+
+Пока пользователь набирает вопрос в prompt_toolkit, фоновый поток
+импортирует openai, создает клиент и открывает keep-alive соединение
+с api_url. Первый вопрос не ждет DNS, TCP и TLS. Пока ввод открыт,
+соединение прогревается заново каждые interval секунд: пул httpx и
+сервер закрывают простаивающие соединения, а вопрос после паузы не
+должен ждать. Повторные прогревы идут не дольше max_idle секунд с
+открытия ввода: ввод, забытый открытым на ночь, не шлет запросы
+провайдеру до утра. Следующий ввод снова начинает с прогрева.
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+from penguin_tamer.logger import logger
+
+
+class ConnectionPrewarmer:
+    """Поток прогрева, который работает, пока открыт ввод вопроса.
+
+    Args:
+        warm: Функция прогрева (например, OpenRouterClient.prewarm)
+        interval: Прогревать заново, если соединение простаивало дольше (секунды)
+        max_idle: Не прогревать заново, если ввод открыт дольше (секунды; None — без ограничения)
+    """
+
+    def __init__(self, warm: Callable[[], None], interval: float = 50.0,
+                 max_idle: Optional[float] = 600.0) -> None:
+        self._warm = warm
+        self.interval = interval
+        self.max_idle = max_idle
+        self.warmups = 0  # Число успешных прогревов
+        self._cond = threading.Condition()
+        self._active = False
+        self._stopped = False
+        self._last_used: Optional[float] = None  # Последний прогрев или запрос
+        self._opened_at = 0.0  # Когда открыт текущий ввод
+        self._thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+
+    def start(self) -> "ConnectionPrewarmer":
+        self._thread.start()
+        return self
+
+    def resume(self) -> None:
+        """Открыт ввод вопроса: можно прогревать."""
+        with self._cond:
+            self._active = True
+            self._opened_at = time.monotonic()
+            self._cond.notify()
+
+    def pause(self) -> None:
+        """Ввод завершен: запрос или команда используют соединение сами."""
+        with self._cond:
+            self._active = False
+            self._cond.notify()
+
+    def mark_used(self) -> None:
+        """Запрос к API только что выполнен — соединение уже теплое."""
+        with self._cond:
+            self._last_used = time.monotonic()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _next_delay(self, now: float) -> Optional[float]:
+        """Секунд до следующего прогрева; None — ждать смены состояния."""
+        if not self._active:
+            return None
+        if self._last_used is None:
+            return 0.0
+        delay = max(0.0, self._last_used + self.interval - now)
+        if delay and self.max_idle is not None and now + delay > self._opened_at + self.max_idle:
+            return None  # Ввод давно открыт: до следующего ввода не прогреваем
+        return delay
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    delay = self._next_delay(time.monotonic())
+                    if delay == 0.0:
+                        break
+                    self._cond.wait(delay)
+                self._last_used = time.monotonic()
+
+            start = time.perf_counter()
+            try:
+                self._warm()
+            except Exception as e:
+                # Прогрев — только оптимизация: ошибки не показываем пользователю
+                logger.debug(f"Connection prewarm failed: {e}")
+                continue
+            self.warmups += 1
+            logger.debug(f"Connection prewarmed in {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,59 @@
+"""
+Кэширование префикса промпта на стороне провайдера.
+
+Провайдеры (OpenAI, DeepSeek, Anthropic через OpenRouter и др.) кэшируют
+начало запроса, если оно побайтно совпадает с предыдущим: системный
+промпт, инструкции и описание окружения должны быть неизменными между
+ходами и запусками, а новые сообщения — только дописываться в конец.
+
+Anthropic и Gemini через OpenRouter кэшируют только помеченные части:
+with_cache_control ставит метки cache_control на системный промпт и на
+последнее сообщение (вся история до него попадет в кэш к следующему ходу).
+Сколько токенов взято из кэша, провайдер сообщает в usage — см. usage_tokens.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _marked(message: Dict[str, Any]) -> Dict[str, Any]:
+    content = message.get("content")
+    if not isinstance(content, str) or not content:
+        return message
+    return {**message, "content": [{"type": "text", "text": content, "cache_control": CACHE_CONTROL}]}
+
+
+def with_cache_control(messages: List[Dict[str, Any]], last: bool = True) -> List[Dict[str, Any]]:
+    """Копия сообщений с метками cache_control на системном промпте и последнем сообщении.
+
+    last=False — только системный промпт (запросы, у которых общий лишь он, как в --batch):
+    запись в кэш у Anthropic дороже обычного ввода.
+    """
+    result = [_marked(m) if m.get("role") == "system" else m for m in messages]
+    if last and result and result[-1].get("role") != "system":
+        result[-1] = _marked(result[-1])
+    return result
+
+
+def _field(obj: Any, name: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def usage_tokens(usage: Any) -> Tuple[Optional[int], Optional[int]]:
+    """(токены промпта, из них взято из кэша) по usage ответа; None — провайдер не сообщил.
+
+    Поддерживаются prompt_tokens_details.cached_tokens (OpenAI, OpenRouter),
+    prompt_cache_hit_tokens (DeepSeek) и cache_read_input_tokens (Anthropic).
+    """
+    prompt = _field(usage, "prompt_tokens")
+    cached = _field(_field(usage, "prompt_tokens_details"), "cached_tokens")
+    if cached is None:
+        cached = _field(usage, "prompt_cache_hit_tokens")
+    if cached is None:
+        cached = _field(usage, "cache_read_input_tokens")
+    return prompt, cached
@@ -0,0 +1,173 @@
+"""
+Маршрутизатор LLM с автоматическим переключением при сбоях.
+
+Для каждой LLM из supported_LLMs хранится скользящая (EWMA) задержка
+ответа и счетчик ошибок подряд. После failure_threshold ошибок подряд
+цепь размыкается: LLM пропускается cooldown секунд, затем получает одну
+пробную попытку (полуоткрытое состояние): выдав пробу, маршрутизатор
+сдвигает opened_at, поэтому остальные запросы — и в других процессах —
+ждут ее исхода еще cooldown секунд. Запрос идет текущей LLM, а при
+429/5xx/ошибке соединения — следующей исправной, начиная с самой быстрой.
+
+Статистика сохраняется в небольшой JSON-файл, поэтому новый процесс
+сразу начинает с накопленного ранжирования. Каждое изменение — чтение,
+правка и запись файла под блокировкой (flock), так что параллельные
+запуски pt не затирают статистику друг друга.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from penguin_tamer.logger import logger
+
+
+class ProviderRouter:
+    """Статистика и автоматы размыкания цепи для LLM.
+
+    Args:
+        state_path: Файл состояния (JSON)
+        current: Текущая LLM (выбрана пользователем, пробуется первой)
+        names: Все LLM из supported_LLMs
+        failure_threshold: Ошибок подряд до размыкания цепи
+        cooldown: Время, на которое LLM исключается (секунды)
+        alpha: Вес нового замера в скользящей задержке
+    """
+
+    def __init__(self, state_path: Path, current: str, names: List[str],
+                 failure_threshold: int = 3, cooldown: float = 120.0, alpha: float = 0.3) -> None:
+        self.state_path = Path(state_path)
+        self.current = current
+        self.names = list(names)
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Исключительная блокировка файла состояния между процессами (на Windows — нет)."""
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        try:
+            lock_file = open(self.state_path.with_suffix(".lock"), "a")
+        except OSError as e:
+            logger.debug(f"Failed to lock provider state: {e}")
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _update(self, change: Callable[[], bool]) -> None:
+        """Перечитывает состояние, применяет change и сохраняет, если change вернул True."""
+        with self._file_lock():
+            self._state = self._load()
+            if change():
+                self._save()
+
+    def _save(self) -> None:
+        tmp_path = self.state_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._state, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.debug(f"Failed to save provider state: {e}")
+
+    def _entry(self, name: str) -> Dict[str, Any]:
+        return self._state.setdefault(
+            name, {"latency": None, "failures": 0, "opened_at": None, "successes": 0, "errors": 0})
+
+    def stats(self, name: str) -> Dict[str, Any]:
+        """Копия статистики LLM."""
+        with self._lock:
+            return dict(self._entry(name))
+
+    def is_available(self, name: str, now: Optional[float] = None) -> bool:
+        """Цепь замкнута или истек cooldown (пробная попытка)."""
+        entry = self._state.get(name)
+        if not entry or entry.get("opened_at") is None:
+            return True
+        return (now or time.time()) - entry["opened_at"] >= self.cooldown
+
+    def candidates(self) -> List[str]:
+        """Порядок попыток: текущая LLM, затем исправные по возрастанию задержки.
+
+        LLM без замеров идут после измеренных. LLM с истекшим cooldown
+        входит в список, только если этот вызов получил ее пробную попытку.
+        Если все цепи разомкнуты, пробуется только текущая LLM.
+        """
+        now = time.time()
+        healthy: List[str] = []
+
+        def take_probes() -> bool:
+            probed = False
+            healthy.clear()
+            for name in self.names:
+                if not self.is_available(name, now):
+                    continue
+                entry = self._state.get(name)
+                if entry and entry.get("opened_at") is not None:
+                    entry["opened_at"] = now  # Следующая проба — не раньше чем через cooldown
+                    probed = True
+                    logger.info(f"Circuit half-open for '{name}': probing")
+                healthy.append(name)
+            return probed
+
+        with self._lock:
+            self._update(take_probes)
+
+            def rank(name: str):
+                latency = self._state.get(name, {}).get("latency")
+                return (latency is None, latency or 0.0, self.names.index(name))
+
+            others = sorted((n for n in healthy if n != self.current), key=rank)
+        ordered = ([self.current] if self.current in healthy else []) + others
+        return ordered or [self.current]
+
+    def record_success(self, name: str, latency: float) -> None:
+        def change() -> bool:
+            entry = self._entry(name)
+            previous = entry.get("latency")
+            entry["latency"] = round(latency if previous is None
+                                     else self.alpha * latency + (1 - self.alpha) * previous, 4)
+            entry["successes"] = entry.get("successes", 0) + 1
+            if entry.get("opened_at") is not None:
+                logger.info(f"Circuit closed for '{name}'")
+            entry["failures"] = 0
+            entry["opened_at"] = None
+            return True
+
+        with self._lock:
+            self._update(change)
+
+    def record_failure(self, name: str) -> None:
+        def change() -> bool:
+            entry = self._entry(name)
+            entry["failures"] = entry.get("failures", 0) + 1
+            entry["errors"] = entry.get("errors", 0) + 1
+            if entry["failures"] >= self.failure_threshold:
+                # Повторное размыкание после неудачной пробной попытки продлевает паузу
+                entry["opened_at"] = time.time()
+                logger.info(f"Circuit opened for '{name}' after {entry['failures']} failures")
+            return True
+
+        with self._lock:
+            self._update(change)
@@ -0,0 +1,152 @@
+"""
+Дисковый кэш ответов для режима одиночного запроса.
+
+Ключ — SHA-256 от модели, api_url, температуры и полного списка сообщений,
+поэтому одинаковый запрос к той же LLM отдается с диска без сетевого
+обращения (и без импорта openai). Записи живут не дольше TTL; при
+превышении лимита размера удаляются давно не использованные (LRU по mtime).
+
+Модуль не импортирует тяжелые зависимости: на попадании в кэш нужны
+только json, hashlib и файловая система.
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from penguin_tamer.logger import logger
+
+
+class ResponseCache:
+    """Кэш ответов LLM в каталоге cache_dir.
+
+    Args:
+        cache_dir: Каталог кэша
+        ttl: Время жизни записи в секундах (0 — без ограничения)
+        max_bytes: Максимальный суммарный размер записей
+    """
+
+    STATS_FILE = "stats.json"
+
+    def __init__(self, cache_dir: Path, ttl: float = 86400, max_bytes: int = 50 * 1024 * 1024) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, api_url: str, temperature: float, messages: List[Dict]) -> str:
+        """Ключ записи: хэш всех параметров, влияющих на ответ."""
+        payload = json.dumps(
+            {"model": model, "api_url": api_url, "temperature": temperature, "messages": messages},
+            ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        """Возвращает сохраненный ответ или None (промах или истекший TTL)."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._update_stats(hit=False)
+            return None
+
+        if self.ttl and time.time() - entry.get("created", 0) > self.ttl:
+            logger.debug(f"Response cache entry expired: {key[:12]}")
+            self._remove(path)
+            self._update_stats(hit=False)
+            return None
+
+        reply = entry.get("reply")
+        # Отметка использования для LRU-вытеснения
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._update_stats(hit=True, saved=len(reply.encode("utf-8")) if reply else 0)
+        logger.info(f"Response cache hit: {key[:12]}")
+        return reply
+
+    def put(self, key: str, reply: str, model: str = "") -> None:
+        """Сохраняет ответ и при необходимости вытесняет старые записи."""
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": time.time(), "model": model, "reply": reply}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"Failed to write response cache entry: {e}")
+            return
+        self._evict()
+
+    def _entries(self) -> List[os.DirEntry]:
+        return [e for e in os.scandir(self.cache_dir)
+                if e.is_file() and e.name.endswith(".json") and e.name != self.STATS_FILE]
+
+    def _evict(self) -> None:
+        """Удаляет записи, не использовавшиеся дольше TTL, и самые старые сверх лимита размера."""
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        total = sum(e.stat().st_size for e in entries)
+        now = time.time()
+        for entry in entries:
+            expired = self.ttl and now - entry.stat().st_mtime > self.ttl
+            if not expired and total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            self._remove(Path(entry.path))
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            self._remove(Path(entry.path))
+
+    # === Статистика ===
+
+    def _read_stats(self) -> Dict[str, int]:
+        try:
+            with open(self.cache_dir / self.STATS_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hits": 0, "misses": 0, "bytes_saved": 0}
+
+    def _update_stats(self, hit: bool, saved: int = 0) -> None:
+        stats = self._read_stats()
+        if hit:
+            stats["hits"] = stats.get("hits", 0) + 1
+            stats["bytes_saved"] = stats.get("bytes_saved", 0) + saved
+        else:
+            stats["misses"] = stats.get("misses", 0) + 1
+        try:
+            with open(self.cache_dir / self.STATS_FILE, "w", encoding="utf-8") as f:
+                json.dump(stats, f)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, float]:
+        """Статистика: попадания, промахи, доля попаданий, сэкономленные байты, размер."""
+        stats = self._read_stats()
+        entries = self._entries()
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        return {
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+            "hit_rate": stats.get("hits", 0) / lookups if lookups else 0.0,
+            "bytes_saved": stats.get("bytes_saved", 0),
+            "entries": len(entries),
+            "size_bytes": sum(e.stat().st_size for e in entries),
+        }
@@ -0,0 +1,122 @@
+"""
+Повтор запросов к LLM при временных ошибках.
+
+Бесплатные эндпоинты часто отвечают 429 и 502. RetryPolicy повторяет
+запрос с экспоненциальной задержкой и полным джиттером
+(random(0, min(max_delay, base_delay * 2^n))), а если сервер прислал
+Retry-After — ждет ровно столько. Число повторов задается отдельно для
+каждого класса ошибок (см. error_class): rate_limit, server, timeout,
+connection. Встроенные повторы openai при этом отключаются
+(max_retries=0), чтобы задержки не складывались.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from penguin_tamer.config_manager import config
+from penguin_tamer.error_messages import error_class
+
+# Повторов по умолчанию для каждого класса ошибок
+DEFAULT_RULES = {"rate_limit": 3, "server": 2, "timeout": 1, "connection": 2}
+
+OnRetry = Callable[[int, BaseException, float], None]
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Задержка из заголовков retry-after-ms / Retry-After ответа (секунды или HTTP-дата)."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Правила повтора запроса.
+
+    Args:
+        rules: Для каждого класса ошибок — сколько повторов запроса (всего) он допускает;
+            0 — не повторять
+        base_delay: Начальная задержка (секунды), удваивается с каждым повтором
+        max_delay: Потолок экспоненциальной задержки
+        max_retry_after: Если Retry-After больше, запрос не повторяется
+        rng: Источник случайных чисел [0, 1) для джиттера
+    """
+
+    def __init__(self, rules: Optional[Dict[str, int]] = None, base_delay: float = 0.5,
+                 max_delay: float = 20.0, max_retry_after: float = 60.0,
+                 rng: Callable[[], float] = random.random) -> None:
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.rng = rng
+        self.sleep = time.sleep
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        return cls(
+            rules={**DEFAULT_RULES, **(config.get("global", "retry_rules") or {})},
+            base_delay=config.get("global", "retry_base_delay", 0.5),
+            max_delay=config.get("global", "retry_max_delay", 20),
+            max_retry_after=config.get("global", "retry_max_after", 60),
+        )
+
+    def next_delay(self, error: BaseException, retries: int) -> Optional[float]:
+        """Задержка перед повтором номер retries + 1 или None, если повторять не нужно."""
+        kind = error_class(error)
+        if kind is None or retries >= self.rules.get(kind, 0):
+            return None
+        after = retry_after(error)
+        if after is not None:
+            return after if after <= self.max_retry_after else None
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** retries)
+
+    def call(self, request: Callable[[], Any], on_retry: Optional[OnRetry] = None) -> Any:
+        """Выполняет request, повторяя его по правилам; on_retry(номер, ошибка, задержка)."""
+        retries = 0
+        while True:
+            try:
+                return request()
+            except Exception as e:
+                delay = self.next_delay(e, retries)
+                if delay is None:
+                    raise
+                retries += 1
+                if on_retry is not None:
+                    on_retry(retries, e, delay)
+                self.sleep(delay)
+
+    async def acall(self, request: Callable[[], Awaitable[Any]], on_retry: Optional[OnRetry] = None) -> Any:
+        """Асинхронный вариант call."""
+        retries = 0
+        while True:
+            try:
+                return await request()
+            except Exception as e:
+                delay = self.next_delay(e, retries)
+                if delay is None:
+                    raise
+                retries += 1
+                if on_retry is not None:
+                    on_retry(retries, e, delay)
+                await asyncio.sleep(delay)
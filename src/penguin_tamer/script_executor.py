@@ -1,11 +1,20 @@
+import codecs
+import select
+import selectors
+import signal
 import subprocess
 import platform
 import tempfile
+import threading
 import os
 import sys
 from abc import ABC, abstractmethod
+from typing import Optional, Tuple
 from rich.console import Console
+from penguin_tamer.capture_buffer import CaptureBuffer, capture_buffer_from_config
+from penguin_tamer.config_manager import config
 from penguin_tamer.i18n import t
+from penguin_tamer.terminal import clean_terminal_text, copy_winsize, set_controlling_tty, write_all
 
 from penguin_tamer.logger import logger, log_execution_time
 
@@ -13,7 +22,10 @@ from penguin_tamer.logger import logger, log_execution_time
 # Абстрактный базовый класс для исполнителей команд
 class CommandExecutor(ABC):
     """Базовый интерфейс для исполнителей команд разных ОС"""
-    
+
+    # stderr уже показан пользователю во время выполнения (итоговая сводка не нужна)
+    streams_stderr = False
+
     @abstractmethod
     def execute(self, code_block: str) -> subprocess.CompletedProcess:
         """
@@ -28,15 +40,112 @@ class CommandExecutor(ABC):
         pass
 
 
+# Размер блока чтения вывода команды
+CHUNK_SIZE = 64 * 1024
+
+
+class CapturedProcess(subprocess.CompletedProcess):
+    """CompletedProcess, вывод которого сохранен в CaptureBuffer.
+
+    stdout и stderr — начало и хвост вывода (CaptureBuffer.text()), как
+    строки для совместимости; полный вывод можно потоково прочитать через
+    stdout_capture и stderr_capture.
+    """
+
+    def __init__(self, args, returncode: int, stdout_capture: CaptureBuffer,
+                 stderr_capture: Optional[CaptureBuffer] = None, stdout: Optional[str] = None) -> None:
+        super().__init__(
+            args=args,
+            returncode=returncode,
+            stdout=stdout_capture.text() if stdout is None else stdout,
+            stderr=stderr_capture.text() if stderr_capture is not None else "",
+        )
+        self.stdout_capture = stdout_capture
+        self.stderr_capture = stderr_capture
+
+    def close(self) -> None:
+        """Удаляет временные файлы с полным выводом."""
+        for capture in (self.stdout_capture, self.stderr_capture):
+            if capture is not None:
+                capture.close()
+
+
+def pump_output(process: subprocess.Popen, stdout=None, stderr=None,
+                memory_budget: Optional[int] = None) -> Tuple[CaptureBuffer, CaptureBuffer]:
+    """Читает stdout и stderr процесса одновременно и пересылает их по мере поступления.
+
+    Оба канала опрашиваются через selectors, поэтому команда, которая много
+    пишет в stderr, не зависает на заполненном канале, пока читается stdout,
+    а stderr виден сразу, а не после завершения. Порядок внутри каждого
+    канала сохраняется; между каналами данные выводятся в порядке
+    готовности, то есть так же, как в терминале, с точностью до блока.
+
+    Вывод сохраняется байтами в CaptureBuffer: память ограничена
+    memory_budget на канал при любом объеме вывода.
+
+    Args:
+        process: Процесс с stdout=PIPE и stderr=PIPE (байтовые)
+        stdout: Куда пересылать stdout (по умолчанию sys.stdout)
+        stderr: Куда пересылать stderr (по умолчанию sys.stderr)
+        memory_budget: Бюджет памяти на канал в байтах (по умолчанию capture_memory_kb из настроек)
+
+    Returns:
+        (stdout, stderr): Буферы с выводом каналов
+    """
+    targets = {}
+    selector = selectors.DefaultSelector()
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    for pipe, sink in ((process.stdout, stdout), (process.stderr, stderr)):
+        if pipe is None:
+            continue
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        targets[pipe.fileno()] = (sink, decoder, capture_buffer_from_config(memory_budget))
+        selector.register(pipe.fileno(), selectors.EVENT_READ)
+
+    try:
+        while selector.get_map():
+            for key, _ in selector.select():
+                sink, decoder, capture = targets[key.fd]
+                data = os.read(key.fd, CHUNK_SIZE)
+                if not data:
+                    selector.unregister(key.fd)
+                capture.write(data)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    sink.write(text)
+                    sink.flush()
+    finally:
+        selector.close()
+
+    empty = CaptureBuffer(0)
+    return (targets[process.stdout.fileno()][2] if process.stdout else empty,
+            targets[process.stderr.fileno()][2] if process.stderr else empty)
+
+
 # Исполнитель команд для Linux
 class LinuxCommandExecutor(CommandExecutor):
-    """Исполнитель команд для Linux/Unix систем"""
-    
+    """Исполнитель команд для Linux/Unix систем
+
+    Args:
+        memory_budget: Бюджет памяти на сохранение вывода каждого канала, байт
+            (по умолчанию capture_memory_kb из настроек); остальное — во временном файле
+        stdout: Куда пересылать stdout команды (по умолчанию sys.stdout)
+        stderr: Куда пересылать stderr команды (по умолчанию sys.stderr)
+    """
+
+    streams_stderr = True
+
+    def __init__(self, memory_budget: Optional[int] = None, stdout=None, stderr=None) -> None:
+        self.memory_budget = memory_budget
+        self.stdout = stdout
+        self.stderr = stderr
+
     @log_execution_time
     def execute(self, code_block: str) -> subprocess.CompletedProcess:
-        """Выполняет bash-команды в Linux с выводом в реальном времени"""
+        """Выполняет bash-команды в Linux с выводом stdout и stderr в реальном времени"""
         logger.debug(f"Executing bash command: {code_block[:80]}...")
-        
+
         # Используем Popen для вывода в реальном времени
         process = subprocess.Popen(
             code_block,
@@ -45,57 +154,10 @@ class LinuxCommandExecutor(CommandExecutor):
             stderr=subprocess.PIPE,
             text=False  # Используем байты для корректной работы
         )
-        
-        # Читаем вывод в реальном времени
-        stdout_lines = []
-        stderr_lines = []
-        
-        # Читаем stdout построчно
-        if process.stdout:
-            for line in process.stdout:
-                if line:  # Проверяем, что линия не пустая
-                    try:
-                        decoded_line = line.decode('utf-8', errors='replace').strip()
-                        if decoded_line:  # Игнорируем пустые строки
-                            print(decoded_line)  # Выводим в реальном времени
-                            stdout_lines.append(decoded_line)
-                    except UnicodeDecodeError:
-                        # Если UTF-8 не работает, пробуем системную кодировку
-                        try:
-                            decoded_line = line.decode(sys.getdefaultencoding(), errors='replace').strip()
-                            if decoded_line:
-                                print(decoded_line)
-                                stdout_lines.append(decoded_line)
-                        except:
-                            # В крайнем случае выводим как есть
-                            raw_line = line.decode('latin1', errors='replace').strip()
-                            if raw_line:
-                                print(raw_line)
-                                stdout_lines.append(raw_line)
-        
-        # # Читаем stderr построчно
-        # if process.stderr:
-        #     for line in process.stderr:
-        #         if line:  # Проверяем, что линия не пустая
-        #             try:
-        #                 decoded_line = line.decode('utf-8', errors='replace').strip()
-        #                 if decoded_line:  # Игнорируем пустые строки
-        #                     print(t("Error: {line}").format(line=decoded_line), file=sys.stderr)  # Выводим ошибки в реальном времени
-        #                     stderr_lines.append(decoded_line)
-        #             except UnicodeDecodeError:
-        #                 try:
-        #                     decoded_line = line.decode(sys.getdefaultencoding(), errors='replace').strip()
-        #                     if decoded_line:
-        #                         print(t("Error: {line}").format(line=decoded_line), file=sys.stderr)
-        #                         stderr_lines.append(decoded_line)
-        #                 except:
-        #                     raw_line = line.decode('latin1', errors='replace').strip()
-        #                     if raw_line:
-        #                         print(t("Error: {line}").format(line=raw_line), file=sys.stderr)
-        #                         stderr_lines.append(raw_line)
-        
-        # Ждем завершения процесса с обработкой прерывания
+
+        # Читаем оба канала одновременно и ждем завершения процесса с обработкой прерывания
         try:
+            stdout, stderr = pump_output(process, self.stdout, self.stderr, memory_budget=self.memory_budget)
             process.wait()
         except KeyboardInterrupt:
             # Если получили Ctrl+C, завершаем процесс и пробрасываем исключение
@@ -109,25 +171,156 @@ class LinuxCommandExecutor(CommandExecutor):
                 process.wait()
             # Пробрасываем KeyboardInterrupt дальше для обработки в execute_and_handle_result
             raise
-        
-        # Создаем объект CompletedProcess для совместимости
-        result = subprocess.CompletedProcess(
-            args=code_block,
-            returncode=process.returncode,
-            stdout='\n'.join(stdout_lines) if stdout_lines else '',
-            stderr='\n'.join(stderr_lines) if stderr_lines else ''
-        )
-        
+        finally:
+            for pipe in (process.stdout, process.stderr):
+                pipe.close()
+
+        # CompletedProcess с началом и хвостом вывода; полный вывод — в буферах
+        result = CapturedProcess(code_block, process.returncode, stdout, stderr)
+
         logger.debug(
             t("Execution result: return code {code}, stdout: {stdout} bytes, stderr: {stderr} bytes").format(
                 code=result.returncode,
-                stdout=(len(result.stdout) if result.stdout else 0),
-                stderr=(len(result.stderr) if result.stderr else 0),
+                stdout=len(stdout),
+                stderr=len(stderr),
             )
         )
         return result
 
 
+# Исполнитель команд в псевдотерминале (Linux/macOS)
+class PtyCommandExecutor(CommandExecutor):
+    """Исполнитель команд в псевдотерминале (PTY).
+
+    Команда получает настоящий терминал: вывод идет построчно, а не
+    блоками, сохраняются цвета, работают интерактивные программы (top,
+    less, запрос пароля sudo). Байты из псевдотерминала пишутся в
+    терминал пользователя как есть, без декодирования; ввод пользователя
+    (терминал в raw-режиме) передается команде. Вывод сохраняется в
+    CaptureBuffer; в CompletedProcess.stdout попадают его начало и хвост
+    без управляющих последовательностей. stdout и stderr в PTY не разделяются.
+
+    Args:
+        memory_budget: Бюджет памяти на сохранение вывода, байт
+            (по умолчанию capture_memory_kb из настроек)
+        output: Куда писать вывод: файловый дескриптор или объект с write(bytes)
+            (по умолчанию — stdout процесса)
+        input_fd: Откуда читать ввод для команды (по умолчанию stdin, если это терминал)
+    """
+
+    streams_stderr = True
+
+    def __init__(self, memory_budget: Optional[int] = None, output=None, input_fd: Optional[int] = None) -> None:
+        self.memory_budget = memory_budget
+        self.output = output
+        self.input_fd = input_fd
+
+    def _output_fd(self) -> Optional[int]:
+        if self.output is None:
+            sys.stdout.flush()  # Уже выведенный текст — раньше вывода команды
+            return sys.stdout.fileno()
+        return self.output if isinstance(self.output, int) else None
+
+    def _input_fd(self) -> Optional[int]:
+        if self.input_fd is not None:
+            return self.input_fd
+        try:
+            return sys.stdin.fileno() if sys.stdin.isatty() else None
+        except (AttributeError, ValueError, OSError):
+            return None
+
+    @log_execution_time
+    def execute(self, code_block: str) -> subprocess.CompletedProcess:
+        """Выполняет bash-команды в псевдотерминале с передачей ввода и вывода"""
+        import pty
+        import termios
+        import tty
+
+        logger.debug(f"Executing bash command in PTY: {code_block[:80]}...")
+        out_fd = self._output_fd()
+        in_fd = self._input_fd()
+
+        capture = capture_buffer_from_config(self.memory_budget)
+        master, slave = pty.openpty()
+        if out_fd is not None and os.isatty(out_fd):
+            copy_winsize(out_fd, slave)
+        try:
+            process = subprocess.Popen(
+                code_block,
+                shell=True,
+                stdin=slave,
+                stdout=slave,
+                stderr=slave,
+                start_new_session=True,
+                preexec_fn=set_controlling_tty,
+            )
+        except BaseException:
+            os.close(master)
+            raise
+        finally:
+            os.close(slave)
+
+        saved_attrs = None
+        previous_winch = None
+        try:
+            if in_fd is not None and os.isatty(in_fd):
+                saved_attrs = termios.tcgetattr(in_fd)
+                tty.setraw(in_fd)  # Ctrl+C, Ctrl+Z и т.д. обрабатывает терминал команды
+            # Обработчик сигнала можно установить только в главном потоке
+            if (out_fd is not None and os.isatty(out_fd)
+                    and threading.current_thread() is threading.main_thread()):
+                previous_winch = signal.signal(signal.SIGWINCH, lambda *_: copy_winsize(out_fd, master))
+
+            watched = [master] + ([in_fd] if in_fd is not None else [])
+            while True:
+                try:
+                    ready, _, _ = select.select(watched, [], [])
+                except InterruptedError:
+                    continue
+                if master in ready:
+                    try:
+                        data = os.read(master, CHUNK_SIZE)
+                    except OSError:  # EIO: команда закрыла терминал
+                        data = b""
+                    if not data:
+                        break
+                    if out_fd is not None:
+                        write_all(out_fd, data)
+                    else:
+                        self.output.write(data)
+                    capture.write(data)
+                if in_fd is not None and in_fd in ready:
+                    data = os.read(in_fd, 1024)
+                    if data:
+                        write_all(master, data)
+                    else:
+                        watched.remove(in_fd)  # Конец ввода
+            process.wait()
+        except BaseException as e:
+            # Ctrl+C вне raw-режима (ввод не из терминала) или ошибка: завершаем команду
+            logger.info(f"Terminating PTY process due to {type(e).__name__}")
+            try:
+                os.killpg(process.pid, signal.SIGTERM)
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                os.killpg(process.pid, signal.SIGKILL)
+                process.wait()
+            except ProcessLookupError:
+                process.wait()
+            raise
+        finally:
+            if saved_attrs is not None:
+                termios.tcsetattr(in_fd, termios.TCSADRAIN, saved_attrs)
+            if previous_winch is not None:
+                signal.signal(signal.SIGWINCH, previous_winch)
+            os.close(master)
+
+        text = clean_terminal_text(capture.text())
+        result = CapturedProcess(code_block, process.returncode, capture, stdout=text)
+        logger.debug(f"PTY execution result: return code {result.returncode}, output: {len(capture)} bytes")
+        return result
+
+
 # Исполнитель команд для Windows
 class WindowsCommandExecutor(CommandExecutor):
     """Исполнитель команд для Windows систем"""
@@ -250,10 +443,16 @@ class CommandExecutorFactory:
     
     @staticmethod
     @log_execution_time
-    def create_executor() -> CommandExecutor:
+    def create_executor(mode: Optional[str] = None, persistent: Optional[bool] = None) -> CommandExecutor:
         """
         Создает исполнитель команд в зависимости от текущей ОС
-        
+
+        Args:
+            mode: "pty", "pipe" или "auto" (PTY, если ввод и вывод — терминал);
+                по умолчанию — exec_mode из настроек
+            persistent: Выполнять в постоянной оболочке bash диалога (cd и export
+                сохраняются между командами); по умолчанию — persistent_shell из настроек
+
         Returns:
             CommandExecutor: Соответствующий исполнитель для текущей ОС
         """
@@ -261,23 +460,44 @@ class CommandExecutorFactory:
         if system == "windows":
             logger.info("Creating command executor for Windows")
             return WindowsCommandExecutor()
-        else:
-            logger.info(f"Creating command executor for {system} (using LinuxCommandExecutor)")
-            return LinuxCommandExecutor()
+        if mode is None:
+            mode = config.get("global", "exec_mode", "pipe")
+        if mode == "auto":
+            mode = "pty" if sys.stdin.isatty() and sys.stdout.isatty() else "pipe"
+        if persistent is None:
+            persistent = config.get("global", "persistent_shell", False)
+        if persistent:
+            from penguin_tamer.shell_session import SessionCommandExecutor, get_shell_session
+            session = get_shell_session(mode)
+            if session is not None:
+                logger.info(f"Creating command executor for {system} (using persistent {mode} shell)")
+                return SessionCommandExecutor(session)
+        if mode == "pty":
+            logger.info(f"Creating command executor for {system} (using PtyCommandExecutor)")
+            return PtyCommandExecutor()
+        logger.info(f"Creating command executor for {system} (using LinuxCommandExecutor)")
+        return LinuxCommandExecutor()
 
 
 @log_execution_time
-def execute_and_handle_result(console: Console, code: str) -> None:
+def execute_and_handle_result(console: Console, code: str, mode: Optional[str] = None,
+                              executor: Optional[CommandExecutor] = None) -> Optional[subprocess.CompletedProcess]:
     """
     Выполняет блок кода и обрабатывает результаты выполнения.
     
     Args:
         console (Console): Консоль для вывода
         code (str): Код для выполнения
+        mode (str): Режим выполнения: "pty", "pipe" или "auto" (по умолчанию — из настроек)
+        executor (CommandExecutor): Готовый исполнитель (вместо созданного по mode)
+
+    Returns:
+        Результат выполнения; None, если команда прервана (Ctrl+C) или не запустилась
     """
     # Получаем исполнитель для текущей ОС
     try:
-        executor = CommandExecutorFactory.create_executor()
+        if executor is None:
+            executor = CommandExecutorFactory.create_executor(mode)
         
         # Выполняем код через соответствующий исполнитель
         logger.debug("Starting code block execution...")
@@ -292,9 +512,11 @@ def execute_and_handle_result(console: Console, code: str) -> None:
             console.print(t("[dim]>>> Exit code: {code}[/dim]").format(code=exit_code))
             
             # Показываем итоговую сводку только если есть stderr или особые случаи
-            if process.stderr and not any("Error:" in line for line in process.stderr.split('\n')):
+            if (process.stderr and not executor.streams_stderr
+                    and not any("Error:" in line for line in process.stderr.split('\n'))):
                 logger.debug(f"Additional stderr ({len(process.stderr)} chars)")
                 console.print(t("[yellow]>>> Error:[/yellow]") + "\n" + process.stderr)
+            return process
                 
         except KeyboardInterrupt:
             # Перехватываем Ctrl+C во время выполнения команды
@@ -304,9 +526,11 @@ def execute_and_handle_result(console: Console, code: str) -> None:
     except Exception as e:
         logger.error(f"Code execution error: {e}", exc_info=True)
         console.print(t("[dim]Script execution error: {error}[/dim]").format(error=e))
+    return None
 
 
-def run_code_block(console: Console, code_blocks: list, idx: int) -> None:
+def run_code_block(console: Console, code_blocks: list, idx: int, mode: Optional[str] = None,
+                   executor: Optional[CommandExecutor] = None) -> Optional[subprocess.CompletedProcess]:
     """
     Печатает номер и содержимое блока, выполняет его и выводит результат.
     
@@ -314,6 +538,11 @@ def run_code_block(console: Console, code_blocks: list, idx: int) -> None:
         console (Console): Консоль для вывода
         code_blocks (list): Список блоков кода
         idx (int): Индекс выполняемого блока
+        mode (str): Режим выполнения: "pty", "pipe" или "auto" (по умолчанию — из настроек)
+        executor (CommandExecutor): Готовый исполнитель (вместо созданного по mode)
+
+    Returns:
+        Результат выполнения; None, если блока нет, команда прервана или не запустилась
     """
     logger.info(f"Starting code block #{idx}")
     
@@ -321,7 +550,7 @@ def run_code_block(console: Console, code_blocks: list, idx: int) -> None:
     if not (1 <= idx <= len(code_blocks)):
         logger.warning(f"Invalid block index: {idx}. Total blocks: {len(code_blocks)}")
         console.print(t("[yellow]Block #{idx} does not exist. Available blocks: 1 to {total}.[/yellow]").format(idx=idx, total=len(code_blocks)))
-        return
+        return None
     
     code = code_blocks[idx - 1]
     logger.debug(f"Block #{idx} content: {code[:100]}...")
@@ -330,4 +559,4 @@ def run_code_block(console: Console, code_blocks: list, idx: int) -> None:
     console.print(code)
     
     # Выполняем код и обрабатываем результат
-    execute_and_handle_result(console, code)
+    return execute_and_handle_result(console, code, mode, executor)
@@ -0,0 +1,291 @@
+"""
+Журнал диалогов на диске: `pt --resume [id]` продолжает прерванный диалог.
+
+Каждая сессия — файл sessions/<id>.jsonl, одна JSON-строка на сообщение
+(системный промпт не пишется: при возобновлении берется текущий).
+Файл только дописывается: новые сообщения хода записываются одним
+write и одним fsync в конце хода. Загрузка — один проход json по
+строкам, без YAML; оборванная при сбое последняя строка пропускается, а
+при возобновлении отрезается, чтобы новые сообщения не дописались в нее.
+
+Сессии, которые не менялись дольше compress_days, в фоне сжимаются
+в <id>.jsonl.gz, самые старые сверх max_sessions удаляются. Открытый
+журнал держит разделяемую блокировку (flock) своего файла, поэтому диалог,
+идущий в другом терминале, не сжимается и не удаляется; недавно
+менявшиеся файлы тоже не трогаются. Сжатый (и распакованный) файл сначала
+пишется во временный и заменяет целевой через os.replace: выход pt
+посреди сжатия не оставляет оборванного архива вместо сессии.
+"""
+
+import gzip
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from penguin_tamer.logger import logger
+
+SUFFIX = ".jsonl"
+GZ_SUFFIX = ".jsonl.gz"
+TMP_SUFFIX = ".tmp"  # Недописанные при сжатии и распаковке файлы (list_sessions их не видит)
+
+# Сессии, менявшиеся за это время (секунды), не удаляются: их может дописывать другой терминал
+RECENT_SECONDS = 3600
+
+
+def _session_id(path: Path) -> str:
+    return path.name[:-len(GZ_SUFFIX)] if path.name.endswith(GZ_SUFFIX) else path.name[:-len(SUFFIX)]
+
+
+def list_sessions(directory: Path) -> List[Path]:
+    """Файлы сессий, от новых к старым."""
+    try:
+        paths = [p for p in Path(directory).iterdir() if p.name.endswith((SUFFIX, GZ_SUFFIX))]
+    except OSError:
+        return []
+    return sorted(paths, key=lambda p: p.stat().st_mtime, reverse=True)
+
+
+def find_session(directory: Path, session_id: Optional[str] = None) -> Optional[Path]:
+    """Сессия по id (или его началу); без id — последняя."""
+    sessions = list_sessions(directory)
+    if not session_id:
+        return sessions[0] if sessions else None
+    matches = [p for p in sessions if _session_id(p).startswith(session_id)]
+    return matches[0] if matches else None
+
+
+def load_session(path: Path) -> List[Dict[str, str]]:
+    """Сообщения сессии (json по строкам, O(размер файла))."""
+    opener = gzip.open if path.name.endswith(GZ_SUFFIX) else open
+    with opener(path, "rb") as f:
+        data = f.read()
+    messages = []
+    for line in data.splitlines():
+        try:
+            messages.append(json.loads(line))
+        except ValueError:
+            logger.warning(f"Skipping damaged line in session {path.name}")
+    return messages
+
+
+def _truncate_torn_tail(path: Path, chunk_size: int = 64 * 1024) -> None:
+    """Отрезает оборванную последнюю строку (без \\n) — читается только конец файла."""
+    with open(path, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            cut = f.read(end - start).rfind(b"\n")
+            if cut >= 0:
+                end = start + cut + 1
+                break
+            end = start
+        if end < size:
+            logger.warning(f"Truncating damaged last line of session {path.name}")
+            f.truncate(end)
+
+
+def _write_atomically(target: Path, write, mtime: Optional[float] = None) -> None:
+    """Вызывает write(файл) для временного файла рядом с target и заменяет им target.
+
+    При ошибке (в том числе KeyboardInterrupt) временный файл удаляется, target не меняется.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix="." + target.name + ".", suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if mtime is not None:
+            os.utime(tmp_name, (mtime, mtime))
+        os.replace(tmp_name, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _decompress(path: Path, plain: Path) -> None:
+    """Распаковывает сжатую сессию в plain и удаляет сжатую.
+
+    Поврежденный архив (pt завершился посреди сжатия) не трогает уцелевший
+    исходный plain; если его нет, берется то, что удалось распаковать.
+    """
+    def write(dst):
+        with gzip.open(path, "rb") as src:
+            shutil.copyfileobj(src, dst)
+
+    try:
+        _write_atomically(plain, write)
+    except (EOFError, gzip.BadGzipFile) as e:
+        logger.warning(f"Compressed session {path.name} is damaged: {e}")
+        if not plain.exists():
+            def salvage(dst):
+                try:
+                    with gzip.open(path, "rb") as src:
+                        for chunk in iter(lambda: src.read1(64 * 1024), b""):  # Без ожидания полного блока
+                            dst.write(chunk)
+                except (EOFError, gzip.BadGzipFile):
+                    pass
+            _write_atomically(plain, salvage)
+    path.unlink()
+
+
+def _in_use(path: Path) -> bool:
+    """Файл сессии заблокирован открытым журналом (в том числе в другом процессе)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: блокировок нет
+        return False
+    try:
+        with open(path, "rb") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+class SessionJournal:
+    """Дописывает в файл сессии новые сообщения диалога.
+
+    Args:
+        path: Файл сессии (.jsonl)
+        written: Сколько сообщений списка messages уже в файле (системный промпт — 1)
+    """
+
+    def __init__(self, path: Path, written: int = 1) -> None:
+        self.path = Path(path)
+        self.id = _session_id(self.path)
+        self._written = written
+        self._lock_file = None  # Держит блокировку файла, пока журнал открыт
+
+    @classmethod
+    def create(cls, directory: Path) -> "SessionJournal":
+        """Новая сессия с id вида 20261016-201500-3fa2."""
+        session_id = time.strftime("%Y%m%d-%H%M%S-") + secrets.token_hex(2)
+        return cls(Path(directory) / (session_id + SUFFIX))
+
+    @classmethod
+    def resume(cls, path: Path) -> Tuple["SessionJournal", List[Dict[str, str]]]:
+        """Продолжение сессии: журнал и ее сообщения.
+
+        Сжатая сессия распаковывается, чтобы дописывать в нее; оборванная
+        последняя строка отрезается.
+        """
+        path = Path(path)
+        if path.name.endswith(GZ_SUFFIX):
+            plain = path.with_name(_session_id(path) + SUFFIX)
+            _decompress(path, plain)
+            path = plain
+        _truncate_torn_tail(path)
+        messages = load_session(path)
+        journal = cls(path, written=1 + len(messages))
+        journal._lock()
+        return journal, messages
+
+    def _lock(self) -> None:
+        """Берет разделяемую блокировку файла: compress_old_sessions его пропустит."""
+        if self._lock_file is not None:
+            return
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            return
+        lock_file = None
+        try:
+            lock_file = open(self.path, "ab")
+            fcntl.flock(lock_file, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except OSError as e:
+            logger.debug(f"Failed to lock session {self.id}: {e}")
+            if lock_file is not None:
+                lock_file.close()
+            return
+        self._lock_file = lock_file
+
+    def close(self) -> None:
+        """Снимает блокировку файла (диалог завершен)."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def sync(self, messages: List[Dict[str, str]]) -> None:
+        """Конец хода: дописывает сообщения, которых еще нет в файле, и делает fsync."""
+        new = messages[self._written:]
+        if not new:
+            return
+        data = "".join(json.dumps(m, ensure_ascii=False) + "\n" for m in new).encode("utf-8")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._lock()
+            with open(self.path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error(f"Failed to write session journal: {e}")
+            return
+        self._written = len(messages)
+
+
+def compress_old_sessions(directory: Path, compress_days: float = 7, max_sessions: int = 200,
+                          keep: Optional[Path] = None) -> None:
+    """Сжимает давно не менявшиеся сессии и удаляет самые старые сверх max_sessions.
+
+    Открытые журналы (файл заблокирован) и недавно менявшиеся файлы пропускаются.
+    """
+    sessions = list_sessions(directory)
+    now = time.time()
+    try:
+        leftovers = [p for p in Path(directory).iterdir() if p.name.endswith(TMP_SUFFIX)]
+    except OSError:
+        leftovers = []
+    for path in leftovers:  # Остались от прерванного сжатия
+        try:
+            if path.stat().st_mtime < now - RECENT_SECONDS:
+                path.unlink()
+        except OSError:
+            pass
+    for path in sessions[max_sessions:]:
+        try:
+            if path == keep or path.stat().st_mtime > now - RECENT_SECONDS or _in_use(path):
+                continue
+            path.unlink()
+        except OSError as e:
+            logger.debug(f"Failed to remove session {path.name}: {e}")
+    cutoff = now - max(compress_days * 86400, RECENT_SECONDS)
+    for path in sessions[:max_sessions]:
+        if path == keep or not path.name.endswith(SUFFIX):
+            continue
+        try:
+            mtime = path.stat().st_mtime
+            if mtime > cutoff or _in_use(path):
+                continue
+            def write(dst, path=path):
+                with open(path, "rb") as src, gzip.GzipFile(fileobj=dst, mode="wb") as gz:
+                    shutil.copyfileobj(src, gz)
+
+            # Порядок сессий по времени сохраняется
+            _write_atomically(path.with_name(path.name + ".gz"), write, mtime)
+            path.unlink()
+        except OSError as e:
+            logger.debug(f"Failed to compress session {path.name}: {e}")
+
+
+def compress_in_background(directory: Path, compress_days: float, max_sessions: int,
+                           keep: Optional[Path] = None) -> threading.Thread:
+    """Запускает compress_old_sessions в фоновом потоке."""
+    thread = threading.Thread(target=compress_old_sessions, args=(directory, compress_days, max_sessions, keep),
+                              name="session-compress", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,438 @@
+"""
+Постоянная оболочка bash для блоков кода и команд с точкой.
+
+Без нее каждая команда запускается в новом процессе sh (subprocess с
+shell=True): fork/exec и запуск оболочки на каждую команду, а cd, export
+и source не переживают команду. ShellSession держит один процесс bash на
+весь диалог и передает ему команды по очереди:
+
+  - команды идут в stdin bash (bash -s) по одной строке: текст команды
+    передается в кавычках $'...' и выполняется через eval, поэтому
+    синтаксическая ошибка в блоке не ломает разбор следующих команд;
+    stdin самой команды — терминал пользователя (в режиме pty —
+    псевдотерминал), а не канал команд;
+  - после команды bash пишет в отдельный канал статуса строку
+    «метка номер код каталог»: код завершения не смешивается с выводом
+    команды, а номер связывает строку с командой; метка (случайная на
+    сессию) отделяет строки статуса от всего остального;
+  - Ctrl+C прерывает только текущую команду: SIGINT получают команда и
+    bash, ловушка INT в bash выходит из всех циклов, включая цикл-обертку
+    вокруг eval (остаток блока не выполняется, даже если Ctrl+C пришел
+    внутри цикла блока; код 130), а оболочка остается жива;
+  - если bash завершился (exit в блоке, kill), следующая команда запускает
+    новый в последнем известном каталоге.
+
+Режим "pipe" — вывод через каналы с пересылкой по мере поступления, как в
+LinuxCommandExecutor; режим "pty" — bash в псевдотерминале, как в
+PtyCommandExecutor (цвета, интерактивные программы).
+"""
+
+import atexit
+import codecs
+import functools
+import os
+import secrets
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from penguin_tamer.capture_buffer import CHUNK_SIZE, capture_buffer_from_config
+from penguin_tamer.logger import logger, log_execution_time
+from penguin_tamer.script_executor import CapturedProcess, CommandExecutor
+from penguin_tamer.terminal import clean_terminal_text, copy_winsize, set_controlling_tty, write_all
+
+# Выполняется один раз при запуске bash. Ловушка INT выходит из всех циклов
+# (и циклов блока, и обертки вокруг eval) и отмечает, что команда прервана
+_PRELUDE = """trap '__pt_int=1; break 1000 2>/dev/null' INT
+__pt_done() {{ [ -n "$__pt_int" ] && set -- "$1" 130; printf '{token} %s %s %s\\n' "$1" "$2" "$PWD" >&{status_fd}; }}
+"""
+
+# Сколько ждать завершения команды после Ctrl+C, прежде чем убить оболочку
+INTERRUPT_TIMEOUT = 5.0
+
+
+def _dup_stdin() -> int:
+    """Копия stdin для команд (в режиме pipe); /dev/null, если stdin закрыт."""
+    try:
+        return os.dup(0)
+    except OSError:
+        return os.open(os.devnull, os.O_RDONLY)
+
+
+def quote(code: str) -> str:
+    """Текст команды в кавычках $'...' для bash (одна строка)."""
+    escaped = code.replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n").replace("\r", "\\r")
+    return "$'" + escaped.replace("\0", "") + "'"
+
+
+class ShellSession:
+    """Долгоживущий процесс bash, в котором команды выполняются по очереди.
+
+    Args:
+        terminal: "pipe" или "pty"
+        shell: Путь к bash
+        memory_budget: Бюджет памяти на сохранение вывода канала, байт
+            (по умолчанию capture_memory_kb из настроек)
+        stdout: Куда пересылать stdout в режиме pipe (по умолчанию sys.stdout)
+        stderr: Куда пересылать stderr в режиме pipe (по умолчанию sys.stderr)
+        output: Куда писать вывод в режиме pty: файловый дескриптор или объект
+            с write(bytes) (по умолчанию — stdout процесса)
+        input_fd: Откуда читать ввод для команды в режиме pty
+            (по умолчанию stdin, если это терминал)
+        cwd: Начальный каталог (по умолчанию текущий)
+    """
+
+    def __init__(self, terminal: str = "pipe", shell: str = "bash", memory_budget: Optional[int] = None,
+                 stdout=None, stderr=None, output=None, input_fd: Optional[int] = None,
+                 cwd: Optional[str] = None) -> None:
+        self.terminal = terminal
+        self.shell = shell
+        self.memory_budget = memory_budget
+        self.stdout = stdout
+        self.stderr = stderr
+        self.output = output
+        self.input_fd = input_fd
+        self.cwd = cwd or os.getcwd()
+        self.starts = 0  # Сколько раз запускался bash (больше 1 — были перезапуски)
+        self._token = "__PT_DONE_" + secrets.token_hex(8)
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._process: Optional[subprocess.Popen] = None
+        self._cmd_w: Optional[int] = None
+        self._status_r: Optional[int] = None
+        self._status_fd = 0
+        self._stdin_fd = 0
+        self._status_buf = b""
+        self._master: Optional[int] = None
+        self._outputs: List[int] = []
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._process.pid if self._process is not None else None
+
+    def __enter__(self) -> "ShellSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        self.close()
+        cmd_r, self._cmd_w = os.pipe()
+        self._status_r, status_w = os.pipe()
+        self._status_buf = b""
+        if self.terminal == "pty":
+            import pty
+            self._master, command_stdin = pty.openpty()
+        else:
+            command_stdin = _dup_stdin()
+        # Номера дескрипторов в bash те же (pass_fds)
+        self._status_fd, self._stdin_fd = status_w, command_stdin
+        argv = [self.shell, "--noprofile", "--norc", "-s"]
+        kwargs = {"stdin": cmd_r, "pass_fds": (status_w, command_stdin), "start_new_session": True,
+                  "cwd": self.cwd if os.path.isdir(self.cwd) else None}
+        try:
+            if self.terminal == "pty":
+                self._process = subprocess.Popen(argv, stdout=command_stdin, stderr=command_stdin,
+                                                 preexec_fn=functools.partial(set_controlling_tty, 1), **kwargs)
+                self._outputs = [self._master]
+            else:
+                self._process = subprocess.Popen(argv, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+                self._outputs = [self._process.stdout.fileno(), self._process.stderr.fileno()]
+        finally:
+            for fd in (cmd_r, status_w, command_stdin):
+                os.close(fd)
+        for fd in self._outputs:
+            os.set_blocking(fd, False)
+        self.starts += 1
+        logger.info(f"Started persistent shell {self.shell} (pid {self._process.pid}, {self.terminal}) in {self.cwd}")
+        write_all(self._cmd_w, _PRELUDE.format(status_fd=status_w, token=self._token).encode())
+
+    @log_execution_time
+    def run(self, code: str) -> CapturedProcess:
+        """Выполняет команду (блок кода) в оболочке и возвращает результат.
+
+        Raises:
+            KeyboardInterrupt: Ctrl+C (не в raw-режиме терминала): команда прервана, оболочка жива
+        """
+        with self._lock:
+            if not self.alive:
+                if self._process is not None:
+                    logger.info(f"Shell exited with code {self._process.returncode}, restarting in {self.cwd}")
+                self._start()
+            self._seq += 1
+            # Цикл из одного прохода: break 1000 из ловушки INT прерывает остаток блока
+            line = (f"__pt_int=; __pt_cmd={quote(code)}; __pt_status=130; for __pt_once in 1; do "
+                    f"eval \"$__pt_cmd\" 0<&{self._stdin_fd} {self._stdin_fd}<&- {self._status_fd}>&-; "
+                    f"__pt_status=$?; break; done; __pt_done {self._seq} $__pt_status\n")
+            try:
+                write_all(self._cmd_w, line.encode("utf-8", errors="surrogateescape"))
+            except BrokenPipeError:  # bash завершился между командами
+                self._start()
+                write_all(self._cmd_w, line.encode("utf-8", errors="surrogateescape"))
+            return self._collect(code, self._seq)
+
+    def _collect(self, code: str, seq: int) -> CapturedProcess:
+        """Пересылает вывод команды, пока не придет ее статус."""
+        captures = [capture_buffer_from_config(self.memory_budget) for _ in self._outputs]
+        forward = self._forwarders()
+        in_fd = self._terminal_input() if self.terminal == "pty" else None
+        restore = self._enter_terminal(in_fd) if self.terminal == "pty" else None
+        interrupted = False
+        deadline = None
+        try:
+            while True:
+                try:
+                    returncode = self._pump(seq, captures, forward, in_fd, deadline)
+                    break
+                except KeyboardInterrupt:
+                    # Ctrl+C вне raw-режима: прерываем команду и ждем ее статус
+                    logger.info("Interrupting command in persistent shell due to KeyboardInterrupt")
+                    interrupted = True
+                    self._signal(signal.SIGINT)
+                    if deadline is None:
+                        deadline = time.monotonic() + INTERRUPT_TIMEOUT
+        finally:
+            if restore is not None:
+                restore()
+        for index, send in enumerate(forward):
+            send(index, b"", final=True)
+
+        if self.terminal == "pty":
+            text = clean_terminal_text(captures[0].text())
+            result = CapturedProcess(code, returncode, captures[0], stdout=text)
+        else:
+            result = CapturedProcess(code, returncode, captures[0], captures[1])
+        logger.debug(f"Persistent shell result: return code {returncode}, output: "
+                     f"{sum(len(c) for c in captures)} bytes")
+        if interrupted:
+            raise KeyboardInterrupt
+        return result
+
+    def _pump(self, seq: int, captures, forward, in_fd: Optional[int], deadline: Optional[float]) -> int:
+        watched = [self._status_r, *self._outputs] + ([in_fd] if in_fd is not None else [])
+        while True:
+            if deadline is not None and time.monotonic() > deadline:
+                logger.warning("Command did not stop after Ctrl+C, killing the shell")
+                self._signal(signal.SIGKILL)
+                return self._finish_dead(captures, forward)
+            try:
+                ready, _, _ = select.select(watched, [], [], 0.2)
+            except InterruptedError:
+                continue
+            for index, fd in enumerate(self._outputs):
+                if fd in ready and not self._read(index, captures, forward):
+                    watched.remove(fd)  # Конец вывода: bash завершился
+            if in_fd is not None and in_fd in ready:
+                data = os.read(in_fd, 1024)
+                if data:
+                    write_all(self._master, data)
+                else:
+                    watched.remove(in_fd)  # Конец ввода
+            if self._status_r in ready:
+                data = os.read(self._status_r, 4096)
+                if not data:
+                    return self._finish_dead(captures, forward)
+                self._status_buf += data
+                returncode = self._parse_status(seq)
+                if returncode is not None:
+                    self._drain(captures, forward)
+                    return returncode
+            elif not ready and self._process.poll() is not None:
+                # bash завершился, а канал статуса держит его фоновый процесс
+                return self._finish_dead(captures, forward)
+
+    def _read(self, index: int, captures, forward) -> bool:
+        """Читает доступный вывод; False — конец вывода."""
+        try:
+            data = os.read(self._outputs[index], CHUNK_SIZE)
+        except BlockingIOError:
+            return True
+        except OSError:  # EIO: псевдотерминал закрыт
+            return False
+        if data:
+            captures[index].write(data)
+            forward[index](index, data)
+        return bool(data)
+
+    def _drain(self, captures, forward) -> None:
+        """Дочитывает вывод, записанный командой до ее завершения."""
+        for index in range(len(self._outputs)):
+            while self._read(index, captures, forward):
+                try:
+                    if not select.select([self._outputs[index]], [], [], 0)[0]:
+                        break
+                except (OSError, ValueError):
+                    break
+
+    def _finish_dead(self, captures, forward) -> int:
+        """bash завершился во время команды: ее код — код завершения bash."""
+        try:
+            self._process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._signal(signal.SIGKILL)
+            self._process.wait()
+        self._drain(captures, forward)
+        return self._process.returncode
+
+    def _parse_status(self, seq: int) -> Optional[int]:
+        *lines, self._status_buf = self._status_buf.split(b"\n")
+        for line in lines:
+            parts = line.decode("utf-8", errors="surrogateescape").split(" ", 3)
+            if len(parts) == 4 and parts[0] == self._token and parts[1] == str(seq):
+                self.cwd = parts[3]
+                return int(parts[2])
+        return None
+
+    def _forwarders(self) -> list:
+        """Функции пересылки вывода (index, data, final=False) по каналам."""
+        if self.terminal == "pty":
+            out_fd = self._output_fd()
+
+            def send_raw(index, data, final=False):
+                if not data:
+                    return
+                if out_fd is not None:
+                    write_all(out_fd, data)
+                else:
+                    self.output.write(data)
+            return [send_raw]
+
+        sinks = [sys.stdout if self.stdout is None else self.stdout,
+                 sys.stderr if self.stderr is None else self.stderr]
+        decoders = [codecs.getincrementaldecoder("utf-8")(errors="replace") for _ in sinks]
+
+        def send_text(index, data, final=False):
+            text = decoders[index].decode(data, final=final)
+            if text:
+                sinks[index].write(text)
+                sinks[index].flush()
+        return [send_text, send_text]
+
+    def _output_fd(self) -> Optional[int]:
+        if self.output is None:
+            sys.stdout.flush()  # Уже выведенный текст — раньше вывода команды
+            return sys.stdout.fileno()
+        return self.output if isinstance(self.output, int) else None
+
+    def _terminal_input(self) -> Optional[int]:
+        if self.input_fd is not None:
+            return self.input_fd
+        try:
+            return sys.stdin.fileno() if sys.stdin.isatty() else None
+        except (AttributeError, ValueError, OSError):
+            return None
+
+    def _enter_terminal(self, in_fd: Optional[int]):
+        """Raw-режим ввода и размер окна для команды в PTY; возвращает функцию восстановления."""
+        import termios
+        import tty
+
+        out_fd = self._output_fd()
+        saved_attrs = None
+        previous_winch = None
+        if out_fd is not None and os.isatty(out_fd):
+            copy_winsize(out_fd, self._master)
+            if threading.current_thread() is threading.main_thread():
+                master = self._master
+                previous_winch = signal.signal(signal.SIGWINCH, lambda *_: copy_winsize(out_fd, master))
+        if in_fd is not None and os.isatty(in_fd):
+            saved_attrs = termios.tcgetattr(in_fd)
+            tty.setraw(in_fd)  # Ctrl+C, Ctrl+Z и т.д. обрабатывает терминал команды
+
+        def restore():
+            if saved_attrs is not None:
+                termios.tcsetattr(in_fd, termios.TCSADRAIN, saved_attrs)
+            if previous_winch is not None:
+                signal.signal(signal.SIGWINCH, previous_winch)
+        return restore
+
+    def _signal(self, signum: int) -> None:
+        """Сигнал группе процессов bash (bash и текущая команда)."""
+        try:
+            os.killpg(self._process.pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def close(self) -> None:
+        """Завершает bash и закрывает каналы."""
+        if self._cmd_w is not None:
+            os.close(self._cmd_w)  # Конец скрипта: bash завершается сам
+            self._cmd_w = None
+        if self._process is not None and self._process.poll() is None:
+            try:
+                self._process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self._signal(signal.SIGKILL)
+                self._process.wait()
+        for fd in (self._status_r, self._master):
+            if fd is not None:
+                os.close(fd)
+        self._status_r = self._master = None
+        if self._process is not None:
+            for pipe in (self._process.stdout, self._process.stderr):
+                if pipe is not None:
+                    pipe.close()
+        self._outputs = []
+
+
+class SessionCommandExecutor(CommandExecutor):
+    """Исполнитель команд в постоянной оболочке диалога (см. ShellSession)."""
+
+    streams_stderr = True
+
+    def __init__(self, session: ShellSession) -> None:
+        self.session = session
+
+    def execute(self, code_block: str) -> CapturedProcess:
+        """Выполняет bash-команды в постоянной оболочке"""
+        logger.debug(f"Executing bash command in persistent shell: {code_block[:80]}...")
+        return self.session.run(code_block)
+
+
+# Оболочка диалога: одна на процесс pt
+_sessions: Dict[str, ShellSession] = {}
+
+
+def get_shell_session(terminal: str) -> Optional[ShellSession]:
+    """Постоянная оболочка для режима terminal; None — bash не найден.
+
+    При смене режима новая оболочка начинает в каталоге предыдущей.
+    """
+    session = _sessions.get(terminal)
+    if session is not None:
+        return session
+    shell = shutil.which("bash")
+    if shell is None:
+        logger.warning("bash not found, persistent shell disabled")
+        return None
+    cwd = current_cwd()
+    close_shell_sessions()
+    session = _sessions[terminal] = ShellSession(terminal, shell=shell, cwd=cwd)
+    return session
+
+
+def current_cwd() -> Optional[str]:
+    """Текущий каталог постоянной оболочки (после cd в блоках); None — оболочки нет."""
+    for session in _sessions.values():
+        return session.cwd
+    return None
+
+
+def close_shell_sessions() -> None:
+    """Завершает постоянные оболочки (при выходе из pt)."""
+    for session in _sessions.values():
+        session.close()
+    _sessions.clear()
+
+
+atexit.register(close_shell_sessions)
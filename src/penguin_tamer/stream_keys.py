@@ -0,0 +1,181 @@
+"""
+Запуск блоков кода по цифровой клавише, пока ответ еще печатается.
+
+В диалоге ask_stream сообщает о каждом закрытом блоке кода. Если включена
+опция stream_run_keys, слушатель клавиатуры (POSIX, терминал в режиме
+cbreak) ловит нажатие цифры и запускает блок с этим номером в фоновом
+потоке; остальная часть ответа продолжает печататься. Блок всегда
+выполняется в новом процессе с каналами (не в PTY, какой бы exec_mode ни
+был задан): терминал остается в руках Live. Вывод блока собирается в
+буфер и печатается, когда ответ допечатан, чтобы не смешиваться с
+областью отрисовки. Пока блок выполняется, слушатель на паузе и терминал
+в исходном режиме: ввод с клавиатуры достается команде.
+"""
+
+import io
+import os
+import sys
+import threading
+from typing import Callable, List, Optional
+
+from penguin_tamer.i18n import t
+from penguin_tamer.logger import logger
+
+try:
+    import select
+    import termios
+    import tty
+except ImportError:  # Windows
+    termios = None
+
+
+class KeyListener:
+    """Фоновое чтение нажатий клавиш без Enter и эха (только POSIX-терминал)."""
+
+    def __init__(self, on_key: Callable[[str], None]) -> None:
+        self._on_key = on_key
+        self._stop = threading.Event()
+        self._paused = threading.Event()
+        self._reading = threading.Lock()  # Удерживается на время select и чтения
+        self._thread: Optional[threading.Thread] = None
+        self._fd: Optional[int] = None
+        self._saved = None
+
+    def start(self) -> bool:
+        """Включает режим cbreak и чтение; False, если терминал не поддерживается."""
+        if termios is None or not sys.stdin.isatty():
+            return False
+        self._fd = sys.stdin.fileno()
+        self._saved = termios.tcgetattr(self._fd)
+        tty.setcbreak(self._fd)  # Ctrl+C по-прежнему приходит как SIGINT
+        self._thread = threading.Thread(target=self._run, name="stream-keys", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            key = ""
+            with self._reading:
+                if self._paused.is_set():
+                    ready = []
+                else:
+                    ready, _, _ = select.select([self._fd], [], [], 0.1)
+                if ready:
+                    key = os.read(self._fd, 1).decode("utf-8", errors="ignore")
+            if key:
+                self._on_key(key)
+            elif self._paused.is_set():
+                self._stop.wait(0.1)
+
+    def pause(self) -> None:
+        """Перестает читать ввод и возвращает терминал в исходный режим (ввод — команде)."""
+        self._paused.set()
+        with self._reading:  # Дожидаемся завершения текущего select
+            pass
+        if self._saved is not None:
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved)
+
+    def resume(self) -> None:
+        """Снова читает нажатия клавиш в режиме cbreak."""
+        if self._stop.is_set():
+            return
+        if self._saved is not None:
+            tty.setcbreak(self._fd)
+        self._paused.clear()
+
+    def stop(self) -> None:
+        """Останавливает чтение и возвращает терминал в исходный режим."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._saved is not None:
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved)
+            self._saved = None
+
+
+def run_block_with_pipes(console, blocks: List[str], index: int):
+    """Выполняет блок в новом процессе bash с каналами; весь вывод — в console."""
+    from penguin_tamer.script_executor import LinuxCommandExecutor, run_code_block
+    executor = LinuxCommandExecutor(stdout=console.file, stderr=console.file)
+    return run_code_block(console, blocks, index, executor=executor)
+
+
+class StreamBlockRunner:
+    """Номера готовых блоков кода и их запуск по нажатию цифры.
+
+    Args:
+        console: Консоль для подсказок и вывода блоков (после ответа)
+        run_block: Функция запуска (console, blocks, index), как run_code_block
+            (по умолчанию run_block_with_pipes); получает консоль с буфером
+    """
+
+    def __init__(self, console, run_block: Optional[Callable[[object, List[str], int], object]] = None) -> None:
+        self.console = console
+        self.blocks: List[str] = []
+        self._run_block = run_block or run_block_with_pipes
+        self._listener = KeyListener(self.on_key)
+        self._listening = False
+        self._worker: Optional[threading.Thread] = None
+        self._outputs: List[str] = []  # Вывод выполненных блоков, печатается после ответа
+
+    def __enter__(self) -> "StreamBlockRunner":
+        self._listening = self._listener.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            self.wait()  # Терминал возвращается в исходный режим, когда блок уже завершен
+        finally:
+            self._listener.stop()
+            self.flush()
+
+    def on_code_block(self, index: int, code: str) -> None:
+        """Регистрирует блок, закрытый в потоке ответа."""
+        self.blocks.append(code)
+        logger.debug(f"Code block #{index} detected while streaming")
+        if self._listening and index <= 9:
+            self.console.print(t("[dim]Code block #{idx} is ready: press {idx} to run it[/dim]").format(idx=index))
+
+    def on_key(self, key: str) -> None:
+        """Цифра — номер блока; одновременно выполняется только один блок."""
+        if not key.isdigit() or not 1 <= int(key) <= len(self.blocks):
+            return
+        if self._worker is not None and self._worker.is_alive():
+            return
+        blocks = list(self.blocks)
+        # Пауза — до запуска блока (on_key вызывается из потока слушателя): ни одно
+        # нажатие, предназначенное команде, слушатель уже не прочитает
+        self._listener.pause()
+        self._worker = threading.Thread(
+            target=self._run_paused, args=(blocks, int(key)), name="stream-block", daemon=True)
+        self._worker.start()
+
+    def _buffer_console(self):
+        from rich.console import Console
+        return Console(file=io.StringIO(), force_terminal=self.console.is_terminal,
+                       color_system=self.console.color_system, width=self.console.width)
+
+    def _run_paused(self, blocks: List[str], index: int) -> None:
+        self.console.print(t("[dim]Running block #{idx}, its output follows the answer[/dim]").format(idx=index))
+        buffered = self._buffer_console()
+        try:
+            process = self._run_block(buffered, blocks, index)
+            if hasattr(process, "close"):
+                process.close()  # Результат блока в вопрос не прикладывается
+        finally:
+            self._outputs.append(buffered.file.getvalue())
+            self._listener.resume()
+
+    def flush(self) -> None:
+        """Печатает вывод выполненных блоков (когда Live уже остановлен)."""
+        outputs, self._outputs = self._outputs, []
+        for text in outputs:
+            self.console.file.write(text)
+        self.console.file.flush()
+
+    def wait(self) -> None:
+        """Дожидается запущенного блока (перед следующим вводом)."""
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
@@ -0,0 +1,194 @@
+"""
+Конвейер потокового режима: чтение сети отдельно от отрисовки.
+
+StreamReader в фоновом потоке вычитывает поток OpenAI на полной скорости
+и складывает текст в буфер. Отрисовка забирает накопленный текст не чаще
+refresh_per_second раз в секунду, поэтому медленный терминал не тормозит
+чтение HTTP-потока, а быстрый провайдер не ждет искусственных задержек.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+
+from penguin_tamer.logger import logger
+
+
+class StreamTimings:
+    """Замеры одного запроса: время до первого токена (TTFT) и полное время."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.first_token: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.chunks = 0
+        self.render = 0.0  # Время отрисовки ответа в терминале (секунды)
+
+    def mark_first_token(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def mark_finished(self) -> None:
+        self.finished = time.perf_counter()
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """Время до первого токена в секундах."""
+        if self.first_token is None:
+            return None
+        return self.first_token - self.started
+
+    @property
+    def total(self) -> Optional[float]:
+        """Полное время запроса в секундах."""
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def __str__(self) -> str:
+        ttft = f"{self.ttft:.3f}s" if self.ttft is not None else "n/a"
+        total = f"{self.total:.3f}s" if self.total is not None else "n/a"
+        return f"TTFT {ttft}, total {total}, chunks {self.chunks}"
+
+
+class StreamReader(threading.Thread):
+    """Фоновый поток, который вычитывает чанки OpenAI в буфер.
+
+    Основной поток ждет первый токен через wait_first_token() и затем
+    периодически забирает накопленный текст через drain().
+    """
+
+    def __init__(self, stream: Optional[Iterable], timings: StreamTimings,
+                 notify: Optional[threading.Event] = None) -> None:
+        super().__init__(name="stream-reader", daemon=True)
+        self.stream = stream
+        self.timings = timings
+        self.notify = notify  # Общее событие: первый токен или конец потока
+        self.on_close: Optional[Callable[[], None]] = None  # Закрытие потока вместо stream.close()
+        self.error: Optional[BaseException] = None
+        self.usage = None  # usage из последнего чанка (stream_options.include_usage)
+        self.done = threading.Event()
+        self._first_token = threading.Event()
+        self._lock = threading.Lock()
+        self._parts: List[str] = []
+
+    def run(self) -> None:
+        try:
+            for chunk in self.stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self.usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                with self._lock:
+                    self._parts.append(text)
+                self.timings.chunks += 1
+                if not self._first_token.is_set():
+                    self.timings.mark_first_token()
+                    self._set_first_token()
+        except BaseException as e:  # Передаем ошибку в основной поток
+            self.error = e
+        finally:
+            self.timings.mark_finished()
+            self.done.set()
+            self._set_first_token()
+
+    def _set_first_token(self) -> None:
+        self._first_token.set()
+        if self.notify is not None:
+            self.notify.set()
+
+    def wait_first_token(self) -> None:
+        """Блокирует до первого токена или до завершения потока."""
+        # Ожидание с таймаутом, чтобы Ctrl+C доходил до основного потока
+        while not self._first_token.wait(0.1):
+            pass
+
+    def drain(self) -> str:
+        """Возвращает текст, пришедший с момента предыдущего вызова."""
+        with self._lock:
+            parts, self._parts = self._parts, []
+        return "".join(parts)
+
+    def raise_error(self) -> None:
+        """Пробрасывает ошибку чтения в вызывающий поток, если она была."""
+        if self.error is not None:
+            raise self.error
+
+    def close(self) -> None:
+        """Прерывает чтение (Ctrl+C): закрывает HTTP-ответ, соединение уходит из пула.
+
+        Блокированное чтение в фоновом потоке завершается ошибкой закрытого
+        соединения; она уже не пробрасывается.
+        """
+        close = self.on_close or getattr(self.stream, "close", None)
+        if close is None:
+            return
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Failed to close stream: {e}")
+
+
+class AsyncStreamReader:
+    """Асинхронный аналог StreamReader для AsyncOpenRouterClient.
+
+    Вычитывает поток AsyncOpenAI в задаче того же event loop, что и
+    отрисовка; интерфейс (drain, done, wait_first_token) совпадает.
+    """
+
+    def __init__(self, stream, timings: StreamTimings) -> None:
+        self.stream = stream
+        self.timings = timings
+        self.usage = None
+        self.done = asyncio.Event()
+        self._first_token = asyncio.Event()
+        self._parts: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        try:
+            async for chunk in self.stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self.usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                self._parts.append(text)
+                self.timings.chunks += 1
+                if not self._first_token.is_set():
+                    self.timings.mark_first_token()
+                    self._first_token.set()
+        finally:
+            self.timings.mark_finished()
+            self.done.set()
+            self._first_token.set()
+
+    async def wait_first_token(self) -> None:
+        """Ждет первый токен или завершение потока."""
+        await self._first_token.wait()
+
+    def drain(self) -> str:
+        """Возвращает текст, пришедший с момента предыдущего вызова."""
+        parts, self._parts = self._parts, []
+        return "".join(parts)
+
+    async def join(self) -> None:
+        """Дожидается завершения чтения и пробрасывает его ошибку."""
+        if self._task is not None:
+            await self._task
+
+    async def aclose(self) -> None:
+        """Отменяет чтение и закрывает поток (освобождает соединение)."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        await self.stream.close()
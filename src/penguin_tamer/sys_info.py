@@ -50,5 +50,28 @@ def get_system_info_text() -> str:
 """
     return info_text.strip()
 
+def get_environment_context() -> str:
+    """Описание окружения для системного промпта.
+
+    Только то, что не меняется между запусками (без времени, каталога и IP),
+    чтобы системный промпт оставался кэшируемым префиксом запроса, и без
+    личных данных (имени пользователя, хоста): промпт уходит провайдеру LLM.
+    """
+    shell_exec = os.environ.get('SHELL') or os.environ.get('COMSPEC') or ''
+    shell_name = os.path.basename(shell_exec) if shell_exec else 'unknown'
+    os_name = f"{platform.system()} {platform.release()}"
+    if hasattr(platform, "freedesktop_os_release"):
+        try:
+            os_name = f"{platform.freedesktop_os_release().get('PRETTY_NAME', os_name)} ({os_name})"
+        except OSError:
+            pass
+    return (
+        "User environment:\n"
+        f"- OS: {os_name}\n"
+        f"- Architecture: {platform.machine()}\n"
+        f"- Shell: {shell_name}"
+    )
+
+
 if __name__ == "__main__":
     print(get_system_info_text())
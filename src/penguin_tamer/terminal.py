@@ -0,0 +1,65 @@
+"""
+Общие помощники для работы с терминалом и псевдотерминалом.
+
+Очистка вывода от управляющих последовательностей (конвейер, выборка
+вывода команд для LLM, журнал PTY-исполнителей) и операции с
+псевдотерминалом, которые нужны и PtyCommandExecutor, и ShellSession.
+"""
+
+import os
+import re
+
+# Управляющие последовательности терминала (цвета, перемещение курсора, выбор кодировки)
+ANSI_ESCAPE = re.compile(rb"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b\n]*(?:\x07|\x1b\\)|\x1b[()*+][0-9A-Za-z]|\x1b[@-Z\\-_]")
+# Перерисованная часть строки (до последнего \r) и \r в конце строки
+_CARRIAGE_RETURN = re.compile(rb"^[^\n]*\r(?=[^\r\n])|\r+$", re.MULTILINE)
+
+
+def clean_terminal_output(data: bytes) -> bytes:
+    """Вывод терминала без управляющих последовательностей и перерисовок.
+
+    Из строки с возвратами каретки (индикаторы прогресса) остается то, что
+    было на экране последним. data — целые строки: обрабатывается сразу
+    весь блок, а не каждая строка отдельно.
+    """
+    if b"\x1b" in data:
+        data = ANSI_ESCAPE.sub(b"", data)
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n")  # Обычный конец строки в PTY — без регулярного выражения
+        if b"\r" in data:
+            data = _CARRIAGE_RETURN.sub(b"", data)
+    return data
+
+
+def clean_terminal_text(text: str) -> str:
+    """clean_terminal_output для уже декодированного текста."""
+    return clean_terminal_output(text.encode("utf-8", errors="surrogateescape")).decode(
+        "utf-8", errors="surrogateescape")
+
+
+def write_all(fd: int, data) -> None:
+    """Записывает в fd все данные (os.write может записать только часть)."""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def copy_winsize(source_fd: int, target_fd: int) -> None:
+    """Размер окна терминала source_fd передается псевдотерминалу target_fd."""
+    import fcntl
+    import termios
+    try:
+        size = fcntl.ioctl(source_fd, termios.TIOCGWINSZ, b"\0" * 8)
+        fcntl.ioctl(target_fd, termios.TIOCSWINSZ, size)
+    except OSError:
+        pass
+
+
+def set_controlling_tty(fd: int = 0) -> None:
+    """В дочернем процессе (после setsid): псевдотерминал fd становится управляющим.
+
+    Тогда sudo может спросить пароль, а Ctrl+C доходит до команды.
+    """
+    import fcntl
+    import termios
+    fcntl.ioctl(fd, termios.TIOCSCTTY, 0)
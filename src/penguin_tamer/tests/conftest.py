@@ -1,5 +1,116 @@
+import asyncio
+import io
+import logging
 import sys
+import threading
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
 
 ROOT = Path(__file__).resolve().parents[1]  # корень проекта
-sys.path.insert(0, str(ROOT / "src/ai-bash"))
\ No newline at end of file
+sys.path.insert(0, str(ROOT / "src/ai-bash"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_metrics(tmp_path, monkeypatch):
+    """Метрики тестовых запросов пишутся во временный каталог, а не в журнал пользователя."""
+    from penguin_tamer.metrics import metrics
+    monkeypatch.setattr(metrics, "path", tmp_path / "metrics.jsonl")
+
+
+def _chunk(text=None, usage=None):
+    """Чанк потока OpenAI; только usage (без text) — последний чанк с include_usage, без choices."""
+    if text is None and usage is not None:
+        return SimpleNamespace(choices=[], usage=usage)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=usage)
+
+
+def _fake_openai(create):
+    """Клиент OpenAI, у которого chat.completions.create — переданная функция."""
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+class FakeStream:
+    """Синхронный поток чанков OpenAI.
+
+    Args:
+        texts: Части ответа (строка — по словам, каждое с пробелом)
+        delay: Пауза перед первым чанком; close() во время нее — ConnectionError
+        hang: После чанков ждать close(), как открытое HTTP-соединение, затем ConnectionError
+    """
+
+    def __init__(self, texts, delay=0.0, hang=False):
+        self.texts = [word + " " for word in texts.split()] if isinstance(texts, str) else list(texts)
+        self.delay = delay
+        self.hang = hang
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.closed.wait(self.delay):
+            raise ConnectionError("stream closed")
+        for text in self.texts:
+            yield _chunk(text)
+        if self.hang:
+            if not self.closed.wait(5):
+                raise AssertionError("stream was not closed")
+            raise ConnectionError("connection closed")
+
+    def close(self):
+        self.closed.set()
+
+
+class AsyncFakeStream(FakeStream):
+    """Асинхронный поток чанков OpenAI; hang=True — после чанков поток "зависает"."""
+
+    def __aiter__(self):
+        return self._aiter()
+
+    async def _aiter(self):
+        for text in self.texts:
+            yield _chunk(text)
+        if self.hang:
+            await asyncio.Event().wait()
+
+    async def close(self):
+        self.closed.set()
+
+
+@pytest.fixture
+def chunk():
+    """Фабрика чанков потока OpenAI: chunk("text"), chunk(None), chunk(usage={...})."""
+    return _chunk
+
+
+@pytest.fixture
+def fake_openai():
+    """Фабрика клиентов OpenAI с заданной функцией create."""
+    return _fake_openai
+
+
+@pytest.fixture
+def fake_stream():
+    """Класс синхронного потока чанков (FakeStream)."""
+    return FakeStream
+
+
+@pytest.fixture
+def async_fake_stream():
+    """Класс асинхронного потока чанков (AsyncFakeStream)."""
+    return AsyncFakeStream
+
+
+@pytest.fixture
+def make_client():
+    """Фабрика OpenRouterClient (или cls) с поддельным OpenAI: make_client(create, cls=..., **kwargs)."""
+    from rich.console import Console
+    from penguin_tamer.llm_client import OpenRouterClient
+
+    def make(create, cls=OpenRouterClient, **kwargs):
+        params = dict(console=Console(file=io.StringIO()), logger=logging.getLogger("test"),
+                      api_key="key", api_url="https://api", model="model", system_content="system")
+        params.update(kwargs)
+        client = cls(**params)
+        client._client = _fake_openai(create)
+        return client
+    return make
@@ -0,0 +1,74 @@
+import asyncio
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from rich.console import Console
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.llm_client import AsyncOpenRouterClient
+
+
+@pytest.fixture
+def client_for(make_client):
+    """Асинхронный клиент, который на любой запрос отдает поток stream."""
+    def make(stream, request_timeout=None):
+        async def create(**kwargs):
+            return stream
+        return make_client(create, AsyncOpenRouterClient, console=Console(file=io.StringIO(), force_terminal=True),
+                           request_timeout=request_timeout)
+    return make
+
+
+def test_ask_stream_collects_reply_and_history(client_for, async_fake_stream):
+    client = client_for(async_fake_stream(["Hel", "lo"]))
+    reply = asyncio.run(client.ask_stream("hi"))
+
+    assert reply == "Hello"
+    assert client.messages[-2:] == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "Hello"},
+    ]
+    assert client.last_timings.chunks == 2
+
+
+def test_cancelled_stream_is_closed(client_for, async_fake_stream):
+    stream = async_fake_stream(["partial"], hang=True)
+    client = client_for(stream)
+
+    async def run():
+        task = asyncio.create_task(client.ask_stream("hi"))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert stream.closed.is_set()
+
+
+def test_timeout_before_first_token_closes_stream(client_for, async_fake_stream):
+    stream = async_fake_stream([], hang=True)
+    client = client_for(stream, request_timeout=0.1)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(client.ask_stream("hi"))
+    assert stream.closed.is_set()
+
+
+def test_cancelled_stream_keeps_partial_reply(client_for, async_fake_stream):
+    client = client_for(async_fake_stream(["Half of the ", "answer"], hang=True))
+
+    async def run():
+        task = asyncio.create_task(client.ask_stream("hi"))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert client.messages[-1] == {"role": "assistant",
+                                   "content": "Half of the answer\n\n[Answer interrupted by the user]"}
@@ -0,0 +1,171 @@
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer import batch
+from penguin_tamer.batch import BatchRunner, RateLimiter, read_prompts
+from penguin_tamer.hedging import Provider
+from penguin_tamer.metrics import MetricsLog
+
+
+def test_read_prompts_accepts_lines_and_jsonl():
+    lines = ["first\n", "\n", '{"id": "q2", "prompt": "second"}\n', "{not json\n", '{"prompt": "fourth"}']
+    assert read_prompts(lines) == [
+        {"id": 1, "prompt": "first"},
+        {"id": "q2", "prompt": "second"},
+        {"id": 4, "prompt": "{not json"},
+        {"id": 5, "prompt": "fourth"},
+    ]
+
+
+def test_read_prompts_rejects_object_without_prompt():
+    with pytest.raises(ValueError):
+        read_prompts(['{"id": 1}'])
+
+
+class FakeClient:
+    """Ответ — текст запроса; задержка — из словаря delays."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delays.get(prompt, 0.01))
+            if prompt == "fail":
+                raise ConnectionError("reset")
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=prompt.upper()))])
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture(autouse=True)
+def metrics_log(tmp_path, monkeypatch):
+    log = MetricsLog(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(batch, "metrics", log)
+    return log
+
+
+def _runner(client, name, concurrency=4, provider_limit=4, rate=0):
+    provider = Provider(name, "model", "https://api", "key", provider_limit)
+    return BatchRunner(client, provider, "system", concurrency=concurrency, rate_per_minute=rate)
+
+
+def _items(*prompts):
+    return [{"id": i, "prompt": p} for i, p in enumerate(prompts)]
+
+
+def test_input_order_is_kept_with_uneven_latency():
+    client = FakeClient({"slow": 0.2})
+    results = []
+    summary = _runner(client, "batch-order").run(_items("slow", "a", "b"), results.append)
+
+    assert [r["prompt"] for r in results] == ["slow", "a", "b"]
+    assert [r["reply"] for r in results] == ["SLOW", "A", "B"]
+    assert results[0]["latency"] >= 0.2
+    assert summary["items"] == 3 and summary["errors"] == 0
+
+
+def test_completion_order_emits_fast_results_first():
+    client = FakeClient({"slow": 0.2})
+    results = []
+    _runner(client, "batch-completion").run(_items("slow", "a"), results.append, ordered=False)
+
+    assert [r["prompt"] for r in results] == ["a", "slow"]
+
+
+def test_errors_are_reported_per_item(metrics_log):
+    results = []
+    summary = _runner(FakeClient(), "batch-errors").run(_items("ok", "fail"), results.append)
+
+    assert results[1]["reply"] is None and results[1]["error"] == "ConnectionError: reset"
+    assert results[0]["error"] is None
+    assert summary["errors"] == 1
+    records = metrics_log.read("request")
+    assert sorted(r["ok"] for r in records) == [False, True]
+    assert all(r["mode"] == "batch" for r in records)
+
+
+def test_provider_limit_bounds_concurrency():
+    client = FakeClient({p: 0.05 for p in "abcdefgh"})
+    _runner(client, "batch-limit", concurrency=8, provider_limit=3).run(_items(*"abcdefgh"), lambda r: None)
+
+    assert client.peak == 3
+
+
+def test_rate_limiter_spaces_requests():
+    limiter = RateLimiter(per_minute=600)  # Не чаще раза в 0.1 с
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.3
+    assert RateLimiter(0).interval == 0
+
+
+class HangingClient(FakeClient):
+    """Ответ на "fast" сразу; остальные запросы висят, пока клиент не закрыт."""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = threading.Event()
+        self.started = 0
+
+    def create(self, model, messages, temperature):
+        prompt = messages[-1]["content"]
+        if prompt != "fast":
+            with self._lock:
+                self.started += 1
+            if not self.closed.wait(10):
+                raise AssertionError("client was not closed")
+            raise ConnectionError("client closed")
+        return super().create(model, messages, temperature)
+
+    def close(self):
+        self.closed.set()
+
+
+def test_interrupt_closes_client_and_releases_workers(metrics_log):
+    client = HangingClient()
+
+    def write(result):
+        raise KeyboardInterrupt  # Ctrl+C, пока остальные запросы висят
+
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        _runner(client, "batch-interrupt", concurrency=3).run(
+            _items("hang", "hang", "fast", *["queued"] * 10), write, ordered=False)
+    assert client.closed.is_set()
+
+    deadline = time.monotonic() + 5
+    while any(t.name.startswith("batch") for t in threading.enumerate()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(t.name.startswith("batch") for t in threading.enumerate())
+    assert time.monotonic() - start < 5
+    assert client.started <= 3  # Очередь после прерывания не отправлялась
+    assert all(r["ok"] for r in metrics_log.read("request"))
+
+
+def test_rate_limiter_wait_is_interrupted_by_stop():
+    limiter = RateLimiter(per_minute=6)  # Раз в 10 с
+    stop = threading.Event()
+    limiter.acquire(stop)
+    threading.Timer(0.1, stop.set).start()
+    start = time.monotonic()
+    limiter.acquire(stop)
+    assert time.monotonic() - start < 2
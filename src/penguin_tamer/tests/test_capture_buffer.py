@@ -0,0 +1,107 @@
+import contextlib
+import hashlib
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.capture_buffer import CaptureBuffer
+from penguin_tamer.script_executor import LinuxCommandExecutor
+
+KB = 1024
+MB = 1024 * KB
+
+
+def _chunks(total: int, size: int = 64 * KB):
+    """Пронумерованные блоки (чтобы проверять порядок), всего total байт."""
+    body = (b"x" * 99 + b"\n") * (size // 100)
+    for number in range(total // (len(body) + 9)):
+        yield b"%08d\n" % number + body
+
+
+def test_small_output_stays_in_memory():
+    capture = CaptureBuffer(memory_budget=1 * KB)
+    capture.write(b"one\n")
+    capture.write(b"two\n")
+    assert capture.text() == "one\ntwo\n"
+    assert capture.complete and capture.omitted_bytes == 0
+    assert capture._spill is None
+    assert list(capture.iter_lines()) == ["one", "two"]
+
+
+def test_text_keeps_head_and_tail_on_line_boundaries():
+    capture = CaptureBuffer(memory_budget=400)
+    for i in range(1000):
+        capture.write(b"line %d\n" % i)
+    text = capture.text()
+    assert text.startswith("line 0\nline 1\n")
+    assert text.endswith("line 998\nline 999\n")
+    assert "bytes of output omitted" in text
+    assert all(line.startswith("line ") or "omitted" in line for line in text.splitlines())
+    assert list(capture.iter_lines()) == [f"line {i}" for i in range(1000)]
+
+
+def test_memory_stays_flat_while_full_output_is_on_disk():
+    budget = 256 * KB
+    peaks = {}
+    for total in (5 * MB, 50 * MB):
+        written = hashlib.sha256()
+        with CaptureBuffer(memory_budget=budget) as capture:
+            tracemalloc.start()
+            for chunk in _chunks(total):
+                written.update(chunk)
+                capture.write(chunk)
+                del chunk
+            peaks[total] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            assert capture.complete
+            assert capture.omitted_bytes >= len(capture) - budget
+            read = hashlib.sha256()
+            size = 0
+            for chunk in capture.iter_bytes():
+                read.update(chunk)
+                size += len(chunk)
+            assert size == len(capture) and read.digest() == written.digest()
+            assert len(capture.text()) < budget
+    # Пик памяти не зависит от объема: бюджет плюс блоки записи
+    assert peaks[50 * MB] < budget + 3 * 64 * KB
+    assert peaks[50 * MB] < peaks[5 * MB] * 1.2
+
+
+def test_spill_limit_keeps_head_and_tail_only():
+    capture = CaptureBuffer(memory_budget=1 * KB, spill_limit=4 * KB)
+    for chunk in _chunks(100 * KB, size=1 * KB):
+        capture.write(chunk)
+    assert capture.spill_truncated and not capture.complete
+    assert "omitted" in capture.text()
+    assert sum(len(chunk) for chunk in capture.iter_bytes()) == len(capture.head) + 4 * KB
+    capture.close()
+
+
+class _NullSink:
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+def test_executor_memory_is_bounded_for_large_output():
+    budget = 128 * KB
+    tracemalloc.start()
+    with contextlib.redirect_stdout(_NullSink()), contextlib.redirect_stderr(io.StringIO()):
+        result = LinuxCommandExecutor(memory_budget=budget).execute("head -c 30000000 /dev/zero | tr '\\0' x")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert result.returncode == 0
+    assert len(result.stdout_capture) == 30000000 and result.stdout_capture.complete
+    assert len(result.stdout) < budget
+    assert peak < 2 * MB
+    result.close()
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.capture_buffer import CaptureBuffer
+from penguin_tamer.command_feedback import CommandRun, attach_command_results, describe_run
+from penguin_tamer.multi_block import BlockResult
+from penguin_tamer.script_executor import CapturedProcess
+
+
+def _capture(data: bytes, memory_budget=1024, spill_limit=1024 ** 3) -> CaptureBuffer:
+    capture = CaptureBuffer(memory_budget, spill_limit=spill_limit)
+    for start in range(0, len(data), 1000):
+        capture.write(data[start:start + 1000])
+    return capture
+
+
+def test_spilled_output_is_condensed_within_budget():
+    names = (str(i).translate(str.maketrans("0123456789", "abcdefghij")).encode() for i in range(50000))
+    body = b"".join(b"\x1b[32mok\x1b[0m %s.c\n" % name for name in names)
+    capture = _capture(b"start\n" + body + b"FATAL: disk full\n")
+    run = CommandRun("make", 2, [("stdout", capture)])
+    text = describe_run(run, budget=200)
+
+    assert text.startswith("Command (exit code 2):\n```bash\nmake\n```\nstdout (50002 lines, ")
+    assert "sampled: beginning and end" in text
+    assert "\x1b" not in text and "lines omitted] ..." in text
+    assert "start\nok a.c\nok b.c\n" in text
+    assert text.rstrip("`\n").endswith("FATAL: disk full")
+    assert len(text) < 200 * 4 + 200
+    run.close()
+
+
+def test_diagnostic_rows_are_kept_and_repeats_collapsed():
+    ports = b"".join(b"tcp LISTEN 0 128 0.0.0.0:%d 0.0.0.0:*\n" % port for port in (22, 80, 443))
+    run = CommandRun("ss -tln", 0, [("stdout", _capture(ports))])
+    assert describe_run(run, budget=2000).endswith(f"```\n{ports.decode()}```")
+
+    retries = b"connection refused\n" * 1000
+    run = CommandRun("curl", 7, [("stderr", _capture(retries))])
+    assert "\nconnection refused  [repeated 1000 times]\n" in describe_run(run, budget=2000)
+
+
+def test_similar_lines_are_marked_only_over_budget():
+    data = b"".join(b"retry %d: connection refused\n" % i for i in range(1000))
+    text = describe_run(CommandRun("curl", 7, [("stderr", _capture(data))]), budget=200)
+
+    assert "retry 0: connection refused\nretry 1: connection refused\n" in text
+    assert "similar lines, numbers differ]" in text and "repeated" not in text
+
+
+def test_truncated_capture_keeps_head_and_tail():
+    data = b"".join(b"row %06d\n" % i for i in range(100000))
+    run = CommandRun("seq", 0, [("stdout", _capture(data, spill_limit=0))])
+    text = describe_run(run, budget=2000)
+
+    assert "stdout (1100000 bytes, sampled: beginning and end):" in text
+    assert "row 000000" in text and "bytes of output omitted" in text
+
+
+def test_from_process_pty_and_pipe():
+    pty_run = CommandRun.from_process("ls", CapturedProcess("ls", 0, _capture(b"\x1b[1ma\x1b[0m\r\nb\r\n"), stdout="a\nb\n"))
+    assert [name for name, _ in pty_run.outputs] == ["output"]
+    assert "output (2 lines, " in describe_run(pty_run, 100) and "\na\nb\n```" in describe_run(pty_run, 100)
+
+    pipe_run = CommandRun.from_process("false", subprocess.CompletedProcess("false", 1, "", ""))
+    assert describe_run(pipe_run, 100) == "Command (exit code 1):\n```bash\nfalse\n```\nNo output."
+
+
+def test_from_block_and_attach():
+    parallel = BlockResult(1, "echo hi", returncode=0, output=_capture(b"hi\n"))
+    sequential = BlockResult(2, "false", returncode=1,
+                             process=CapturedProcess("false", 1, _capture(b""), _capture(b"oops\n")))
+    prompt = attach_command_results("why?", [CommandRun.from_block(parallel), CommandRun.from_block(sequential)])
+
+    assert prompt.startswith("why?\n\nResults of the commands I ran:\n\nCommand (exit code 0):\n```bash\necho hi\n```\n"
+                             "output (1 lines, 3 bytes):\n```\nhi\n```\n\nCommand (exit code 1):")
+    assert prompt.endswith("stderr (1 lines, 5 bytes):\n```\noops\n```")
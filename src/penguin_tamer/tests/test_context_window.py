@@ -0,0 +1,79 @@
+import sys
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.context_window import ContextWindow
+from penguin_tamer.token_counter import TokenCounter
+
+
+def _history(turns, size=400):
+    messages = [{"role": "system", "content": "system prompt"}]
+    for i in range(turns):
+        messages.append({"role": "user", "content": f"question {i}\n" + "q" * size})
+        messages.append({"role": "assistant", "content": f"answer {i}\n" + "a" * size})
+    messages.append({"role": "user", "content": "current question"})
+    return messages
+
+
+def test_unlimited_budget_keeps_everything():
+    messages = _history(5)
+    window = ContextWindow()
+    assert window.build(messages) == messages
+    assert window.last_tokens == TokenCounter().count_all(messages)
+    assert window.last_dropped == 0
+
+
+def test_budget_drops_oldest_turns_but_keeps_system_and_latest():
+    messages = _history(10)
+    window = ContextWindow(budget=500)
+    context = window.build(messages)
+
+    assert context[0] == messages[0]
+    assert context[-1] == messages[-1]
+    assert window.last_tokens <= 500
+    assert window.last_dropped > 0
+    # Остались только самые свежие обмены, без разрывов
+    assert context[1:] == messages[len(messages) - len(context) + 1:]
+
+
+def test_latest_exchange_is_kept_even_over_budget():
+    messages = [{"role": "system", "content": "s"}, {"role": "user", "content": "x" * 4000}]
+    window = ContextWindow(budget=10)
+    assert window.build(messages) == messages
+
+
+def test_summary_replaces_dropped_turns():
+    messages = _history(10)
+    window = ContextWindow(budget=800, summarize=True)
+    context = window.build(messages)
+
+    summary = context[1]
+    assert summary["role"] == "system"
+    assert "question 0" in summary["content"]
+    assert window.last_tokens <= 800
+    # Пересказ кэшируется и не пересобирается на следующем запросе
+    assert window.build(messages) == context
+
+
+def test_summary_cache_follows_the_history():
+    window = ContextWindow(budget=800, summarize=True)
+    messages = _history(10)
+    window.build(messages)
+
+    # Сообщение изменилось на месте: прежний пересказ недействителен
+    messages[1]["content"] = "edited 0\n" + "q" * 400
+    assert "edited 0" in window.build(messages)[1]["content"]
+
+    # История заменена (--resume): id старых сообщений могут достаться новым
+    del messages
+    replaced = [{"role": m["role"], "content": m["content"].replace("question", "topic")} for m in _history(10)]
+    summary = window.build(replaced)[1]["content"]
+    assert "topic 0" in summary and "question" not in summary
+
+    # Кэш держит только обмены, пересказанные в последнем запросе
+    long_dialog = _history(200)
+    window.build(long_dialog)
+    assert len(window._summary_cache) <= 20
+    assert all(any(entry[0][0][0] is m for m in long_dialog) for entry in window._summary_cache.values())
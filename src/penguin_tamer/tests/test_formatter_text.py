@@ -0,0 +1,177 @@
+import io
+import os
+import random
+import select
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from rich.console import Console
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.formatter_text import CodeBlockDetector, extract_labeled_code_blocks
+from penguin_tamer.stream_keys import StreamBlockRunner
+
+REPLY = (
+    "Check the service first.\n\n"
+    "[Code #1]\n```bash\nsystemctl status nginx\n```\n\n"
+    "An unlabeled block is not runnable:\n\n```bash\nls\n```\n\n"
+    "[Code #2] ```python\nprint('[not a label]')\n```\n"
+    "Inline `code` and a [link](http://x) do not count.\n\n"
+    "[Code #3]\n\n```\ntail -f /var/log/syslog | grep -v ``\n```"
+)
+
+# Чанки, записанные с реального потока: разрезы внутри подписи, ``` и строки языка
+RECORDED_CHUNKS = [
+    "Check the service first.\n\n[Co", "de #1", "]\n`", "``ba", "sh\nsystemctl status nginx\n`",
+    "`", "`\n\nAn unlabeled block is not runnable:\n\n```bash\nls\n``", "`\n\n[", "Code #2] ``",
+    "`python\nprint('[not a ", "label]')\n```\nInline `code` and a [link](http://x) do not count.\n\n",
+    "[Code #3]\n\n```\ntail -f /var/log/syslog | grep -v ``\n``", "`",
+]
+
+
+def _feed(chunks):
+    detector = CodeBlockDetector()
+    for chunk in chunks:
+        detector.feed(chunk)
+    return detector.blocks
+
+
+def test_recorded_chunks_match_batch_extraction():
+    assert "".join(RECORDED_CHUNKS) == REPLY
+    expected = extract_labeled_code_blocks(REPLY)
+    assert expected == ["systemctl status nginx", "print('[not a label]')",
+                        "tail -f /var/log/syslog | grep -v ``"]
+    assert _feed(RECORDED_CHUNKS) == expected
+
+
+@pytest.mark.parametrize("split", range(1, len(REPLY)))
+def test_every_two_way_split_matches_batch(split):
+    assert _feed([REPLY[:split], REPLY[split:]]) == extract_labeled_code_blocks(REPLY)
+
+
+def test_random_and_single_char_chunks_match_batch():
+    expected = extract_labeled_code_blocks(REPLY)
+    assert _feed(list(REPLY)) == expected
+    rng = random.Random(42)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(REPLY)), rng.randint(1, 30)))
+        chunks = [REPLY[a:b] for a, b in zip([0] + cuts, cuts + [len(REPLY)])]
+        assert _feed(chunks) == expected
+
+
+def test_block_is_reported_as_soon_as_fence_closes():
+    detector = CodeBlockDetector()
+    assert detector.feed("[Code #1]\n```bash\necho hi\n``") == []
+    assert detector.feed("`") == ["echo hi"]
+    assert detector.feed("\n\nStill streaming a long explanation...") == []
+    assert detector.blocks == ["echo hi"]
+
+
+@pytest.mark.parametrize("text", [
+    # ] в строке языка открытой ``` не отменяет более раннюю подпись
+    "[a(\n\n\n```bash\nb]```(bash````[b]\n\n```[[Code #1]````bash\nb]]`x````]````bash[```bash\nb]",
+    "[x]\n```lang]\nbody\n```",
+    "[[Code #1]] ```sh\nls\n```",
+])
+def test_tricky_labels_match_batch_at_every_split(text):
+    for split in range(1, len(text)):
+        assert _feed([text[:split], text[split:]]) == extract_labeled_code_blocks(text)
+
+
+def test_long_block_keeps_only_unscanned_text():
+    detector = CodeBlockDetector()
+    detector.feed("See [the docs](http://x) first.\n\n[Code #1]\n```bash\n")
+    for i in range(5000):
+        detector.feed(f"echo `date` {i}\n")
+        assert len(detector._buffer) <= 2
+    assert detector.feed("```") == ["\n".join(f"echo `date` {i}" for i in range(5000))]
+    assert detector._buffer == ""
+
+
+def test_ask_stream_reports_blocks_before_stream_ends(chunk, make_client):
+    release = threading.Event()
+    seen = []
+
+    def stream():
+        yield chunk("[Code #1]\n```bash\necho hi\n```\n")
+        assert release.wait(2)  # Хвост ответа приходит только после сообщения о блоке
+        yield chunk("More text.")
+
+    def on_code_block(index, code):
+        seen.append((index, code))
+        release.set()
+
+    client = make_client(lambda **kwargs: stream())
+    client.on_code_block = on_code_block
+
+    assert client.ask_stream("hi").endswith("More text.")
+    assert seen == [(1, "echo hi")]
+
+
+def test_runner_starts_block_by_digit():
+    ran = []
+    runner = StreamBlockRunner(Console(file=io.StringIO()), lambda console, blocks, idx: ran.append((blocks, idx)))
+    runner.on_code_block(1, "echo one")
+    runner.on_key("2")  # Блока #2 еще нет
+    runner.on_key("x")
+    runner.on_key("1")
+    runner.wait()
+
+    assert ran == [(["echo one"], 1)]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+def test_runner_buffers_block_output_until_the_answer_ends(capfd, monkeypatch):
+    from penguin_tamer import script_executor
+    # Даже с exec_mode: pty блок по клавише выполняется с каналами
+    monkeypatch.setattr(script_executor.config, "get", lambda section, key, default=None:
+                        "pty" if key == "exec_mode" else default)
+    output = io.StringIO()
+    with StreamBlockRunner(Console(file=output, width=80)) as runner:
+        runner.on_code_block(1, "echo to-stdout; echo to-stderr >&2; exit 3")
+        runner.on_key("1")  # Блок выполняется в фоновом потоке
+        runner.wait()
+        assert "to-stdout" not in output.getvalue()  # Пока ответ печатается — только подсказка
+        assert "#1" in output.getvalue()
+
+    printed = output.getvalue()
+    assert "to-stdout\nto-stderr\n" in printed and "3" in printed.rsplit("to-stderr\n", 1)[1]
+    captured = capfd.readouterr()
+    assert "to-stdout" not in captured.out and "to-stderr" not in captured.err
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="select на каналах")
+def test_listener_does_not_read_while_block_runs():
+    read_fd, write_fd = os.pipe()
+    typed = []
+
+    def run_block(console, blocks, idx):
+        os.write(write_fd, b"y2")  # Ответ команде на вопрос y/n и цифра в ее вводе
+        time.sleep(0.3)
+        ready, _, _ = select.select([read_fd], [], [], 0)
+        typed.append(os.read(read_fd, 2) if ready else b"")
+
+    runner = StreamBlockRunner(Console(file=io.StringIO()), run_block)
+    listener = runner._listener
+    listener._fd = read_fd  # Вместо терминала — канал
+    listener._thread = threading.Thread(target=listener._run, daemon=True)
+    listener._thread.start()
+    runner.on_code_block(1, "sudo apt upgrade")
+    runner.on_code_block(2, "echo two")
+    try:
+        os.write(write_fd, b"1")
+        deadline = time.monotonic() + 5
+        while not typed and time.monotonic() < deadline:
+            time.sleep(0.05)
+        runner.wait()
+    finally:
+        listener.stop()
+        os.close(read_fd)
+        os.close(write_fd)
+
+    assert typed == [b"y2"]  # Весь ввод достался блоку, блок #2 не запустился
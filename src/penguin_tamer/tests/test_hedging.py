@@ -0,0 +1,134 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer import hedging
+from penguin_tamer.hedging import Hedge, Provider
+from penguin_tamer.metrics import MetricsLog
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    log = MetricsLog(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(hedging, "metrics", log)
+    return log
+
+
+def _providers(limit=2):
+    # Уникальные имена: семафоры общие для процесса
+    suffix = str(time.perf_counter_ns())
+    return (Provider("primary" + suffix, "m1", "http://a", "k", limit),
+            Provider("secondary" + suffix, "m2", "http://b", "k", limit))
+
+
+def _read_all(reader):
+    reader.join(2)
+    reader.raise_error()
+    return reader.drain()
+
+
+def test_fast_primary_is_not_hedged(log, fake_stream):
+    primary, secondary = _providers()
+    calls = []
+
+    def create(provider):
+        calls.append(provider.name)
+        return fake_stream("from primary")
+
+    reader, winner = Hedge(primary, secondary, delay=1.0).open(create)
+
+    assert winner is primary
+    assert calls == [primary.name]
+    assert _read_all(reader) == "from primary "
+    record = log.read("hedge")[-1]
+    assert record["winner"] == primary.name and record["hedged"] is False
+
+
+def test_no_hedge_record_without_telemetry(log, monkeypatch, fake_stream):
+    get = hedging.config.get
+    monkeypatch.setattr(hedging.config, "get",
+                        lambda section, key, default=None: False if key == "telemetry" else get(section, key, default))
+    primary, secondary = _providers()
+
+    reader, _ = Hedge(primary, secondary, delay=1.0).open(lambda provider: fake_stream("from primary"))
+
+    assert _read_all(reader) == "from primary "
+    assert log.read("hedge") == []
+
+
+def test_slow_primary_loses_and_is_cancelled(log, fake_stream):
+    primary, secondary = _providers()
+    streams = {primary.name: fake_stream("slow", delay=5.0), secondary.name: fake_stream("fast answer")}
+
+    start = time.perf_counter()
+    reader, winner = Hedge(primary, secondary, delay=0.05).open(lambda p: streams[p.name])
+
+    assert winner is secondary
+    assert time.perf_counter() - start < 1.0
+    assert _read_all(reader) == "fast answer "
+    assert streams[primary.name].closed.wait(1)
+    record = log.read("hedge")[-1]
+    assert record["winner"] == secondary.name and record["hedged"] is True
+    assert record["ttft"] is not None
+
+
+def test_primary_error_hedges_immediately(log, fake_stream):
+    primary, secondary = _providers()
+
+    def create(provider):
+        if provider is primary:
+            raise ConnectionError("503 from primary")
+        return fake_stream("backup")
+
+    start = time.perf_counter()
+    reader, winner = Hedge(primary, secondary, delay=10).open(create)
+
+    assert winner is secondary
+    assert time.perf_counter() - start < 1.0
+    assert _read_all(reader) == "backup "
+
+
+def test_all_failed_returns_primary_error(log):
+    primary, secondary = _providers()
+
+    def create(provider):
+        raise ConnectionError(f"down: {provider.model}")
+
+    reader, winner = Hedge(primary, secondary, delay=0.01).open(create)
+
+    assert winner is primary
+    with pytest.raises(ConnectionError, match="m1"):
+        _read_all(reader)
+    assert log.read("hedge")[-1]["winner"] is None
+
+
+def test_secondary_at_concurrency_limit_is_skipped(log, fake_stream):
+    primary, secondary = _providers(limit=1)
+    calls = []
+    secondary.semaphore.acquire()  # Единственный слот запасной LLM занят
+    try:
+        def create(provider):
+            calls.append(provider.name)
+            return fake_stream("primary", delay=0.2)
+
+        reader, winner = Hedge(primary, secondary, delay=0.01).open(create)
+    finally:
+        secondary.semaphore.release()
+
+    assert winner is primary
+    assert calls == [primary.name]
+    assert _read_all(reader) == "primary "
+
+
+def test_semaphore_is_released_after_stream(log, fake_stream):
+    primary, secondary = _providers(limit=1)
+    reader, _ = Hedge(primary, secondary, delay=1.0).open(lambda p: fake_stream("ok"))
+    _read_all(reader)
+
+    assert primary.semaphore.acquire(blocking=False)
+    primary.semaphore.release()
@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.markdown_stream import IncrementalMarkdown
+
+
+DOCUMENT = (
+    "# Runbook\n"
+    "\n"
+    "First paragraph\n"
+    "continues here.\n"
+    "\n"
+    "[Code #1]\n"
+    "```bash\n"
+    "echo one\n"
+    "\n"
+    "echo two\n"
+    "```\n"
+    "| a | b |\n"
+    "|---|---|\n"
+    "| 1 | 2 |\n"
+    "\n"
+    "1. item\n"
+    "\n"
+    "    nested paragraph\n"
+    "\n"
+    "Last"
+)
+
+
+def _feed_all(chunks):
+    md = IncrementalMarkdown()
+    blocks = []
+    for chunk in chunks:
+        blocks.extend(md.feed(chunk))
+    return blocks, md.tail
+
+
+def test_blocks_are_frozen_at_boundaries():
+    blocks, tail = _feed_all([DOCUMENT])
+    assert blocks == [
+        "# Runbook",
+        "First paragraph\ncontinues here.",
+        "[Code #1]\n```bash\necho one\n\necho two\n```",
+        "| a | b |\n|---|---|\n| 1 | 2 |",
+    ]
+    # Список еще не завершен: строка "Last" пришла без перевода строки
+    assert tail == "1. item\n\n    nested paragraph\n\nLast"
+
+
+def test_chunk_boundaries_do_not_change_blocks():
+    expected = _feed_all([DOCUMENT])
+    for size in (1, 2, 3, 7, 13):
+        chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+        assert _feed_all(chunks) == expected
+
+
+def test_open_fence_is_never_frozen():
+    md = IncrementalMarkdown()
+    assert md.feed("```bash\nls\n\n\nls -la\n") == []
+    assert md.tail.startswith("```bash")
+    assert md.feed("```\n") == ["```bash\nls\n\n\nls -la\n```"]
+    assert md.tail == ""
+
+
+def test_trailing_blank_lines_are_not_part_of_tail():
+    md = IncrementalMarkdown()
+    assert md.feed("Paragraph\n\n\n") == []
+    assert md.tail == "Paragraph\n"
+
+
+LOOSE_LIST = (
+    "Steps:\n"
+    "\n"
+    "1. Stop the service\n"
+    "\n"
+    "2. Clear the cache\n"
+    "\n"
+    "   ```bash\n"
+    "   rm -rf /var/cache/app\n"
+    "   ```\n"
+    "\n"
+    "3. Start it again\n"
+    "\n"
+    "- [ ] check logs\n"
+    "\n"
+    "Done.\n"
+    "\n"
+)
+
+
+def test_loose_ordered_list_is_one_block():
+    blocks, tail = _feed_all([LOOSE_LIST])
+    assert blocks == [
+        "Steps:",
+        "1. Stop the service\n\n2. Clear the cache\n\n   ```bash\n   rm -rf /var/cache/app\n   ```\n\n"
+        "3. Start it again\n\n- [ ] check logs",
+    ]
+    assert tail == "Done.\n"
+    for size in (1, 2, 5):
+        chunks = [LOOSE_LIST[i:i + size] for i in range(0, len(LOOSE_LIST), size)]
+        assert _feed_all(chunks) == (blocks, tail)
+
+
+def test_list_item_after_paragraph_still_starts_a_new_block():
+    blocks, tail = _feed_all(["Intro\n\n- one\n\n- two\n\nOutro\n"])
+    assert blocks == ["Intro", "- one\n\n- two"]
+    assert tail == "Outro\n"
@@ -0,0 +1,90 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer import llm_client
+from penguin_tamer.metrics import MetricsLog, parse_window, percentile, summarize
+
+
+def test_percentile_interpolates():
+    values = [4.0, 1.0, 3.0, 2.0]
+    assert percentile(values, 0) == 1.0
+    assert percentile(values, 50) == pytest.approx(2.5)
+    assert percentile(values, 100) == 4.0
+    assert percentile([], 50) is None
+
+
+@pytest.mark.parametrize("window,seconds", [("30m", 1800), ("24h", 86400), ("7d", 604800), ("90", 90)])
+def test_parse_window(window, seconds):
+    assert parse_window(window) == seconds
+
+
+def test_parse_window_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_window("week")
+
+
+def test_log_appends_filters_and_rotates(tmp_path):
+    log = MetricsLog(tmp_path / "metrics.jsonl", max_bytes=400)
+    for i in range(10):
+        log.record("request", provider="A", n=i)
+    log.record("hedge", winner="A")
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('{"broken":')  # Оборванная строка не ломает чтение
+
+    assert (tmp_path / "metrics.jsonl.1").exists()
+    assert [r["n"] for r in log.read("request")] == list(range(10))
+    assert len(log.read("hedge")) == 1
+    assert log.read("request", since=time.time() + 60) == []
+
+
+def test_summarize_groups_and_skips_errors_in_percentiles():
+    records = [
+        {"provider": "A", "ok": True, "ttft": 0.1, "total": 1.0, "tps": 50},
+        {"provider": "A", "ok": True, "ttft": 0.3, "total": 2.0, "tps": 70},
+        {"provider": "A", "ok": False, "ttft": None, "total": 9.0, "tps": None},
+        {"provider": "B", "ok": True, "ttft": 1.0, "total": 3.0, "tps": None},
+    ]
+    summary = summarize(records, "provider")
+
+    assert summary["A"]["requests"] == 3 and summary["A"]["errors"] == 1
+    assert summary["A"]["ttft_p50"] == pytest.approx(0.2)
+    assert summary["A"]["total_p90"] == pytest.approx(1.9)
+    assert summary["B"]["tps_p50"] is None
+
+
+def test_stream_request_is_recorded(tmp_path, monkeypatch, chunk, make_client):
+    log = MetricsLog(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(llm_client, "metrics", log)
+    client = make_client(lambda **kwargs: iter([chunk("Hello "), chunk("world")]),
+                         model="model-x", llm_name="Provider X")
+
+    client.ask_stream("hi")
+
+    record = log.read("request")[-1]
+    assert record["provider"] == "Provider X" and record["model"] == "model-x"
+    assert record["mode"] == "stream" and record["ok"] is True
+    assert record["ttft"] <= record["total"]
+    assert record["resp_bytes"] == len("Hello world")
+    assert record["req_bytes"] > 0 and record["req_tokens"] > 0 and record["resp_tokens"] > 0
+    assert record["render"] >= 0
+
+
+def test_failed_request_is_recorded(tmp_path, monkeypatch, make_client):
+    log = MetricsLog(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(llm_client, "metrics", log)
+
+    def create(**kwargs):
+        raise ConnectionError("reset")
+
+    with pytest.raises(ConnectionError):
+        make_client(create).ask("hi")
+
+    record = log.read("request")[-1]
+    assert record["ok"] is False and record["error"] == "ConnectionError"
+    assert record["mode"] == "plain"
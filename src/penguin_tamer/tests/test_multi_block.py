@@ -0,0 +1,142 @@
+import io
+import signal
+import subprocess
+import threading
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from rich.console import Console
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.multi_block import BlockResult, _ParallelRun, parse_block_selection, run_code_blocks
+
+
+def _console():
+    return Console(file=io.StringIO(), width=100, color_system=None)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3", ([3], False)),
+    ("1-4", ([1, 2, 3, 4], False)),
+    ("1,3,5", ([1, 3, 5], False)),
+    (" 1-3, 2, 6 &", ([1, 2, 3, 6], True)),
+    ("4-2&", ([4, 3, 2], True)),
+])
+def test_parse_block_selection(text, expected):
+    assert parse_block_selection(text, 6) == expected
+
+
+@pytest.mark.parametrize("text", ["how to list files", "1-", "1 2", "&", "-1"])
+def test_parse_block_selection_ignores_questions(text):
+    assert parse_block_selection(text, 6) is None
+
+
+@pytest.mark.parametrize("text", ["7", "1-9", "0", "2,10&"])
+def test_parse_block_selection_rejects_missing_blocks(text):
+    with pytest.raises(ValueError):
+        parse_block_selection(text, 6)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+def test_parallel_blocks_run_concurrently_and_print_grouped():
+    blocks = [f"for i in 1 2 3; do echo block{n}-$i; sleep 0.1; done; echo err{n} >&2; exit {n}"
+              for n in range(1, 5)]
+    console = _console()
+    start = time.perf_counter()
+    results = run_code_blocks(console, blocks, [1, 2, 3, 4], parallel=True, workers=4)
+    assert time.perf_counter() - start < 1.0  # По очереди — не меньше 1.2 с
+    assert [r.returncode for r in results] == [1, 2, 3, 4]
+    output = console.file.getvalue()
+    for n in range(1, 5):
+        # Вывод блока — одним куском, stderr на своем месте
+        assert f"block{n}-1\nblock{n}-2\nblock{n}-3\nerr{n}\n" in output
+    assert "Exit code" in output and "Total:" in output
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+def test_parallel_blocks_respect_worker_limit():
+    console = _console()
+    start = time.perf_counter()
+    results = run_code_blocks(console, ["sleep 0.3"] * 4, [1, 2, 3, 4], parallel=True, workers=2)
+    assert time.perf_counter() - start >= 0.6
+    assert all(r.returncode == 0 for r in results)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+def test_stop_kills_parallel_block_that_ignores_sigterm():
+    run = _ParallelRun()
+    result = BlockResult(1, "trap '' TERM; echo started; sleep 30")
+    worker = threading.Thread(target=run.run, args=(result,))
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not (result.output and result.output.text()) and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    start = time.perf_counter()
+    run.stop(timeout=0.3)
+    worker.join(5)
+    assert not worker.is_alive()
+    assert time.perf_counter() - start < 3
+    assert result.returncode == -signal.SIGKILL
+    result.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+def test_parallel_block_error_is_reported_and_others_finish(monkeypatch):
+    popen = subprocess.Popen
+
+    def failing_popen(args, **kwargs):
+        if args == "bad":
+            raise FileNotFoundError(2, "No such file or directory", "/gone")
+        return popen(args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "Popen", failing_popen)
+    console = _console()
+    results = run_code_blocks(console, ["bad", "sleep 0.2; echo ok"], [1, 2], parallel=True, workers=2)
+
+    assert results[0].returncode is None
+    assert "No such file or directory" in results[0].error
+    assert results[1].returncode == 0 and results[1].error is None
+    output = console.file.getvalue()
+    assert "Block #1 failed" in output and "ok\n" in output
+    assert "failed" in output.split("Exit code")[-1]  # Сводка напечатана
+
+
+def test_sequential_blocks_stop_after_interruption():
+    calls = []
+
+    def run_block(console, blocks, index):
+        calls.append(index)
+        if index == 2:
+            return None  # Ctrl+C
+        return subprocess.CompletedProcess(blocks[index - 1], returncode=index)
+
+    console = _console()
+    results = run_code_blocks(console, ["a", "b", "c"], [1, 2, 3], run_block=run_block)
+    assert calls == [1, 2]
+    assert [r.returncode for r in results] == [1, None, None]
+    assert "not finished" in console.file.getvalue()
+
+
+def test_sequential_block_output_is_closed_unless_kept():
+    closed = []
+
+    class Process(subprocess.CompletedProcess):
+        def close(self):
+            closed.append(self.args)
+
+    def run_block(console, blocks, index):
+        return Process(blocks[index - 1], returncode=0)
+
+    results = run_code_blocks(_console(), ["a", "b"], [1, 2], run_block=run_block)
+    assert closed == ["a", "b"]
+
+    closed.clear()
+    results = run_code_blocks(_console(), ["a", "b"], [1, 2], run_block=run_block, keep_output=True)
+    assert closed == []
+    results[0].close()
+    assert closed == ["a"]
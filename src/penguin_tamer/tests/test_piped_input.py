@@ -0,0 +1,102 @@
+import io
+import sys
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer import piped_input
+from penguin_tamer.piped_input import (
+    StreamSampler, attach_piped_input, read_piped_input, should_read_stdin, split_stdin_arg,
+)
+
+
+def _read(data: bytes, budget=4000, chunk_size=7):
+    return read_piped_input(io.BytesIO(data), budget=budget, chunk_size=chunk_size)
+
+
+def test_small_input_is_kept_whole():
+    sampler = _read("первая строка\nsecond\r\nlast without newline".encode("utf-8"))
+
+    assert sampler.text() == "первая строка\nsecond\nlast without newline"
+    assert sampler.total_lines == 3 and sampler.omitted_lines == 0
+
+
+def test_identical_repeats_are_collapsed():
+    sampler = _read(b"connection refused\n" * 1000 + b"FATAL: disk full\n", chunk_size=64)
+
+    assert sampler.text() == "connection refused  [repeated 1000 times]\nFATAL: disk full"
+    assert sampler.total_lines == 1001
+
+
+def test_lines_differing_in_numbers_are_kept_within_budget():
+    data = (b"tcp LISTEN 0 128 0.0.0.0:22 0.0.0.0:*\n"
+            b"tcp LISTEN 0 128 0.0.0.0:80 0.0.0.0:*\n"
+            b"tcp LISTEN 0 128 0.0.0.0:443 0.0.0.0:*\n")
+    sampler = _read(data, budget=2000)
+
+    assert sampler.text() == data.decode().rstrip("\n")
+
+
+def test_similar_lines_are_collapsed_only_over_budget():
+    data = b"".join(b"12:00:%02d worker[%d] heartbeat\n" % (i % 60, i) for i in range(1000)) + b"FATAL: disk full\n"
+    sampler = _read(data, budget=200, chunk_size=64)
+    lines = sampler.text().splitlines()
+
+    assert lines[0] == "12:00:00 worker[0] heartbeat" and lines[1] == "12:00:01 worker[1] heartbeat"
+    assert any("lines omitted" in line for line in lines)
+    assert lines[-2].endswith(" similar lines, numbers differ]") and "repeated" not in sampler.text()
+    assert lines[-1] == "FATAL: disk full"
+    assert sampler.total_lines == 1001
+
+
+def test_large_input_keeps_head_and_tail_within_budget():
+    data = b"".join(b"line %d %s\n" % (i, b"x" * (i % 5)) for i in range(20000))
+    sampler = _read(data.replace(b"0", b"o"), budget=200, chunk_size=4096)
+    lines = sampler.text().splitlines()
+
+    assert lines[0] == "line o " and lines[-1] == "line 19999 xxxx"
+    assert any("lines omitted" in line for line in lines)
+    assert sampler.head_tokens <= 100 and sampler.tail_tokens <= 100
+    assert len(sampler.head) + len(sampler.tail) + sampler.omitted_lines == 20000
+
+
+def test_overlong_line_is_truncated():
+    sampler = StreamSampler(max_line_bytes=10)
+    for _ in range(100):
+        sampler.feed(b"a" * 1000)
+    sampler.feed(b"\nnext\n")
+    sampler.close()
+
+    assert sampler.text() == "aaaaaaaaaa\nnext"
+    assert sampler.total_bytes == 100006
+
+
+def test_strip_ansi_keeps_what_terminal_showed():
+    sampler = StreamSampler(strip_ansi=True)
+    sampler.feed(b"\x1b[31mred\x1b[0m\r\n 10%\r 55%\r100%\r\n\x1b]0;title\x07plain\n")
+    sampler.close()
+
+    assert sampler.text() == "red\n100%\nplain"
+
+
+def test_utf8_split_between_chunks_is_decoded():
+    assert _read("журнал ошибок\n".encode("utf-8"), chunk_size=1).text() == "журнал ошибок"
+
+
+def test_attach_describes_input():
+    prompt = attach_piped_input("why?", _read(b"error\n"))
+    assert prompt == "why?\n\nInput (1 lines, 6 bytes):\n```\nerror\n```"
+
+
+def test_stdin_is_read_only_when_requested_or_without_prompt(monkeypatch):
+    assert split_stdin_arg(["-", "why", "does", "it", "fail"]) == (["why", "does", "it", "fail"], True)
+    assert split_stdin_arg(["why", "-x"]) == (["why", "-x"], False)
+
+    monkeypatch.setattr(piped_input, "stdin_is_piped", lambda: True)
+    # while read p; do pt "$p"; done < prompts.txt — остаток файла достается циклу
+    assert not should_read_stdin("why", requested=False)
+    assert should_read_stdin("why", requested=True)
+    assert should_read_stdin("", requested=False)
+    monkeypatch.setattr(piped_input, "stdin_is_piped", lambda: False)
+    assert not should_read_stdin("", requested=False)
@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.prewarm import ConnectionPrewarmer
+
+
+class Counter:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+        self.called = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.called.set()
+        if self.fail:
+            raise ConnectionError("no route to host")
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_warms_only_while_prompt_is_open():
+    warm = Counter()
+    prewarmer = ConnectionPrewarmer(warm, interval=60).start()
+    try:
+        time.sleep(0.05)
+        assert warm.calls == 0
+
+        prewarmer.resume()
+        assert warm.called.wait(2)
+        assert _wait_for(lambda: prewarmer.warmups == 1)
+        time.sleep(0.05)
+        assert warm.calls == 1  # Соединение теплое — повторного прогрева нет
+    finally:
+        prewarmer.stop()
+
+
+def test_rewarms_after_idle_interval():
+    warm = Counter()
+    prewarmer = ConnectionPrewarmer(warm, interval=0.05).start()
+    try:
+        prewarmer.resume()
+        assert _wait_for(lambda: warm.calls >= 3)
+        prewarmer.pause()
+        time.sleep(0.05)
+        calls = warm.calls
+        time.sleep(0.15)
+        assert warm.calls == calls
+    finally:
+        prewarmer.stop()
+
+
+def test_rewarms_stop_after_max_idle_until_next_prompt():
+    warm = Counter()
+    prewarmer = ConnectionPrewarmer(warm, interval=0.05, max_idle=0.2).start()
+    try:
+        prewarmer.resume()
+        assert _wait_for(lambda: warm.calls >= 2)
+        time.sleep(0.3)
+        calls = warm.calls
+        assert calls <= 6
+        time.sleep(0.3)
+        assert warm.calls == calls  # Ввод забыт открытым: провайдер больше не опрашивается
+
+        prewarmer.pause()
+        prewarmer.resume()  # Следующий ввод
+        assert _wait_for(lambda: warm.calls > calls)
+    finally:
+        prewarmer.stop()
+
+
+def test_recent_request_postpones_prewarm():
+    warm = Counter()
+    prewarmer = ConnectionPrewarmer(warm, interval=60).start()
+    try:
+        prewarmer.mark_used()
+        prewarmer.resume()
+        time.sleep(0.1)
+        assert warm.calls == 0
+    finally:
+        prewarmer.stop()
+
+
+def test_failures_are_silent_and_stop_ends_thread():
+    warm = Counter(fail=True)
+    prewarmer = ConnectionPrewarmer(warm, interval=60).start()
+    prewarmer.resume()
+    assert warm.called.wait(2)
+    prewarmer.stop()
+    prewarmer._thread.join(2)
+
+    assert not prewarmer._thread.is_alive()
+    assert prewarmer.warmups == 0
+
+
+def test_client_prewarm_uses_its_own_http_pool(monkeypatch):
+    import io
+    import logging
+    from rich.console import Console
+    from penguin_tamer.llm_client import OpenRouterClient
+
+    client = OpenRouterClient(
+        console=Console(file=io.StringIO()), logger=logging.getLogger("test"),
+        api_key="key", api_url="https://api.example/v1", model="model", system_content="system",
+        keepalive_expiry=60,
+    )
+    heads = []
+    client.client  # Пул создается вместе с клиентом OpenAI
+    monkeypatch.setattr(client._http_client, "head", lambda url, timeout: heads.append(url))
+    client.prewarm()
+
+    assert heads == ["https://api.example/v1/"]
+    assert client.client._client is client._http_client
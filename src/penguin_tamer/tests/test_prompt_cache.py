@@ -0,0 +1,77 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer import llm_client
+from penguin_tamer.metrics import MetricsLog, summarize
+from penguin_tamer.prompt_cache import usage_tokens, with_cache_control
+
+
+def test_cache_control_marks_system_and_last_message_without_mutating():
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "q1"},
+                {"role": "assistant", "content": "a1"}, {"role": "user", "content": "q2"}]
+    marked = with_cache_control(messages)
+    assert marked[0]["content"] == [{"type": "text", "text": "sys", "cache_control": {"type": "ephemeral"}}]
+    assert marked[1:3] == messages[1:3]
+    assert marked[3]["content"][0]["text"] == "q2" and "cache_control" in marked[3]["content"][0]
+    assert messages[0]["content"] == "sys" and messages[3]["content"] == "q2"
+
+    only_system = with_cache_control(messages[:2], last=False)
+    assert only_system[1] == messages[1]
+
+
+@pytest.mark.parametrize("usage,expected", [
+    ({"prompt_tokens": 2000, "prompt_tokens_details": {"cached_tokens": 1536}}, (2000, 1536)),
+    ({"prompt_tokens": 2000, "prompt_cache_hit_tokens": 1024}, (2000, 1024)),
+    (SimpleNamespace(prompt_tokens=900, prompt_tokens_details=None, cache_read_input_tokens=512), (900, 512)),
+    ({"prompt_tokens": 10}, (10, None)),
+    (None, (None, None)),
+])
+def test_usage_tokens_formats(usage, expected):
+    assert usage_tokens(usage) == expected
+
+
+@pytest.fixture
+def metrics_log(tmp_path, monkeypatch):
+    log = MetricsLog(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(llm_client, "metrics", log)
+    return log
+
+
+def test_request_prefix_is_stable_across_turns(metrics_log, chunk, make_client):
+    sent = []
+
+    def create(**kwargs):
+        sent.append(kwargs)
+        usage = {"prompt_tokens": 3000, "prompt_tokens_details": {"cached_tokens": 2048 * (len(sent) - 1)}}
+        return iter([chunk(f"answer {len(sent)}"), chunk(usage=usage)])
+
+    client = make_client(create, prompt_cache=True, stream_usage=True)
+    client.ask_stream("first")
+    client.ask_stream("second")
+
+    first, second = sent[0]["messages"], sent[1]["messages"]
+    assert sent[0]["stream_options"] == {"include_usage": True}
+    # Второй запрос начинается с первого: меняется только метка на последнем сообщении
+    assert second[0] == first[0] and second[1]["content"] == "first"
+    assert second[2] == {"role": "assistant", "content": "answer 1"}
+    assert client.messages[1] == {"role": "user", "content": "first"}  # история без меток
+
+    records = metrics_log.read("request")
+    assert [r["cached_tokens"] for r in records] == [0, 2048]
+    assert summarize(records, "model")["model"]["cache_hit"] == pytest.approx(100 * 2048 / 6000)
+
+
+def test_environment_context_is_stable_and_has_no_personal_data():
+    import socket
+    from penguin_tamer.sys_info import get_environment_context
+
+    context = get_environment_context()
+    assert context == get_environment_context()
+    assert "User:" not in context
+    assert socket.gethostname() not in context
@@ -0,0 +1,144 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.hedging import Provider
+from penguin_tamer.provider_router import ProviderRouter
+
+NAMES = ["Main", "Slow", "Fast", "New"]
+
+
+def _router(tmp_path, **kwargs):
+    return ProviderRouter(tmp_path / "providers.json", current="Main", names=NAMES, **kwargs)
+
+
+def test_current_first_then_ranked_by_latency(tmp_path):
+    router = _router(tmp_path)
+    router.record_success("Slow", 2.0)
+    router.record_success("Fast", 0.5)
+
+    assert router.candidates() == ["Main", "Fast", "Slow", "New"]
+
+
+def test_latency_is_smoothed(tmp_path):
+    router = _router(tmp_path, alpha=0.5)
+    router.record_success("Fast", 1.0)
+    router.record_success("Fast", 3.0)
+
+    assert router.stats("Fast")["latency"] == pytest.approx(2.0)
+
+
+def test_circuit_opens_after_repeated_failures(tmp_path):
+    router = _router(tmp_path, failure_threshold=2, cooldown=60)
+    router.record_failure("Main")
+    assert "Main" in router.candidates()
+
+    router.record_failure("Main")
+    assert router.candidates()[0] != "Main"
+    assert "Main" not in router.candidates()
+
+
+def test_half_open_after_cooldown(tmp_path):
+    router = _router(tmp_path, failure_threshold=1, cooldown=0.05)
+    router.record_failure("Main")
+    assert "Main" not in router.candidates()
+
+    time.sleep(0.06)
+    assert router.candidates()[0] == "Main"
+    router.record_success("Main", 0.3)
+    assert router.stats("Main")["opened_at"] is None
+    assert router.stats("Main")["failures"] == 0
+
+
+def test_half_open_allows_one_probe_per_cooldown(tmp_path):
+    router = _router(tmp_path, failure_threshold=1, cooldown=0.2)
+    other = _router(tmp_path, failure_threshold=1, cooldown=0.2)  # Параллельный процесс
+    router.record_failure("Main")
+
+    time.sleep(0.25)
+    assert router.candidates()[0] == "Main"
+    assert "Main" not in router.candidates()
+    assert "Main" not in other.candidates()
+
+
+def test_parallel_routers_do_not_overwrite_stats(tmp_path):
+    first = _router(tmp_path)
+    second = _router(tmp_path)
+    first.record_success("Fast", 0.5)
+    second.record_success("Fast", 0.5)
+    second.record_failure("Slow")
+
+    restored = _router(tmp_path)
+    assert restored.stats("Fast")["successes"] == 2
+    assert restored.stats("Slow")["errors"] == 1
+
+
+def test_all_open_falls_back_to_current(tmp_path):
+    router = _router(tmp_path, failure_threshold=1, cooldown=60)
+    for name in NAMES:
+        router.record_failure(name)
+
+    assert router.candidates() == ["Main"]
+
+
+def test_state_persists_across_processes(tmp_path):
+    router = _router(tmp_path, failure_threshold=1, cooldown=60)
+    router.record_success("Fast", 0.2)
+    router.record_failure("Main")
+
+    restored = _router(tmp_path, failure_threshold=1, cooldown=60)
+    assert restored.candidates() == ["Fast", "Slow", "New"]
+    assert restored.stats("Fast")["latency"] == pytest.approx(0.2)
+
+
+def test_corrupt_state_file_is_ignored(tmp_path):
+    (tmp_path / "providers.json").write_text("{not json", encoding="utf-8")
+
+    assert _router(tmp_path).candidates() == NAMES
+
+
+@pytest.fixture
+def client_with_providers(tmp_path, make_client, fake_openai):
+    """Клиент с запасными LLM: behaviours — имя -> функция create."""
+    def make(behaviours):
+        router = ProviderRouter(tmp_path / "providers.json", current="Main", names=list(behaviours))
+        client = make_client(None, api_url="https://main", model="main-model", router=router)
+        for name, create in behaviours.items():
+            provider = Provider(name, f"{name}-model", f"https://{name}", "key")
+            provider.client = fake_openai(create)
+            client._providers[name] = provider
+        return client, router
+    return make
+
+
+def test_ask_stream_fails_over_on_transient_error(chunk, client_with_providers):
+    def broken(**kwargs):
+        raise ConnectionError("connection reset")
+
+    def healthy(**kwargs):
+        assert kwargs["model"] == "Backup-model"
+        return iter([chunk("from "), chunk("backup")])
+
+    client, router = client_with_providers({"Main": broken, "Backup": healthy})
+
+    assert client.ask_stream("hi") == "from backup"
+    assert router.stats("Main")["errors"] == 1
+    assert router.stats("Backup")["successes"] == 1
+
+
+def test_configuration_error_of_current_llm_is_raised(client_with_providers):
+    def unauthorized(**kwargs):
+        raise ValueError("401 bad key")
+
+    def healthy(**kwargs):
+        raise AssertionError("must not be called")
+
+    client, _ = client_with_providers({"Main": unauthorized, "Backup": healthy})
+
+    with pytest.raises(ValueError):
+        client.ask("hi")
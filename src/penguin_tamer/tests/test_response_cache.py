@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.response_cache import ResponseCache
+
+MESSAGES = [{"role": "system", "content": "s"}, {"role": "user", "content": "how do I list listening ports"}]
+
+
+def test_key_depends_on_all_request_parameters():
+    key = ResponseCache.make_key("m", "https://api", 0.7, MESSAGES)
+    assert key == ResponseCache.make_key("m", "https://api", 0.7, [dict(m) for m in MESSAGES])
+    assert key != ResponseCache.make_key("m2", "https://api", 0.7, MESSAGES)
+    assert key != ResponseCache.make_key("m", "https://other", 0.7, MESSAGES)
+    assert key != ResponseCache.make_key("m", "https://api", 0.2, MESSAGES)
+    assert key != ResponseCache.make_key("m", "https://api", 0.7, MESSAGES[1:])
+
+
+def test_hit_miss_and_stats(tmp_path):
+    cache = ResponseCache(tmp_path)
+    key = cache.make_key("m", "u", 0.7, MESSAGES)
+    assert cache.get(key) is None
+    cache.put(key, "`ss -tlnp`")
+    assert cache.get(key) == "`ss -tlnp`"
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    assert stats["bytes_saved"] == len("`ss -tlnp`")
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = ResponseCache(tmp_path, ttl=60)
+    cache.put("k", "old answer")
+    path = tmp_path / "k.json"
+    entry = json.loads(path.read_text())
+    entry["created"] = time.time() - 120
+    path.write_text(json.dumps(entry))
+
+    assert cache.get("k") is None
+    assert not path.exists()
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=3 * 1100)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, "x" * 1000)
+        os.utime(tmp_path / f"{key}.json", (time.time() - 100 + i, time.time() - 100 + i))
+    # "a" использован недавно, поэтому вытесняется "b"
+    assert cache.get("a") is not None
+    cache.put("d", "x" * 1000)
+
+    assert sorted(p.stem for p in tmp_path.glob("*.json") if p.name != "stats.json") == ["a", "c", "d"]
@@ -0,0 +1,162 @@
+import asyncio
+import io
+import logging
+import sys
+import time
+from email.utils import formatdate
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from rich.console import Console
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer import llm_client
+from penguin_tamer.llm_client import AsyncOpenRouterClient, OpenRouterClient
+from penguin_tamer.metrics import MetricsLog
+from penguin_tamer.retry import RetryPolicy, retry_after
+
+
+def _status_error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://api/chat/completions")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return cls(f"error {status}", response=response, body=None)
+
+
+def _policy(**kwargs):
+    policy = RetryPolicy(rng=lambda: 1.0, **kwargs)
+    policy.sleeps = []
+    policy.sleep = policy.sleeps.append
+    return policy
+
+
+def test_backoff_is_exponential_with_full_jitter_and_cap():
+    error = _status_error(openai.InternalServerError, 502)
+    policy = RetryPolicy(rules={"server": 10}, base_delay=0.5, max_delay=3, rng=lambda: 1.0)
+    assert [policy.next_delay(error, n) for n in range(5)] == [0.5, 1.0, 2.0, 3, 3]
+    policy.rng = lambda: 0.25
+    assert policy.next_delay(error, 2) == 0.5
+
+
+def test_retry_after_header_is_honored():
+    assert retry_after(_status_error(openai.RateLimitError, 429, {"retry-after": "7"})) == 7
+    assert retry_after(_status_error(openai.RateLimitError, 429, {"retry-after-ms": "250"})) == 0.25
+    assert 0 < retry_after(_status_error(openai.RateLimitError, 429,
+                                         {"retry-after": formatdate(time.time() + 30)})) <= 30
+
+    policy = _policy(max_retry_after=10)
+    assert policy.next_delay(_status_error(openai.RateLimitError, 429, {"retry-after": "7"}), 0) == 7
+    # Ждать дольше max_retry_after не имеет смысла — ошибка сразу
+    assert policy.next_delay(_status_error(openai.RateLimitError, 429, {"retry-after": "120"}), 0) is None
+
+
+def test_rules_are_per_error_class():
+    policy = _policy(rules={"rate_limit": 2, "server": 0})
+    assert policy.next_delay(_status_error(openai.RateLimitError, 429), 1) is not None
+    assert policy.next_delay(_status_error(openai.RateLimitError, 429), 2) is None
+    assert policy.next_delay(_status_error(openai.InternalServerError, 502), 0) is None
+    assert policy.next_delay(_status_error(openai.AuthenticationError, 401), 0) is None
+    assert policy.next_delay(ValueError("bug"), 0) is None
+
+
+def test_call_retries_until_success_and_reports_each_retry():
+    policy = _policy(rules={"server": 3, "connection": 2})
+    outcomes = [_status_error(openai.InternalServerError, 502), ConnectionError("reset"), "ok"]
+    retries = []
+
+    def request():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert policy.call(request, lambda n, e, d: retries.append((n, type(e).__name__))) == "ok"
+    assert retries == [(1, "InternalServerError"), (2, "ConnectionError")]
+    assert policy.sleeps == [0.5, 1.0]
+
+
+@pytest.fixture
+def metrics_log(tmp_path, monkeypatch):
+    log = MetricsLog(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(llm_client, "metrics", log)
+    return log
+
+
+def test_stream_is_retried_before_first_token(metrics_log, chunk, make_client):
+    calls = []
+
+    def stream():
+        yield chunk("")  # Служебный чанк без текста — пользователь еще ничего не видел
+        raise httpx.RemoteProtocolError("peer closed connection")
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise _status_error(openai.RateLimitError, 429, {"retry-after": "0.01"})
+        if len(calls) == 2:
+            return stream()
+        return iter([chunk("Hello")])
+
+    client = make_client(create, retry=_policy())
+    assert client.ask_stream("hi") == "Hello"
+    assert len(calls) == 3
+    assert client.retry.sleeps == [0.01, 1.0]
+
+    request = metrics_log.read("request")[-1]
+    assert request["ok"] is True and request["retries"] == 2 and request["retry_wait"] == 1.01
+    assert [r["kind"] for r in metrics_log.read("retry")] == ["rate_limit", "connection"]
+
+
+def test_stream_is_not_retried_after_tokens_were_shown(metrics_log, chunk, make_client):
+    calls = []
+
+    def stream():
+        yield chunk("Partial ")
+        raise httpx.RemoteProtocolError("peer closed connection")
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return stream()
+
+    with pytest.raises(httpx.RemoteProtocolError):
+        make_client(create, retry=_policy()).ask_stream("hi")
+    assert len(calls) == 1
+    assert metrics_log.read("request")[-1]["retries"] == 0
+
+
+def test_plain_request_gives_up_on_non_transient_error(metrics_log, make_client):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise _status_error(openai.AuthenticationError, 401)
+
+    with pytest.raises(openai.AuthenticationError):
+        make_client(create, retry=_policy()).ask("hi")
+    assert len(calls) == 1
+
+
+def test_async_ask_retries(metrics_log, make_client):
+    outcomes = [_status_error(openai.InternalServerError, 503)]
+
+    async def create(**kwargs):
+        if outcomes:
+            raise outcomes.pop()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="done"))])
+
+    client = make_client(create, AsyncOpenRouterClient, retry=_policy())
+    assert asyncio.run(client.ask("hi")) == "done"
+    assert metrics_log.read("request")[-1]["retries"] == 1
+
+
+def test_builtin_openai_retries_are_disabled():
+    client = OpenRouterClient(
+        console=Console(file=io.StringIO()), logger=logging.getLogger("test"),
+        api_key="key", api_url="https://api", model="model", system_content="system",
+        retry=RetryPolicy(),
+    )
+    assert client.client.max_retries == 0
@@ -0,0 +1,139 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.script_executor import (
+    CommandExecutorFactory, LinuxCommandExecutor, PtyCommandExecutor, pump_output,
+)
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="bash commands")
+
+
+def test_stdout_and_stderr_are_forwarded_and_captured(capsys):
+    result = LinuxCommandExecutor().execute("echo out; echo err >&2; printf '  indented\\n'; exit 3")
+    assert result.returncode == 3
+    assert result.stdout == "out\n  indented\n"
+    assert result.stderr == "err\n"
+    captured = capsys.readouterr()
+    assert captured.out == result.stdout and captured.err == result.stderr
+
+
+def test_large_stderr_does_not_block_stdout(capsys):
+    # Больше буфера канала (64 КБ) в stderr до любого вывода в stdout
+    command = f"{sys.executable} -c \"import sys; sys.stderr.write('e' * 1000000); print('ok')\""
+    result = LinuxCommandExecutor().execute(command)
+    assert result.stdout == "ok\n"
+    assert len(result.stderr) == 1000000
+
+
+def test_pump_output_decodes_utf8_split_across_reads():
+    process = subprocess.Popen(
+        [sys.executable, "-c",
+         "import sys, time; sys.stdout.buffer.write('п'.encode()[:1]); sys.stdout.flush(); time.sleep(0.05);"
+         "sys.stdout.buffer.write('п'.encode()[1:] + b'\\n')"],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    class Sink(list):
+        write = list.append
+
+        def flush(self):
+            pass
+
+    out, err = Sink(), Sink()
+    out_capture, err_capture = pump_output(process, out, err)
+    assert (out_capture.text(), err_capture.text()) == ("п\n", "")
+    process.wait()
+    assert "".join(out) == "п\n" and not err
+
+
+class _Output(list):
+    def write(self, data):
+        self.append(data)
+
+
+def test_pty_gives_the_command_a_terminal():
+    output = _Output()
+    result = PtyCommandExecutor(output=output).execute(
+        f"{sys.executable} -c \"import sys; print(sys.stdout.isatty())\"; printf '\\033[31mred\\033[0m\\n' >&2; exit 5")
+    raw = b"".join(output)
+    assert b"\x1b[31mred" in raw  # Цвета уходят в терминал как есть
+    assert result.returncode == 5
+    assert result.stdout == "True\nred\n" and result.stderr == ""  # Журнал без управляющих последовательностей
+
+
+def test_pty_transcript_is_bounded():
+    output = _Output()
+    result = PtyCommandExecutor(memory_budget=200, output=output).execute("seq 1 1000")
+    assert sum(len(chunk) for chunk in output) > 3000
+    assert result.stdout.startswith("1\n2\n")
+    assert result.stdout.endswith("999\n1000\n")
+    assert len(result.stdout.splitlines()) < 60
+    assert "omitted" in result.stdout
+    # Полный вывод сохранен во временном файле
+    assert [line.rstrip("\r") for line in result.stdout_capture.iter_lines()] == [str(i) for i in range(1, 1001)]
+
+
+def test_pty_from_worker_thread_restores_terminal():
+    import pty
+    import termios
+    import threading
+
+    # Терминал пользователя — свой псевдотерминал; обработчик SIGWINCH вне главного потока недоступен
+    user_master, user_tty = pty.openpty()
+    saved_attrs = termios.tcgetattr(user_tty)
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = PtyCommandExecutor(output=user_tty, input_fd=user_tty).execute("echo from-thread")
+        except BaseException as e:
+            outcome["error"] = e
+
+    try:
+        worker = threading.Thread(target=run)
+        worker.start()
+        worker.join(10)
+        assert not worker.is_alive()
+        assert "error" not in outcome
+        assert outcome["result"].returncode == 0
+        assert outcome["result"].stdout == "from-thread\n"
+        assert termios.tcgetattr(user_tty) == saved_attrs
+    finally:
+        os.close(user_master)
+        os.close(user_tty)
+
+
+def test_factory_modes():
+    create = CommandExecutorFactory.create_executor
+    assert isinstance(create("pty", persistent=False), PtyCommandExecutor)
+    assert isinstance(create("pipe", persistent=False), LinuxCommandExecutor)
+    # Под pytest stdin — не терминал
+    assert isinstance(create("auto", persistent=False), LinuxCommandExecutor)
+
+
+def test_factory_defaults_to_new_shell_with_pipes(monkeypatch):
+    from penguin_tamer import script_executor
+    # Ключей нет в настройках: действуют значения по умолчанию
+    monkeypatch.setattr(script_executor.config, "get", lambda section, key, default=None: default)
+    monkeypatch.setattr(script_executor.sys.stdin, "isatty", lambda: True, raising=False)
+    monkeypatch.setattr(script_executor.sys.stdout, "isatty", lambda: True, raising=False)
+    executor = CommandExecutorFactory.create_executor()
+    assert type(executor) is LinuxCommandExecutor
+
+
+def test_factory_persistent_shell():
+    from penguin_tamer.shell_session import SessionCommandExecutor, close_shell_sessions
+    try:
+        executor = CommandExecutorFactory.create_executor("pipe", persistent=True)
+        assert isinstance(executor, SessionCommandExecutor)
+        assert executor.session.terminal == "pipe"
+        # Одна оболочка на диалог
+        assert CommandExecutorFactory.create_executor("pipe", persistent=True).session is executor.session
+    finally:
+        close_shell_sessions()
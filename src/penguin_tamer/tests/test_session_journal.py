@@ -0,0 +1,165 @@
+import gzip
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.session_journal import (
+    SessionJournal, compress_old_sessions, find_session, list_sessions, load_session,
+)
+
+SYSTEM = {"role": "system", "content": "system"}
+
+
+def _turn(n):
+    return [{"role": "user", "content": f"question {n}"},
+            {"role": "assistant", "content": f"answer {n}\n```bash\necho {n}\n```"}]
+
+
+def test_sync_appends_only_new_messages_without_system(tmp_path):
+    journal = SessionJournal.create(tmp_path)
+    messages = [SYSTEM]
+    journal.sync(messages)
+    assert not journal.path.exists()  # пустой диалог не оставляет файла
+
+    messages += _turn(1)
+    journal.sync(messages)
+    journal.sync(messages)  # повторный вызов ничего не дописывает
+    messages += _turn(2)
+    journal.sync(messages)
+
+    assert journal.path.read_text(encoding="utf-8").count("\n") == 4
+    assert load_session(journal.path) == _turn(1) + _turn(2)
+
+
+def test_resume_continues_the_same_file(tmp_path):
+    journal = SessionJournal.create(tmp_path)
+    journal.sync([SYSTEM] + _turn(1))
+
+    resumed, messages = SessionJournal.resume(find_session(tmp_path))
+    assert resumed.id == journal.id and messages == _turn(1)
+    resumed.sync([SYSTEM] + messages + _turn(2))
+    assert load_session(journal.path) == _turn(1) + _turn(2)
+
+
+def test_damaged_last_line_is_skipped(tmp_path):
+    journal = SessionJournal.create(tmp_path)
+    journal.sync([SYSTEM] + _turn(1))
+    with open(journal.path, "ab") as f:
+        f.write(b'{"role": "user", "cont')  # запись оборвалась при сбое
+    assert load_session(journal.path) == _turn(1)
+
+
+def test_resume_after_torn_write_appends_on_a_new_line(tmp_path):
+    journal = SessionJournal.create(tmp_path)
+    journal.sync([SYSTEM] + _turn(1))
+    with open(journal.path, "ab") as f:
+        f.write(b'{"role": "user", "content": "question 2"}\n{"role": "assis')  # ответ оборвался при сбое
+
+    resumed, messages = SessionJournal.resume(journal.path)
+    question = {"role": "user", "content": "question 2"}
+    assert messages == _turn(1) + [question]
+    resumed.sync([SYSTEM] + messages + _turn(3))
+    assert load_session(journal.path) == _turn(1) + [question] + _turn(3)
+
+
+def test_find_session_by_id_prefix_and_latest(tmp_path):
+    for name, mtime in (("20260101-100000-aaaa", 100), ("20260202-100000-bbbb", 200)):
+        (tmp_path / f"{name}.jsonl").write_text("{}\n")
+        os.utime(tmp_path / f"{name}.jsonl", (mtime, mtime))
+    assert find_session(tmp_path).name == "20260202-100000-bbbb.jsonl"
+    assert find_session(tmp_path, "20260101").name == "20260101-100000-aaaa.jsonl"
+    assert find_session(tmp_path, "2027") is None
+    assert find_session(tmp_path / "missing") is None
+
+
+def test_old_sessions_are_compressed_and_pruned(tmp_path):
+    old = time.time() - 30 * 86400
+    for i in range(4):
+        journal = SessionJournal(tmp_path / f"s{i}.jsonl")
+        journal.sync([SYSTEM] + _turn(i))
+        journal.close()
+        os.utime(journal.path, (old + i, old + i))
+    current = SessionJournal(tmp_path / "current.jsonl")
+    current.sync([SYSTEM] + _turn(9))
+
+    compress_old_sessions(tmp_path, compress_days=7, max_sessions=3, keep=current.path)
+
+    names = [p.name for p in list_sessions(tmp_path)]
+    assert names == ["current.jsonl", "s3.jsonl.gz", "s2.jsonl.gz"]
+    with gzip.open(tmp_path / "s3.jsonl.gz", "rb") as f:
+        assert f.read().count(b"\n") == 2
+
+    resumed, messages = SessionJournal.resume(tmp_path / "s3.jsonl.gz")
+    assert messages == _turn(3)
+    assert resumed.path.name == "s3.jsonl" and not (tmp_path / "s3.jsonl.gz").exists()
+
+
+def test_torn_compressed_copy_does_not_destroy_the_session(tmp_path):
+    # pt завершился посреди сжатия старой версией: оборванный .gz новее уцелевшего .jsonl
+    journal = SessionJournal(tmp_path / "s.jsonl")
+    journal.sync([SYSTEM] + _turn(1) + _turn(2))
+    journal.close()
+    data = gzip.compress(journal.path.read_bytes())
+    (tmp_path / "s.jsonl.gz").write_bytes(data[:len(data) // 2])
+    os.utime(journal.path, (time.time() - 60, time.time() - 60))
+    assert find_session(tmp_path) == tmp_path / "s.jsonl.gz"
+
+    resumed, messages = SessionJournal.resume(find_session(tmp_path))
+    resumed.close()
+    assert messages == _turn(1) + _turn(2)
+    assert [p.name for p in tmp_path.iterdir()] == ["s.jsonl"]
+
+
+def test_torn_compressed_session_keeps_complete_lines(tmp_path):
+    lines = "".join(f'{{"role": "user", "content": "{i}"}}\n' for i in range(2000)).encode()
+    data = gzip.compress(lines)
+    (tmp_path / "s.jsonl.gz").write_bytes(data[:len(data) // 2])
+
+    resumed, messages = SessionJournal.resume(tmp_path / "s.jsonl.gz")
+    resumed.close()
+    assert 0 < len(messages) < 2000
+    assert messages == [{"role": "user", "content": str(i)} for i in range(len(messages))]
+
+
+def test_compression_leaves_no_temporary_files(tmp_path):
+    journal = SessionJournal(tmp_path / "s.jsonl")
+    journal.sync([SYSTEM] + _turn(1))
+    journal.close()
+    old = time.time() - 30 * 86400
+    os.utime(journal.path, (old, old))
+    stale = tmp_path / ".s.jsonl.gz.abc.tmp"  # Остался от прерванного сжатия
+    stale.write_bytes(b"\x1f\x8b")
+    os.utime(stale, (old, old))
+
+    compress_old_sessions(tmp_path, compress_days=7)
+
+    assert [p.name for p in tmp_path.iterdir()] == ["s.jsonl.gz"]
+    assert (tmp_path / "s.jsonl.gz").stat().st_mtime == pytest.approx(old)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="flock")
+def test_open_journal_of_another_dialog_is_not_compressed_or_removed(tmp_path):
+    old = time.time() - 30 * 86400
+    running = SessionJournal(tmp_path / "running.jsonl")  # Диалог в другом терминале
+    running.sync([SYSTEM] + _turn(1))
+    os.utime(running.path, (old, old))
+    recent = SessionJournal(tmp_path / "recent.jsonl")
+    recent.sync([SYSTEM] + _turn(2))
+    recent.close()
+
+    compress_old_sessions(tmp_path, compress_days=7, max_sessions=0)
+
+    assert sorted(p.name for p in list_sessions(tmp_path)) == ["recent.jsonl", "running.jsonl"]
+    running.sync([SYSTEM] + _turn(1) + _turn(3))
+    assert load_session(running.path) == _turn(1) + _turn(3)
+
+    running.close()
+    os.utime(running.path, (old, old))
+    compress_old_sessions(tmp_path, compress_days=7, max_sessions=1)
+    assert [p.name for p in list_sessions(tmp_path)] == ["recent.jsonl"]
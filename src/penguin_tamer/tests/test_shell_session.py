@@ -0,0 +1,108 @@
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.shell_session import ShellSession, quote
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="bash")
+
+
+class _Sink(list):
+    def write(self, data):
+        self.append(data)
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def session(tmp_path):
+    with ShellSession("pipe", stdout=_Sink(), stderr=_Sink(), cwd=str(tmp_path)) as shell:
+        yield shell
+
+
+def test_state_carries_over_between_commands(session, tmp_path):
+    (tmp_path / "sub").mkdir()
+    assert session.run("cd sub; export GREETING=hi; count=41").returncode == 0
+    result = session.run("pwd; echo $GREETING $((count + 1))")
+    assert result.stdout == f"{tmp_path / 'sub'}\nhi 42\n"
+    assert session.cwd == str(tmp_path / "sub")
+    assert session.starts == 1
+
+
+def test_exit_codes_and_streams(session):
+    result = session.run("echo out; echo err >&2; exit_code() { return 3; }; exit_code")
+    assert (result.returncode, result.stdout, result.stderr) == (3, "out\n", "err\n")
+    assert session.run("syntax error (").returncode == 2
+    assert session.run("no-such-command-here").returncode == 127
+    # Вывод без перевода строки и похожий на статус не путает разбор
+    result = session.run("printf '__PT_DONE_ 1 0 /'")
+    assert (result.returncode, result.stdout) == (0, "__PT_DONE_ 1 0 /")
+
+
+def test_multiline_and_quoting(session):
+    code = "if true; then\n  echo 'single' \"double $((1 + 1))\" \\\\back\nfi\ncat <<'EOF'\nhere $doc\nEOF"
+    result = session.run(code)
+    assert result.returncode == 0
+    assert result.stdout == "single double 2 \\back\nhere $doc\n"
+
+
+def test_quote_is_one_line():
+    assert "\n" not in quote("a\nb'c\\d")
+
+
+def test_shell_restarts_after_exit(session, tmp_path):
+    session.run("cd /")
+    assert session.run("exit 7").returncode == 7
+    result = session.run("pwd")
+    assert (result.returncode, result.stdout) == (0, "/\n")  # Новая оболочка в последнем каталоге
+    assert session.starts == 2
+
+
+def test_ctrl_c_interrupts_only_the_command(session):
+    threading.Timer(0.3, os.kill, (os.getpid(), signal.SIGINT)).start()
+    start = time.perf_counter()
+    with pytest.raises(KeyboardInterrupt):
+        session.run("state=before; sleep 5; state=after")
+    assert time.perf_counter() - start < 3
+    result = session.run("echo $state")
+    assert result.stdout == "before\n"  # Остаток блока не выполнен, оболочка та же
+    assert session.starts == 1
+
+
+@pytest.mark.parametrize("loop", ["while true; do sleep 1; done", "for i in 1 2 3; do sleep 2; done"])
+def test_ctrl_c_inside_loop_stops_the_whole_block(session, loop):
+    threading.Timer(0.3, session._signal, (signal.SIGINT,)).start()
+    result = session.run(f"{loop}; echo AFTER")
+    assert (result.returncode, result.stdout) == (130, "")
+    assert session.run("echo alive").stdout == "alive\n"
+    assert session.starts == 1
+
+
+def test_pty_session():
+    output = _Sink()
+    read_fd, write_fd = os.pipe()
+    try:
+        with ShellSession("pty", output=output, input_fd=read_fd) as shell:
+            result = shell.run(f"{sys.executable} -c \"import sys; print(sys.stdin.isatty(), sys.stdout.isatty())\"")
+            assert (result.returncode, result.stdout) == (0, "True True\n")
+            threading.Timer(0.3, os.write, (write_fd, b"typed\n")).start()
+            assert shell.run("read value; echo got=$value").stdout.endswith("got=typed\n")
+            # Ctrl+C через терминал команды
+            threading.Timer(0.3, os.write, (write_fd, b"\x03")).start()
+            assert shell.run("sleep 5; echo after").returncode == 130
+            threading.Timer(0.3, os.write, (write_fd, b"\x03")).start()
+            result = shell.run("while true; do sleep 1; done; echo after")
+            assert result.returncode == 130 and "after" not in result.stdout
+            assert shell.run("echo alive").stdout == "alive\n"
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
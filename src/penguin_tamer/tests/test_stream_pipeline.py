@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.llm_client import RequestCancelled
+from penguin_tamer.stream_pipeline import StreamReader, StreamTimings
+
+
+def test_reader_drains_all_text_and_records_timings(chunk):
+    chunks = [chunk(None), chunk("Hel"), chunk("lo"), SimpleNamespace(choices=[]), chunk(" world")]
+    timings = StreamTimings()
+    reader = StreamReader(iter(chunks), timings)
+    reader.start()
+    reader.wait_first_token()
+    reader.join()
+
+    assert reader.drain() == "Hello world"
+    assert reader.drain() == ""
+    assert timings.chunks == 3
+    assert 0 <= timings.ttft <= timings.total
+
+
+def test_reader_passes_error_to_caller(chunk):
+    def broken():
+        yield chunk("partial")
+        raise ConnectionError("reset by peer")
+
+    reader = StreamReader(broken(), StreamTimings())
+    reader.start()
+    reader.join()
+
+    assert reader.drain() == "partial"
+    with pytest.raises(ConnectionError):
+        reader.raise_error()
+
+
+def test_ctrl_c_closes_stream_and_keeps_partial_reply(make_client, fake_stream):
+    stream = fake_stream(["[Code #1]\n```bash\necho hi\n```\n"], hang=True)
+    client = make_client(lambda **kwargs: stream)
+
+    def ctrl_c(index, code):
+        raise KeyboardInterrupt  # Ctrl+C приходит в основной поток во время отрисовки
+
+    client.on_code_block = ctrl_c
+
+    with pytest.raises(RequestCancelled):
+        client.ask_stream("hi")
+    assert stream.closed.is_set()
+    assert client.messages[-2]["content"] == "hi"
+    assert client.messages[-1] == {
+        "role": "assistant",
+        "content": "[Code #1]\n```bash\necho hi\n```\n\n\n[Answer interrupted by the user]",
+    }
+
+
+def test_render_error_closes_stream(make_client, fake_stream):
+    stream = fake_stream(["[Code #1]\n```bash\necho hi\n```\n"], hang=True)
+    client = make_client(lambda **kwargs: stream)
+
+    def broken_pipe(index, code):
+        raise BrokenPipeError  # Например, клиент демона отключился
+
+    client.on_code_block = broken_pipe
+
+    with pytest.raises(BrokenPipeError):
+        client.ask_stream("hi")
+    assert stream.closed.is_set()
+
+
+def test_ctrl_c_before_first_token_keeps_dialog_consistent(make_client):
+    def create(**kwargs):
+        raise KeyboardInterrupt
+
+    client = make_client(create)
+
+    with pytest.raises(RequestCancelled):
+        client.ask("hi")
+    assert [m["role"] for m in client.messages] == ["system", "user", "assistant"]
+    assert client.messages[-1]["content"] == "[Answer interrupted by the user]"
@@ -0,0 +1,34 @@
+import os
+import sys
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.terminal import clean_terminal_output, clean_terminal_text, write_all
+
+
+def test_clean_output_removes_colors_titles_and_charset_switches():
+    # tput sgr0 выводит \x1b(B: раньше в журнале PTY оставалось «(B»
+    data = b"\x1b[1;32mok\x1b(B\x1b[m\r\n\x1b]0;title\x07done\r\n"
+    assert clean_terminal_output(data) == b"ok\ndone\n"
+
+
+def test_clean_text_keeps_last_redraw_and_non_ascii():
+    assert clean_terminal_text("загрузка 10%\r загрузка 100%\r\n\x1b[31mошибка\x1b[0m\n") == " загрузка 100%\nошибка\n"
+
+
+def test_write_all_writes_everything():
+    read_fd, write_fd = os.pipe()
+    try:
+        write_all(write_fd, b"x" * 50000)
+        os.close(write_fd)
+        write_fd = None
+        data = b""
+        while chunk := os.read(read_fd, 65536):
+            data += chunk
+        assert data == b"x" * 50000
+    finally:
+        os.close(read_fd)
+        if write_fd is not None:
+            os.close(write_fd)
@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+# Добавляем путь к src
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from penguin_tamer.token_counter import TokenCounter, heuristic_tokens
+
+
+def test_heuristic_counts_cyrillic_denser_than_ascii():
+    assert heuristic_tokens("") == 0
+    assert heuristic_tokens("a" * 40) == 10
+    assert heuristic_tokens("я" * 40) == 20
+
+
+def test_count_is_cached_per_message():
+    counter = TokenCounter()
+    message = {"role": "user", "content": "list listening ports"}
+    first = counter.count(message)
+    assert counter.count(message) == first
+    assert counter.tokenized == 1
+
+    # Новое содержимое сообщения пересчитывается
+    message["content"] = "list listening ports and owning processes"
+    assert counter.count(message) > first
+    assert counter.tokenized == 2
+
+
+def test_sync_counts_only_new_messages():
+    counter = TokenCounter()
+    history = [{"role": "system", "content": "system"}]
+    for i in range(50):
+        history.append({"role": "user", "content": f"question {i}"})
+        history.append({"role": "assistant", "content": f"answer {i}"})
+        counter.sync(history)
+    assert counter.tokenized == len(history)
+    assert counter.total == counter.count_all(history)
+
+    # Обрезанная история пересчитывается по кэшу, без повторной токенизации
+    del history[1:21]
+    assert counter.sync(history) == counter.count_all(history)
+    assert counter.tokenized == 101
+
+
+def test_rebuilt_history_releases_dropped_messages():
+    counter = TokenCounter()
+    old = [{"role": "user", "content": f"old {i}"} for i in range(10)]
+    counter.sync(old)
+
+    new = [{"role": "user", "content": "new"}]
+    assert counter.sync(new) == counter.count(new[0])
+    assert len(counter._cache) == 1
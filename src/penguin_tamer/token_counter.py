@@ -0,0 +1,105 @@
+"""
+Локальный подсчет токенов сообщений.
+
+Если установлен tiktoken, используется точный токенайзер (cl100k_base),
+иначе — быстрая эвристика без дополнительных зависимостей.
+
+TokenCounter кэширует число токенов каждого сообщения, поэтому история
+диалога не токенизируется заново на каждом ходе: новый ход стоит
+O(размер нового сообщения).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Служебная надбавка на одно сообщение (роль, разделители)
+MESSAGE_OVERHEAD = 4
+
+# Ленивый импорт tiktoken (необязательная зависимость)
+_encoding = None
+
+
+def _get_encoding():
+    """Возвращает кодировку tiktoken или False, если он не установлен."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def heuristic_tokens(text: str) -> int:
+    """Быстрая оценка: ~4 символа ASCII или ~2 символа не-ASCII на токен."""
+    if not text:
+        return 0
+    # Лишние байты UTF-8 ~ число не-ASCII символов (кириллица — 2 байта)
+    non_ascii = len(text.encode("utf-8")) - len(text)
+    return (len(text) - non_ascii + 3) // 4 + (non_ascii + 1) // 2
+
+
+def count_text(text: str) -> int:
+    """Число токенов в тексте."""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return heuristic_tokens(text)
+
+
+def _content_text(content: Any) -> str:
+    """Текст сообщения; content может быть строкой или списком частей."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+class TokenCounter:
+    """Счетчик токенов с кэшем на каждое сообщение и нарастающим итогом.
+
+    Кэш хранится рядом с сообщениями (по id), а не в самих словарях:
+    сообщения отправляются провайдеру как есть, и лишние поля в них недопустимы.
+    """
+
+    def __init__(self) -> None:
+        # id(сообщения) -> (сообщение, content на момент подсчета, токены)
+        self._cache: Dict[int, Tuple[dict, Any, int]] = {}
+        self.total = 0               # Нарастающий итог по истории (см. sync)
+        self.tokenized = 0           # Сколько раз реально вызывался токенайзер
+        self._synced = 0             # Сколько сообщений истории уже учтено в total
+        self._last: Optional[dict] = None  # Последнее учтенное сообщение
+
+    def count(self, message: dict) -> int:
+        """Число токенов сообщения; повторный вызов берет значение из кэша."""
+        content = message.get("content")
+        entry = self._cache.get(id(message))
+        if entry is not None and entry[0] is message and entry[1] is content:
+            return entry[2]
+        tokens = count_text(_content_text(content)) + MESSAGE_OVERHEAD
+        self._cache[id(message)] = (message, content, tokens)
+        self.tokenized += 1
+        return tokens
+
+    def count_all(self, messages: List[dict]) -> int:
+        return sum(self.count(m) for m in messages)
+
+    def sync(self, messages: List[dict]) -> int:
+        """Обновляет нарастающий итог по истории и возвращает его.
+
+        Если история только дополнялась, учитываются лишь новые сообщения.
+        Иначе (история обрезана или заменена) итог пересчитывается по кэшу,
+        а записи о сообщениях, которых больше нет в истории, удаляются:
+        кэш держит сами сообщения и без этого не дал бы их освободить.
+        """
+        n = self._synced
+        if n <= len(messages) and (n == 0 or messages[n - 1] is self._last):
+            self.total += self.count_all(messages[n:])
+        else:
+            self.total = self.count_all(messages)
+            alive = {id(m) for m in messages}
+            self._cache = {key: entry for key, entry in self._cache.items() if key in alive}
+        self._synced = len(messages)
+        self._last = messages[-1] if messages else None
+        return self.total